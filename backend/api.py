@@ -0,0 +1,35 @@
+from functools import wraps
+from typing import Any, Optional
+
+from flask import current_app, jsonify
+
+
+# Standard API response wrapper
+def api_response(
+    success: bool = True,
+    data: Optional[Any] = None,
+    error: Optional[str] = None,
+    status_code: int = 200,
+) -> tuple:
+    """Standardized API response format"""
+    return jsonify(api_body(success, data, error)), status_code
+
+
+def api_body(
+    success: bool = True, data: Optional[Any] = None, error: Optional[str] = None
+) -> dict:
+    """The response envelope, shared with the ASGI app"""
+    return {"success": success, "data": data, "error": error}
+
+
+# Error handler decorator
+def handle_errors(f):
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        except Exception as e:
+            current_app.logger.error(f"Error in {f.__name__}: {str(e)}")
+            return api_response(success=False, error=str(e), status_code=500)
+
+    return wrapper
@@ -0,0 +1,113 @@
+"""Flask application factory; heavy dependencies are imported lazily."""
+import logging
+import os
+from typing import Any, Dict, Optional
+
+from .startup import StartupReport, module_phases
+
+with module_phases.phase("import flask"):
+    from flask import Flask
+    from flask_cors import CORS
+    from dotenv import load_dotenv
+
+from .api import api_response
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def create_app(config: Optional[Dict[str, Any]] = None) -> Flask:
+    """Build the dashboard app.
+
+    `PROVIDER_PROBES` (default True) starts the background health probes
+    of the AI providers, `HOST_SAMPLER` (default True) the host metrics
+    sampler shared by all worker processes. `BUILD_ASSETS` (default
+    True) brings the fingerprinted static assets in `ASSETS_DIR` up to
+    date; unchanged files only cost a stat(). `METRICS` (default True)
+    instruments every request for `/metrics` and publishes this
+    process's values for the other workers' scrapes.
+    """
+    report = StartupReport()
+
+    with report.phase("load .env"):
+        # Load environment variables
+        load_dotenv()
+        # Configure logging
+        logging.basicConfig(level=logging.INFO)
+
+    with report.phase("create app"):
+        app = Flask(
+            __name__,
+            template_folder=os.path.join(BASE_DIR, "..", "frontend", "templates"),
+            static_folder=os.path.join(BASE_DIR, "..", "frontend", "static"),
+        )
+        app.config["PROVIDER_PROBES"] = True
+        app.config["HOST_SAMPLER"] = True
+        app.config["BUILD_ASSETS"] = True
+        app.config["METRICS"] = True
+        app.config["ASSETS_DIR"] = os.path.join(
+            BASE_DIR, "..", "frontend", "build"
+        )
+        app.config.update(config or {})
+        app.extensions["startup"] = report
+        CORS(app)
+
+    with report.phase("import blueprints"):
+        from .routes.ai import ai_bp
+        from .routes.assets import assets_bp
+        from .routes.cloudflare import cloudflare_bp
+        from .routes.dashboard import dashboard_bp
+        from .routes.glb import glb_bp
+        from .routes.metrics import metrics_bp
+        from .routes.system import system_bp
+        from .routes.weather import weather_bp
+
+    with report.phase("register blueprints"):
+        for blueprint in (
+            dashboard_bp, assets_bp, glb_bp, system_bp, weather_bp, ai_bp,
+            cloudflare_bp, metrics_bp,
+        ):
+            app.register_blueprint(blueprint)
+        register_error_handlers(app)
+
+    if app.config["BUILD_ASSETS"]:
+        with report.phase("build assets"):
+            from .assets import build_assets
+            build_assets(app.static_folder, app.config["ASSETS_DIR"])
+
+    if app.config["METRICS"]:
+        with report.phase("start metrics"):
+            from .metrics import get_shared_metrics, init_app
+            init_app(app)
+            get_shared_metrics().start()
+
+    if app.config["PROVIDER_PROBES"]:
+        with report.phase("start provider probes"):
+            from .services import get_providers
+            get_providers().start_health_probes()
+
+    if app.config["HOST_SAMPLER"]:
+        with report.phase("start host sampler"):
+            from .host_state import get_host_sampler
+            get_host_sampler().start()
+
+    report.ready()
+    logger.info(
+        f"🚀 App ready in {report.to_dict()['create_app_ms']} ms"
+    )
+    return app
+
+
+def register_error_handlers(app: Flask) -> None:
+    @app.errorhandler(404)
+    def not_found_error(error):
+        return api_response(
+            success=False, error="Resource not found", status_code=404
+        )
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        return api_response(
+            success=False, error="Internal server error", status_code=500
+        )
@@ -0,0 +1,371 @@
+"""ASGI variant of the app (Starlette).
+
+Endpoints waiting on slow upstreams (chat, Cloudflare, weather) are
+coroutines; every other route is served by the mounted Flask app.
+"""
+import asyncio
+import logging
+import os
+import time
+from functools import wraps
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Match, Mount, Route
+
+from .api import api_body
+from .app import create_app
+from .components.ai_tools.usage_ledger import BUDGET_SOFT
+from .metrics import REQUESTS_IN_FLIGHT, MetricsRegistry, get_metrics
+from .routes.ai import CHAT_NOT_INITIALIZED_ERROR, parse_chat_message
+from .routes.cloudflare import (
+    BUDGET_EXCEEDED_ERROR,
+    INTERNAL_ERROR,
+    NOT_CONFIGURED_ERROR,
+    Rejection,
+    check_budget,
+    fallback_chunks,
+    fallback_result,
+    generation_options,
+    parse_prompt,
+    parse_prompts,
+    record_usage,
+    rejection,
+    sse_chunk,
+    sse_event,
+)
+from .routes.weather import parse_cities, weather_service
+from .services import get_providers
+
+logger = logging.getLogger(__name__)
+
+def api_response(
+    success: bool = True,
+    data: Optional[Any] = None,
+    error: Optional[str] = None,
+    status_code: int = 200,
+) -> JSONResponse:
+    """api.api_response for Starlette"""
+    return JSONResponse(api_body(success, data, error), status_code=status_code)
+
+
+def rejected(response: Rejection) -> JSONResponse:
+    body, status_code = response
+    return JSONResponse(body, status_code=status_code)
+
+
+def handle_errors(endpoint):
+    """api.handle_errors for coroutine endpoints"""
+    @wraps(endpoint)
+    async def wrapper(request: Request):
+        try:
+            return await endpoint(request)
+        except Exception as e:
+            logger.error(f"Error in {endpoint.__name__}: {str(e)}")
+            return api_response(success=False, error=str(e), status_code=500)
+
+    return wrapper
+
+
+async def request_json(request: Request) -> Optional[Dict]:
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def caller_id(request: Request) -> str:
+    """Who to bill a Cloudflare call to in the usage ledger"""
+    client_host = request.client.host if request.client else ""
+    return request.headers.get("X-Caller") or client_host or ""
+
+
+async def ollama_fallback(prompt: str) -> Dict:
+    """Answer with local Ollama once the soft budget is exceeded"""
+    ai_chat_instance = get_providers().get("chat")
+    if not ai_chat_instance:
+        return {"success": False, "error": BUDGET_EXCEEDED_ERROR}
+    response = await ai_chat_instance.async_client().get_ollama_response(
+        prompt
+    )
+    return fallback_result(ai_chat_instance, response)
+
+
+@handle_errors
+async def chat(request: Request):
+    ai_chat_instance = get_providers().get("chat")
+    if not ai_chat_instance:
+        return api_response(
+            success=False, error=CHAT_NOT_INITIALIZED_ERROR, status_code=503
+        )
+
+    user_message, error = parse_chat_message(await request.json())
+    if error:
+        return api_response(success=False, error=error, status_code=400)
+
+    response = await ai_chat_instance.async_client().get_response(
+        user_message
+    )
+    return api_response(data={"response": response})
+
+
+async def cloudflare_ai_endpoint(request: Request):
+    """Endpoint dla Cloudflare Workers AI"""
+    cloudflare_ai = get_providers().get("cloudflare")
+    if not cloudflare_ai:
+        return rejected(rejection(NOT_CONFIGURED_ERROR, 503))
+
+    try:
+        data = await request.json()
+        prompt, refusal = parse_prompt(data)
+        if refusal:
+            return rejected(refusal)
+        budget, refusal = check_budget()
+        if refusal:
+            return rejected(refusal)
+        if budget == BUDGET_SOFT:
+            return JSONResponse(await ollama_fallback(prompt))
+
+        logger.info(f"Cloudflare AI request: {prompt[:100]}...")
+        result = await cloudflare_ai.async_client().generate_text(
+            prompt=prompt, **generation_options(data)
+        )
+        record_usage([result], caller_id(request))
+        return JSONResponse(result)
+
+    except Exception as e:
+        logger.error(f"Cloudflare AI endpoint error: {e}")
+        return rejected(rejection(INTERNAL_ERROR, 500))
+
+
+async def iterate(chunks: List[Dict]) -> AsyncIterator[Dict]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def cloudflare_ai_stream(request: Request):
+    """Strumieniowanie odpowiedzi Cloudflare Workers AI (SSE)"""
+    cloudflare_ai = get_providers().get("cloudflare")
+    if not cloudflare_ai:
+        return rejected(rejection(NOT_CONFIGURED_ERROR, 503))
+
+    data = await request_json(request) or {}
+    prompt, refusal = parse_prompt(data)
+    if refusal:
+        return rejected(refusal)
+    budget, refusal = check_budget()
+    if refusal:
+        return rejected(refusal)
+
+    options = generation_options(data)
+    caller = caller_id(request)
+    if budget == BUDGET_SOFT:
+        chunks = iterate(fallback_chunks(await ollama_fallback(prompt)))
+    else:
+        chunks = cloudflare_ai.async_client().stream_text(
+            prompt=prompt, **options
+        )
+
+    async def generate():
+        # A browser disconnect cancels this generator; closing `chunks`
+        # then drops the upstream connection
+        try:
+            async for chunk in chunks:
+                yield sse_chunk(chunk, options["model"], caller)
+        except Exception as e:
+            logger.error(f"Cloudflare AI stream error: {e}")
+            yield sse_event({"error": str(e)}, event="error")
+        finally:
+            await chunks.aclose()
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def cloudflare_ai_batch(request: Request):
+    """Wiele promptów w jednym żądaniu, wykonywanych równolegle"""
+    cloudflare_ai = get_providers().get("cloudflare")
+    if not cloudflare_ai:
+        return rejected(rejection(NOT_CONFIGURED_ERROR, 503))
+
+    try:
+        data = await request.json()
+        prompts, refusal = parse_prompts(data)
+        if refusal:
+            return rejected(refusal)
+        budget, refusal = check_budget()
+        if refusal:
+            return rejected(refusal)
+        if budget == BUDGET_SOFT:
+            results = await asyncio.gather(
+                *(ollama_fallback(prompt) for prompt in prompts)
+            )
+            return JSONResponse({"success": True, "results": results})
+
+        logger.info(f"Cloudflare AI batch request: {len(prompts)} prompts")
+        results = await cloudflare_ai.async_client().generate_many(
+            prompts, **generation_options(data)
+        )
+        record_usage(results, caller_id(request))
+        return JSONResponse({"success": True, "results": results})
+
+    except Exception as e:
+        logger.error(f"Cloudflare AI batch endpoint error: {e}")
+        return rejected(rejection(INTERNAL_ERROR, 500))
+
+
+@handle_errors
+async def weather(request: Request):
+    """
+    Get weather data with movie quotes and graphics
+    (?include=uv,forecast adds UV index and a 24h forecast)
+    """
+    service = weather_service()
+    target_city = (
+        request.path_params.get("city")
+        or request.query_params.get("city", "Warsaw")
+    )
+    include = service.parse_include(request.query_params.get("include"))
+    return JSONResponse(await service.get_weather_async(target_city, include))
+
+
+@handle_errors
+async def weather_batch(request: Request):
+    """
+    Weather for many cities in one request (?cities=a,b,c or POST body)
+    """
+    service = weather_service()
+    if request.method == "POST":
+        cities = (await request.json() or {}).get("cities", [])
+    else:
+        cities = request.query_params.get("cities", "")
+    cities, error = parse_cities(cities, service.MAX_BATCH_CITIES)
+    if error:
+        return api_response(success=False, error=error, status_code=400)
+    results = await service.get_weather_batch_async(cities)
+    return api_response(data={"results": results})
+
+
+class MetricsMiddleware:
+    """Request metrics of the native async routes.
+
+    Requests routed to the Flask app are recorded by its own middleware
+    (see `metrics.init_app`), so they are passed through untouched. The
+    route label uses Flask's placeholder syntax (`/api/weather/<city>`),
+    so both serving modes report the same series.
+    """
+
+    def __init__(self, app, routes, registry: Optional[MetricsRegistry] = None):
+        self.app = app
+        self.routes = routes
+        self.registry = registry or get_metrics()
+
+    def native_route(self, scope) -> Optional[str]:
+        """Template of the native route serving `scope`, as the router picks it"""
+        chosen = None
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                chosen = route
+                break
+            if match == Match.PARTIAL and chosen is None:
+                chosen = route
+        # Routes handing the request to the Flask app have app == endpoint
+        if not isinstance(chosen, Route) or chosen.app is chosen.endpoint:
+            return None
+        return chosen.path.replace("{", "<").replace("}", ">")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        route = self.native_route(scope)
+        if route is None:
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        method = scope["method"]
+        response = {"status": "500", "sent": 0, "received": 0}
+        self.registry.inc(
+            REQUESTS_IN_FLIGHT, (("method", method), ("route", route)), 1
+        )
+
+        async def counting_receive():
+            message = await receive()
+            response["received"] += len(message.get("body", b""))
+            return message
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = str(message["status"])
+            elif message["type"] == "http.response.body":
+                response["sent"] += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, capture)
+        finally:
+            self.registry.record_request(
+                method, route, response["status"],
+                time.perf_counter() - started,
+                response["received"], response["sent"],
+            )
+
+
+def create_asgi_app(
+    config: Optional[Dict[str, Any]] = None,
+    wsgi_threads: Optional[int] = None,
+) -> Starlette:
+    """Build the ASGI app around `create_app(config)`.
+
+    `wsgi_threads` (default ASGI_WSGI_THREADS or 8) bounds the threads
+    serving the routes that stay synchronous; those are all quick.
+    """
+    flask_app = create_app(config)
+    wsgi_app = WSGIMiddleware(
+        flask_app,
+        workers=wsgi_threads or int(os.getenv("ASGI_WSGI_THREADS", "8")),
+    )
+
+    routes = [
+        Route("/api/chat", chat, methods=["POST"]),
+        Route("/api/cloudflare-ai", cloudflare_ai_endpoint, methods=["POST"]),
+        Route(
+            "/api/cloudflare-ai/stream", cloudflare_ai_stream,
+            methods=["POST"],
+        ),
+        Route(
+            "/api/cloudflare-ai/batch", cloudflare_ai_batch,
+            methods=["POST"],
+        ),
+        Route("/api/weather", weather, methods=["GET"]),
+        Route("/api/weather/batch", weather_batch, methods=["GET", "POST"]),
+        # Fixed paths that `/api/weather/{city}` would otherwise capture
+        *(
+            Route(f"/api/weather/{name}", wsgi_app)
+            for name in ("stats", "quota", "quote")
+        ),
+        Route("/api/weather/{city}", weather, methods=["GET"]),
+        Mount("/", app=wsgi_app),
+    ]
+    app = Starlette(
+        routes=routes,
+        middleware=[
+            Middleware(
+                CORSMiddleware,
+                allow_origins=["*"],
+                allow_methods=["*"],
+                allow_headers=["*"],
+            ),
+            Middleware(MetricsMiddleware, routes=routes),
+        ],
+    )
+    app.state.flask_app = flask_app
+    return app
@@ -0,0 +1,224 @@
+"""Static asset build: content-hashed names plus gzip/brotli variants.
+
+    python -m backend.assets
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # optional: only gzip variants are built
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, "..", "frontend", "static")
+BUILD_DIR = os.path.join(BASE_DIR, "..", "frontend", "build")
+MANIFEST_FILENAME = "manifest.json"
+
+HASH_LENGTH = 12
+COMPRESSIBLE = {".js", ".mjs", ".css", ".json", ".html", ".svg", ".txt", ".map"}
+MIN_COMPRESS_SIZE = 512  # smaller files are not worth a second request
+MIN_SAVING = 0.9  # keep a variant only if it is at most 90% of the original
+# 3D models are served by routes/glb.py (Range requests, own manifest)
+SKIP_EXTENSIONS = {".glb"}
+
+# Preferred first when the client accepts several
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def compress(data: bytes, encoding: str) -> Optional[bytes]:
+    if encoding == "gzip":
+        # mtime=0: the same input always gives the same bytes
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == "br" and brotli is not None:
+        return brotli.compress(data, quality=11)
+    return None
+
+
+def hashed_name(name: str, digest: str) -> str:
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def write_file(path: str, data: bytes) -> None:
+    """Atomic write, so a worker never serves a half-written file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load_manifest(build_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(build_dir, MANIFEST_FILENAME), "r",
+                  encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+
+def build_asset(
+    src: str, name: str, out_dir: str, stamp, previous: Optional[Dict]
+) -> Dict[str, Any]:
+    """Hashed copy and compressed variants of one source file"""
+    if (
+        previous
+        and previous.get("stamp") == stamp
+        and os.path.exists(os.path.join(out_dir, previous["path"]))
+    ):
+        return previous
+
+    with open(src, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+    path = hashed_name(name, digest)
+    target = os.path.join(out_dir, path)
+    if not os.path.exists(target):
+        write_file(target, data)
+
+    encodings: Dict[str, int] = {}
+    ext = os.path.splitext(name)[1].lower()
+    if ext in COMPRESSIBLE and len(data) >= MIN_COMPRESS_SIZE:
+        for encoding, suffix in ENCODINGS:
+            variant = target + suffix
+            if not os.path.exists(variant):
+                compressed = compress(data, encoding)
+                if compressed is None or (
+                    len(compressed) > len(data) * MIN_SAVING
+                ):
+                    continue
+                write_file(variant, compressed)
+            encodings[encoding] = os.path.getsize(variant)
+
+    return {
+        "path": path,
+        "hash": digest,
+        "size": len(data),
+        "encodings": encodings,
+        "stamp": stamp,
+    }
+
+
+def build_assets(
+    static_dir: str = STATIC_DIR, build_dir: str = BUILD_DIR
+) -> Dict[str, Dict[str, Any]]:
+    """Build (or update) the hashed assets and return the manifest entries"""
+    out_dir = os.path.join(build_dir, "static")
+    previous = load_manifest(build_dir).get("assets", {})
+    assets: Dict[str, Dict[str, Any]] = {}
+
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for filename in sorted(files):
+            if filename.startswith(".") or (
+                os.path.splitext(filename)[1].lower() in SKIP_EXTENSIONS
+            ):
+                continue
+            src = os.path.join(root, filename)
+            name = os.path.relpath(src, static_dir).replace(os.sep, "/")
+            st = os.stat(src)
+            assets[name] = build_asset(
+                src, name, out_dir, [st.st_mtime_ns, st.st_size],
+                previous.get(name),
+            )
+
+    if assets != previous:
+        write_file(
+            os.path.join(build_dir, MANIFEST_FILENAME),
+            json.dumps({"assets": assets}, indent=2).encode(),
+        )
+        logger.info(f"📦 Built {len(assets)} static assets")
+    return assets
+
+
+class AssetManifest:
+    """Asset manifest reader, re-read when the build changes it"""
+
+    def __init__(self, build_dir: str = BUILD_DIR, url_prefix: str = "/assets"):
+        self.build_dir = build_dir
+        self.static_dir = os.path.join(build_dir, "static")
+        self.path = os.path.join(build_dir, MANIFEST_FILENAME)
+        self.url_prefix = url_prefix
+        self._lock = threading.Lock()
+        self._cached = (None, {}, {})  # (stamp, by name, by hashed path)
+
+    def _current(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return {}, {}
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached_stamp, by_name, by_path = self._cached
+        if stamp != cached_stamp:
+            with self._lock:
+                by_name = load_manifest(self.build_dir).get("assets", {})
+                by_path = {entry["path"]: entry for entry in by_name.values()}
+                self._cached = (stamp, by_name, by_path)
+        return by_name, by_path
+
+    def url(self, name: str) -> Optional[str]:
+        entry = self._current()[0].get(name)
+        if entry is None:
+            return None
+        return f"{self.url_prefix}/{entry['path']}"
+
+    def lookup(self, path: str) -> Optional[Dict[str, Any]]:
+        return self._current()[1].get(path)
+
+    def import_map(self, imports: Dict[str, str]) -> Dict[str, Any]:
+        """Import map with hashed URLs for the local ES modules.
+
+        The hashed `main.js` imports `./config.js` etc. by their plain
+        names; the browser resolves those to `/assets/js/config.js` and
+        the map sends it to the hashed file instead.
+        """
+        imports = dict(imports)
+        for name, entry in self._current()[0].items():
+            if name.endswith((".js", ".mjs")):
+                imports[f"{self.url_prefix}/{name}"] = (
+                    f"{self.url_prefix}/{entry['path']}"
+                )
+        return {"imports": imports}
+
+
+# Global manifest instances, per build directory
+_manifests: Dict[str, AssetManifest] = {}
+_manifests_lock = threading.Lock()
+
+
+def get_asset_manifest(build_dir: str = BUILD_DIR) -> AssetManifest:
+    build_dir = os.path.abspath(build_dir)
+    with _manifests_lock:
+        if build_dir not in _manifests:
+            _manifests[build_dir] = AssetManifest(build_dir)
+    return _manifests[build_dir]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Build fingerprinted, precompressed static assets"
+    )
+    parser.add_argument("--static", default=STATIC_DIR)
+    parser.add_argument("--out", default=BUILD_DIR)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    assets = build_assets(args.static, args.out)
+    for name, entry in sorted(assets.items()):
+        variants = ", ".join(
+            f"{encoding} {size}" for encoding, size in entry["encodings"].items()
+        )
+        print(f"{name} -> {entry['path']} ({entry['size']}"
+              f"{'; ' + variants if variants else ''})")
+
+
+if __name__ == "__main__":
+    main()
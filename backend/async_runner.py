@@ -0,0 +1,117 @@
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import threading
+from typing import Any, Coroutine, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncRunner:
+    """A persistent event loop on a background thread.
+
+    Sync code (Flask worker threads) submits coroutines with `run()`;
+    they all execute on the same loop and share one long-lived
+    `aiohttp.ClientSession`, so connections are pooled and reused
+    instead of being set up for every request.
+    """
+
+    def __init__(self, name: str = "async-runner"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            self.start()
+        return self._loop
+
+    def start(self) -> None:
+        with self._lock:
+            if self._loop is not None:
+                return
+            ready = threading.Event()
+            loop = asyncio.new_event_loop()
+
+            def run_loop():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(
+                target=run_loop, name=self.name, daemon=True
+            )
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+
+    def in_loop_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and wait for its result.
+
+        On timeout the coroutine is cancelled and
+        `concurrent.futures.TimeoutError` is raised.
+        """
+        if self.in_loop_thread():
+            coro.close()
+            raise RuntimeError("AsyncRunner.run() called from its own loop")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def submit(self, coro: Coroutine) -> concurrent.futures.Future:
+        """Schedule a coroutine without waiting for it"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Shared client session; only usable from the runner's loop"""
+        if not self.in_loop_thread():
+            raise RuntimeError("The shared session belongs to the runner loop")
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=15),
+            )
+        return self._session
+
+    def stop(self) -> None:
+        if self._loop is None or not self._loop.is_running():
+            return
+
+        async def close_session():
+            if self._session and not self._session.closed:
+                await self._session.close()
+
+        try:
+            self.run(close_session(), timeout=5)
+        except Exception as e:
+            logger.warning(f"Error closing shared HTTP session: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+# Global runner instance
+_async_runner = None
+_async_runner_lock = threading.Lock()
+
+
+def get_async_runner() -> AsyncRunner:
+    """Return the process-wide runner, starting it on first use"""
+    global _async_runner
+    with _async_runner_lock:
+        if _async_runner is None:
+            _async_runner = AsyncRunner()
+            atexit.register(_async_runner.stop)
+    return _async_runner
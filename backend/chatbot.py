@@ -1,43 +1,77 @@
 import ollama
-import json
 import os
+import threading
 import requests
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+from .config_service import AIConfig, ConfigService, get_config_service
+from .metrics import upstream_span
 
 
 class AIChat:
-    def __init__(self):
-        self.config = self.load_config()
-        self.model = None
+    def __init__(self, config_service: Optional[ConfigService] = None):
+        self.config_service = config_service or get_config_service()
         self.ollama_url = "http://localhost:11434"
-        self.polish_model = "bielik:7b"  # Polish model
-        self.code_model = "codellama:7b"  # Code model
-        self.initialize_model()
-
-    def load_config(self) -> Dict[str, Any]:
-        """Load configuration from config.json"""
-        config_path = os.path.join(
-            os.path.dirname(__file__), "..", "config", "config.json"
-        )
-        if os.path.exists(config_path):
+        # path -> ((mtime_ns, size), contents) for config.file_paths
+        self._file_cache: Dict[str, Tuple[Tuple[int, int], str]] = {}
+        self._file_cache_lock = threading.Lock()
+        self._async_client = None
+        self.config_service.subscribe(self.on_config_change)
+
+    @property
+    def config(self) -> AIConfig:
+        """Current configuration snapshot (immutable)"""
+        return self.config_service.config
+
+    def async_client(self):
+        """Async (aiohttp) variant sharing this chat's config and files"""
+        if self._async_client is None:
+            from .chatbot_async import AsyncAIChat
+
+            self._async_client = AsyncAIChat(self)
+        return self._async_client
+
+    @property
+    def model(self) -> str:
+        return self.config.provider
+
+    @property
+    def polish_model(self) -> str:
+        return self.config.polish_model
+
+    @property
+    def code_model(self) -> str:
+        return self.config.code_model
+
+    def on_config_change(self, old: AIConfig, new: AIConfig):
+        """Drop cached file contents that are no longer configured"""
+        if old.file_paths != new.file_paths:
+            with self._file_cache_lock:
+                for path in set(self._file_cache) - set(new.file_paths):
+                    del self._file_cache[path]
+
+    def file_context(self, file_paths) -> str:
+        """Contents of the configured files, re-read only when changed"""
+        file_contents = ""
+        for file_path in file_paths:
             try:
-                with open(config_path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError) as e:
-                print(f"Error loading config: {e}")
-                return {}
-        return {}
-
-    def initialize_model(self):
-        """Initialize the AI model based on configuration"""
-        if self.config.get("ollama_api_key"):
-            self.model = "ollama"
-        elif self.config.get("openai_api_key"):
-            self.model = "openai"
-        elif self.config.get("model_path"):
-            self.model = "local"
-        else:
-            self.model = "ollama"  # Default to ollama
+                st = os.stat(file_path)
+            except OSError:
+                continue
+            stamp = (st.st_mtime_ns, st.st_size)
+            with self._file_cache_lock:
+                cached = self._file_cache.get(file_path)
+            if cached is None or cached[0] != stamp:
+                try:
+                    with open(file_path, "r", encoding="utf-8") as f:
+                        cached = (stamp, f.read())
+                except Exception as e:
+                    print(f"Error reading file {file_path}: {e}")
+                    continue
+                with self._file_cache_lock:
+                    self._file_cache[file_path] = cached
+            file_contents += f"\\n--- File: {file_path} ---\\n"
+            file_contents += cached[1] + "\\n"
+        return file_contents
 
     def get_response(self, user_input: str) -> str:
         """Get AI response for user input"""
@@ -101,16 +135,17 @@ class AIChat:
         """Get response using Polish model"""
         try:
             # Try to use Polish model first
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={
-                    "model": self.polish_model,
-                    "prompt": f"Odpowiedz po polsku na pytanie: {user_input}",
-                    "stream": False,
-                    "options": {"temperature": 0.7, "top_p": 0.9, "max_tokens": 512},
-                },
-                timeout=30,
-            )
+            with upstream_span("ollama", "generate"):
+                response = requests.post(
+                    f"{self.ollama_url}/api/generate",
+                    json={
+                        "model": self.config.polish_model,
+                        "prompt": f"Odpowiedz po polsku na pytanie: {user_input}",
+                        "stream": False,
+                        "options": {"temperature": 0.7, "top_p": 0.9, "max_tokens": 512},
+                    },
+                    timeout=30,
+                )
 
             if response.status_code == 200:
                 result = response.json()
@@ -131,50 +166,41 @@ class AIChat:
 
     def get_standard_response(self, user_input: str) -> str:
         """Get standard response for English or fallback"""
-        system_prompt = self.config.get(
-            "system_prompt", "You are a helpful AI assistant."
-        )
-        file_paths = self.config.get("file_paths", [])
-        file_contents = ""
+        # One snapshot for the whole request, even if config reloads
+        config = self.config
+        file_contents = self.file_context(config.file_paths)
 
-        # Read file contents if specified
-        for file_path in file_paths:
-            try:
-                if os.path.exists(file_path):
-                    with open(file_path, "r", encoding="utf-8") as f:
-                        file_contents += f"\\n--- File: {file_path} ---\\n"
-                        file_contents += f.read() + "\\n"
-            except Exception as e:
-                print(f"Error reading file {file_path}: {e}")
+        full_prompt = f"{config.system_prompt}\\n\\n{file_contents}\\n\\nUser: {user_input}"
 
-        full_prompt = f"{system_prompt}\\n\\n{file_contents}\\n\\nUser: {user_input}"
-
-        if self.model == "ollama":
-            return self.get_ollama_response(full_prompt)
-        elif self.model == "openai":
+        if config.provider == "ollama":
+            return self.get_ollama_response(full_prompt, config.ollama_model)
+        elif config.provider == "openai":
             return self.get_openai_response(full_prompt)
-        elif self.model == "local":
+        elif config.provider == "local":
             return self.get_local_response(full_prompt)
         else:
             return (
                 "AI model not configured. Please configure it in the AI Chat settings."
             )
 
-    def get_ollama_response(self, user_input: str) -> str:
+    def get_ollama_response(
+        self, user_input: str, model: Optional[str] = None
+    ) -> str:
         """Get response from Ollama"""
         try:
-            model_to_use = self.config.get("ollama_model", "llama3.2:latest")
-
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={
-                    "model": model_to_use,
-                    "prompt": user_input,
-                    "stream": False,
-                    "options": {"temperature": 0.7, "top_p": 0.9},
-                },
-                timeout=30,
-            )
+            model_to_use = model or self.config.ollama_model
+
+            with upstream_span("ollama", "generate"):
+                response = requests.post(
+                    f"{self.ollama_url}/api/generate",
+                    json={
+                        "model": model_to_use,
+                        "prompt": user_input,
+                        "stream": False,
+                        "options": {"temperature": 0.7, "top_p": 0.9},
+                    },
+                    timeout=30,
+                )
 
             if response.status_code == 200:
                 result = response.json()
@@ -199,19 +225,20 @@ class AIChat:
 
 Return only the cleaned code:"""
 
-            response = requests.post(
-                f"{self.ollama_url}/api/generate",
-                json={
-                    "model": self.code_model,
-                    "prompt": prompt,
-                    "stream": False,
-                    "options": {
-                        "temperature": 0.1,  # Low temperature for consistency
-                        "top_p": 0.8,
+            with upstream_span("ollama", "generate"):
+                response = requests.post(
+                    f"{self.ollama_url}/api/generate",
+                    json={
+                        "model": self.config.code_model,
+                        "prompt": prompt,
+                        "stream": False,
+                        "options": {
+                            "temperature": 0.1,  # Low temperature for consistency
+                            "top_p": 0.8,
+                        },
                     },
-                },
-                timeout=45,
-            )
+                    timeout=45,
+                )
 
             if response.status_code == 200:
                 result = response.json()
@@ -245,7 +272,10 @@ Return only the cleaned code:"""
 
         try:
             # Test Ollama connection
-            response = requests.get(f"{self.ollama_url}/api/tags", timeout=5)
+            with upstream_span("ollama", "tags"):
+                response = requests.get(
+                    f"{self.ollama_url}/api/tags", timeout=5
+                )
             if response.status_code == 200:
                 results["ollama"] = True
                 data = response.json()
@@ -259,3 +289,8 @@ Return only the cleaned code:"""
             results["error"] = str(e)
 
         return results
+
+    def health_check(self) -> Dict[str, Any]:
+        """Cheap availability check used by the background health probe"""
+        result = self.test_connection()
+        return {"success": result["ollama"], "error": result["error"]}
@@ -0,0 +1,148 @@
+import asyncio
+import contextlib
+import weakref
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from .config_service import AIConfig
+from .metrics import upstream_span
+
+
+class AsyncAIChat:
+    """Async counterpart of AIChat (aiohttp), answering with the same texts"""
+
+    def __init__(self, chat, timeout: float = 30):
+        self.chat = chat
+        self.timeout = timeout
+        self._loop_sessions: "weakref.WeakKeyDictionary" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    @property
+    def config(self) -> AIConfig:
+        return self.chat.config
+
+    @property
+    def ollama_url(self) -> str:
+        return self.chat.ollama_url
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """Long-lived HTTP session for the current event loop"""
+        loop = asyncio.get_running_loop()
+        session = self._loop_sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession()
+            self._loop_sessions[loop] = session
+        return session
+
+    async def close(self):
+        session = self._loop_sessions.pop(asyncio.get_running_loop(), None)
+        if session and not session.closed:
+            await session.close()
+
+    @contextlib.asynccontextmanager
+    async def generate(
+        self,
+        model: str,
+        prompt: str,
+        options: Dict[str, Any],
+        timeout: Optional[float] = None,
+    ):
+        """POST /api/generate, used as `async with self.generate(...)`"""
+        with upstream_span("ollama", "generate"):
+            async with self.get_session().post(
+                f"{self.ollama_url}/api/generate",
+                json={
+                    "model": model,
+                    "prompt": prompt,
+                    "stream": False,
+                    "options": options,
+                },
+                timeout=aiohttp.ClientTimeout(total=timeout or self.timeout),
+            ) as response:
+                yield response
+
+    async def get_response(self, user_input: str) -> str:
+        """Get AI response for user input"""
+        if not user_input or not user_input.strip():
+            return "Proszę podać wiadomość."
+
+        user_input = user_input.strip()
+
+        if self.chat.is_polish_input(user_input):
+            return await self.get_polish_response(user_input)
+        else:
+            return await self.get_standard_response(user_input)
+
+    async def get_polish_response(self, user_input: str) -> str:
+        """Get response using Polish model"""
+        try:
+            async with self.generate(
+                self.config.polish_model,
+                f"Odpowiedz po polsku na pytanie: {user_input}",
+                {"temperature": 0.7, "top_p": 0.9, "max_tokens": 512},
+            ) as response:
+                if response.status == 200:
+                    result = await response.json(content_type=None)
+                    return result.get("response", "Brak odpowiedzi z modelu.")
+            # Fallback to standard model with Polish prompt
+            return await self.get_standard_response(
+                f"Odpowiedz po polsku: {user_input}"
+            )
+
+        except aiohttp.ClientConnectionError:
+            return (
+                "Błąd: Ollama server nie odpowiada. Sprawdź czy działa na porcie 11434."
+            )
+        except asyncio.TimeoutError:
+            return "Błąd: Timeout - model zbyt długo generuje odpowiedź."
+        except Exception as e:
+            print(f"Error in Polish response: {e}")
+            return f"Błąd polskiego modelu: {e}"
+
+    async def get_standard_response(self, user_input: str) -> str:
+        """Get standard response for English or fallback"""
+        # One snapshot for the whole request, even if config reloads
+        config = self.config
+        # Cached by file stamp, so this is a few stat() calls
+        file_contents = self.chat.file_context(config.file_paths)
+
+        full_prompt = f"{config.system_prompt}\\n\\n{file_contents}\\n\\nUser: {user_input}"
+
+        if config.provider == "ollama":
+            return await self.get_ollama_response(
+                full_prompt, config.ollama_model
+            )
+        elif config.provider == "openai":
+            return self.chat.get_openai_response(full_prompt)
+        elif config.provider == "local":
+            return self.chat.get_local_response(full_prompt)
+        else:
+            return (
+                "AI model not configured. Please configure it in the AI Chat settings."
+            )
+
+    async def get_ollama_response(
+        self, user_input: str, model: Optional[str] = None
+    ) -> str:
+        """Get response from Ollama"""
+        try:
+            model_to_use = model or self.config.ollama_model
+
+            async with self.generate(
+                model_to_use, user_input, {"temperature": 0.7, "top_p": 0.9}
+            ) as response:
+                if response.status == 200:
+                    result = await response.json(content_type=None)
+                    return result.get("response", "No response from model.")
+                else:
+                    return f"Ollama API error: {response.status}"
+
+        except aiohttp.ClientConnectionError:
+            return "Error: Ollama server not responding. Check if it's running on port 11434."
+        except asyncio.TimeoutError:
+            return "Error: Request timeout - model taking too long to respond."
+        except Exception as e:
+            print(f"Error in Ollama response: {e}")
+            return f"Error getting Ollama response: {e}"
@@ -1,68 +1,162 @@
 import requests
+import json
 import logging
-from typing import Dict, Any
+import threading
+import time
+from typing import Dict, Any, Iterator, Optional
+
+from ...metrics import upstream_span
+from .retry import RetryPolicy
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_MODEL = "@cf/meta/llama-3.1-8b-instruct"
+DEFAULT_MAX_CONCURRENCY = 4
+
+# Requests in flight per Cloudflare account, shared by all sync clients
+_account_slots: Dict[str, threading.BoundedSemaphore] = {}
+_account_slots_lock = threading.Lock()
+
+
+def account_slots(account_id: str, limit: int) -> threading.BoundedSemaphore:
+    with _account_slots_lock:
+        if account_id not in _account_slots:
+            _account_slots[account_id] = threading.BoundedSemaphore(limit)
+        return _account_slots[account_id]
+
+
+def build_payload(
+    prompt: str, max_tokens: int, temperature: float
+) -> Dict[str, Any]:
+    return {
+        "messages": [
+            {"role": "user", "content": prompt}
+        ],
+        "max_tokens": max_tokens,
+        "temperature": temperature
+    }
+
+
+def parse_result(result: Dict[str, Any], model: str) -> Dict[str, Any]:
+    """Zamienia odpowiedź API na format zwracany przez klienta"""
+    if result.get("success"):
+        response_text = result["result"]["response"]
+        logger.info(f"Cloudflare AI response: {response_text[:100]}...")
+        return {
+            "success": True,
+            "response": response_text,
+            "model": model,
+            "usage": result.get("result", {}).get("usage", {}),
+            "provider": "cloudflare"
+        }
+    error_msg = result.get("errors", ["Unknown error"])
+    logger.error(f"Cloudflare AI API error: {error_msg}")
+    return {
+        "success": False,
+        "error": error_msg
+    }
+
 
 class CloudflareAI:
-    def __init__(self, account_id: str, api_token: str):
+    def __init__(
+        self,
+        account_id: str,
+        api_token: str,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        retry_policy: Optional[RetryPolicy] = None,
+    ):
         self.account_id = account_id
         self.api_token = api_token
         base_url = "https://api.cloudflare.com/client/v4/accounts"
-        self.base_url = f"{base_url}/{account_id}/ai/run"
+        self.account_url = f"{base_url}/{account_id}/ai"
+        self.base_url = f"{self.account_url}/run"
         self.headers = {
             "Authorization": f"Bearer {api_token}",
             "Content-Type": "application/json"
         }
+        self.max_concurrency = max_concurrency
+        self.slots = account_slots(account_id, max_concurrency)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.session = requests.Session()
+        self._catalog = None
+        self._async_client = None
+
+    def async_client(self):
+        """Wspólny klient aiohttp; używać zawsze z tej samej pętli zdarzeń"""
+        if self._async_client is None:
+            from .cloudflare_ai_async import AsyncCloudflareAI
+
+            self._async_client = AsyncCloudflareAI(
+                self.account_id,
+                self.api_token,
+                max_concurrency=self.max_concurrency,
+                retry_policy=self.retry_policy,
+            )
+        return self._async_client
+
+    def _post(
+        self, url: str, payload: Dict[str, Any], stream: bool = False
+    ) -> requests.Response:
+        """POST z limitem równoległości i ponowieniami dla 429/5xx"""
+        attempt = 0
+        while True:
+            self.slots.acquire()
+            keep_slot = False
+            try:
+                try:
+                    with upstream_span("cloudflare", "run"):
+                        response = self.session.post(
+                            url,
+                            headers=self.headers,
+                            json=payload,
+                            timeout=30,
+                            stream=stream,
+                        )
+                    status = response.status_code
+                    retry_after = response.headers.get("Retry-After")
+                except requests.exceptions.ConnectionError:
+                    response, status, retry_after = None, 503, None
+                delay = self.retry_policy.next_delay(
+                    attempt, status, retry_after
+                )
+                # A stream holds its slot until the caller closes it
+                keep_slot = stream and delay is None and response is not None
+            finally:
+                if not keep_slot:
+                    self.slots.release()
+
+            if delay is None:
+                if response is None:
+                    raise requests.exceptions.ConnectionError(
+                        f"Cloudflare AI unreachable after {attempt + 1} tries"
+                    )
+                return response
+            logger.warning(
+                f"Cloudflare AI returned {status}, retrying in {delay:.1f}s "
+                f"(attempt {attempt + 1}/{self.retry_policy.max_retries})"
+            )
+            if response is not None:
+                response.close()
+            time.sleep(delay)
+            attempt += 1
 
     def generate_text(
         self,
         prompt: str,
-        model: str = "@cf/meta/llama-3.1-8b-instruct",
+        model: str = DEFAULT_MODEL,
         max_tokens: int = 512,
         temperature: float = 0.7
     ) -> Dict[str, Any]:
         """Generuje tekst używając Cloudflare Workers AI"""
 
         url = f"{self.base_url}/{model}"
-
-        payload = {
-            "messages": [
-                {"role": "user", "content": prompt}
-            ],
-            "max_tokens": max_tokens,
-            "temperature": temperature
-        }
+        payload = build_payload(prompt, max_tokens, temperature)
 
         try:
             logger.info(f"Cloudflare AI request to {model}: {prompt[:50]}...")
-            response = requests.post(
-                url, headers=self.headers, json=payload, timeout=30
-            )
+            response = self._post(url, payload)
             response.raise_for_status()
-
-            result = response.json()
-
-            if result.get("success"):
-                response_text = result["result"]["response"]
-                logger.info(
-                    f"Cloudflare AI response: {response_text[:100]}..."
-                )
-                return {
-                    "success": True,
-                    "response": response_text,
-                    "model": model,
-                    "usage": result.get("result", {}).get("usage", {}),
-                    "provider": "cloudflare"
-                }
-            else:
-                error_msg = result.get("errors", ["Unknown error"])
-                logger.error(f"Cloudflare AI API error: {error_msg}")
-                return {
-                    "success": False,
-                    "error": error_msg
-                }
+            return parse_result(response.json(), model)
 
         except requests.exceptions.Timeout:
             logger.error("Cloudflare AI request timeout")
@@ -83,33 +177,79 @@ class CloudflareAI:
                 "error": f"Nieoczekiwany błąd: {str(e)}"
             }
 
-    def list_available_models(self) -> Dict[str, Any]:
+    def stream_text(
+        self,
+        prompt: str,
+        model: str = DEFAULT_MODEL,
+        max_tokens: int = 512,
+        temperature: float = 0.7
+    ) -> Iterator[Dict[str, Any]]:
+        """Strumieniuje fragmenty odpowiedzi, na końcu zużycie tokenów"""
+        url = f"{self.base_url}/{model}"
+        payload = build_payload(prompt, max_tokens, temperature)
+        payload["stream"] = True
+
+        logger.info(f"Cloudflare AI stream to {model}: {prompt[:50]}...")
+        response = self._post(url, payload, stream=True)
+        try:
+            response.raise_for_status()
+            usage: Dict[str, Any] = {}
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if chunk.get("usage"):
+                    usage = chunk["usage"]
+                if chunk.get("response"):
+                    yield {"response": chunk["response"]}
+            yield {
+                "done": True,
+                "model": model,
+                "usage": usage,
+                "provider": "cloudflare"
+            }
+        finally:
+            # Also runs when the client goes away; Cloudflare stops generating
+            response.close()
+            self.slots.release()
+
+    @property
+    def catalog(self):
+        """Katalog modeli (tworzony przy pierwszym użyciu)"""
+        if self._catalog is None:
+            from .cloudflare_catalog import ModelCatalog
+
+            self._catalog = ModelCatalog(self)
+        return self._catalog
+
+    def list_available_models(
+        self, task: Optional[str] = "Text Generation"
+    ) -> Dict[str, Any]:
         """Lista dostępnych modeli Cloudflare Workers AI"""
-        return {
-            "success": True,
-            "models": [
-                {
-                    "id": "@cf/meta/llama-3.1-8b-instruct",
-                    "name": "Llama 3.1 8B Instruct",
-                    "description": "Zaawansowany model językowy Meta"
-                },
-                {
-                    "id": "@cf/meta/llama-3.2-11b-vision-instruct",
-                    "name": "Llama 3.2 11B Vision",
-                    "description": "Model z obsługą obrazów"
-                },
-                {
-                    "id": "@cf/mistral/mistral-7b-instruct-v0.1",
-                    "name": "Mistral 7B Instruct",
-                    "description": "Wydajny model Mistral AI"
-                },
-                {
-                    "id": "@cf/microsoft/phi-2",
-                    "name": "Microsoft Phi-2",
-                    "description": "Kompaktowy model Microsoft"
-                }
-            ]
-        }
+        return self.catalog.get_models(task)
+
+    def health_check(self, timeout: float = 5) -> Dict[str, Any]:
+        """Tani test dostępności: lista modeli zamiast generowania"""
+        try:
+            with upstream_span("cloudflare", "health"):
+                response = self.session.get(
+                    f"{self.account_url}/models/search",
+                    headers=self.headers,
+                    params={"per_page": 1},
+                    timeout=timeout,
+                )
+            if response.ok and response.json().get("success"):
+                return {"success": True}
+            return {
+                "success": False,
+                "error": f"Cloudflare API returned status "
+                         f"{response.status_code}"
+            }
+        except requests.exceptions.RequestException as e:
+            return {"success": False, "error": f"Błąd połączenia: {str(e)}"}
 
     def test_connection(self) -> Dict[str, Any]:
         """Test połączenia z Cloudflare Workers AI"""
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import logging
+import weakref
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import aiohttp
+
+from .cloudflare_ai import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MODEL,
+    build_payload,
+    parse_result,
+)
+from ...metrics import upstream_span
+from .retry import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+# Per event loop, per account: asyncio primitives are bound to one loop
+_loop_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def account_slots(account_id: str, limit: int) -> asyncio.Semaphore:
+    slots = _loop_slots.setdefault(asyncio.get_running_loop(), {})
+    if account_id not in slots:
+        slots[account_id] = asyncio.Semaphore(limit)
+    return slots[account_id]
+
+
+class AsyncCloudflareAI:
+    """Asynchroniczny klient Workers AI z limitem równoległości"""
+
+    def __init__(
+        self,
+        account_id: str,
+        api_token: str,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        retry_policy: Optional[RetryPolicy] = None,
+        timeout: float = 30,
+    ):
+        self.account_id = account_id
+        base_url = "https://api.cloudflare.com/client/v4/accounts"
+        self.account_url = f"{base_url}/{account_id}/ai"
+        self.base_url = f"{self.account_url}/run"
+        self.headers = {
+            "Authorization": f"Bearer {api_token}",
+            "Content-Type": "application/json"
+        }
+        self.max_concurrency = max_concurrency
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Session of the running loop (recreated if the loop changed)"""
+        loop = asyncio.get_running_loop()
+        if (
+            self._session is None
+            or self._session.closed
+            or self._session_loop not in (None, loop)
+        ):
+            self._session = aiohttp.ClientSession(
+                headers=self.headers, timeout=self.timeout
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    async def _post(self, url: str, payload: Dict[str, Any]) -> Dict:
+        slots = account_slots(self.account_id, self.max_concurrency)
+        attempt = 0
+        while True:
+            async with slots:
+                try:
+                    with upstream_span("cloudflare", "run"):
+                        async with self.session.post(
+                            url, json=payload
+                        ) as resp:
+                            status = resp.status
+                            retry_after = resp.headers.get("Retry-After")
+                            if status < 400:
+                                return await resp.json()
+                            body = await resp.text()
+                except aiohttp.ClientConnectionError as e:
+                    status, retry_after, body = 503, None, str(e)
+
+            delay = self.retry_policy.next_delay(attempt, status, retry_after)
+            if delay is None:
+                raise aiohttp.ClientError(
+                    f"Cloudflare API returned {status}: {body[:200]}"
+                )
+            logger.warning(
+                f"Cloudflare AI returned {status}, retrying in {delay:.1f}s "
+                f"(attempt {attempt + 1}/{self.retry_policy.max_retries})"
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _open_stream(
+        self, url: str, payload: Dict[str, Any], slots: asyncio.Semaphore
+    ) -> aiohttp.ClientResponse:
+        """Like `_post`, but returns the open response; `slots` stays held"""
+        attempt = 0
+        while True:
+            await slots.acquire()
+            opened = False
+            try:
+                try:
+                    with upstream_span("cloudflare", "stream"):
+                        resp = await self.session.post(url, json=payload)
+                    status = resp.status
+                    retry_after = resp.headers.get("Retry-After")
+                    if status < 400:
+                        opened = True
+                        return resp
+                    body = await resp.text()
+                    resp.release()
+                except aiohttp.ClientConnectionError as e:
+                    status, retry_after, body = 503, None, str(e)
+            finally:
+                if not opened:
+                    slots.release()
+
+            delay = self.retry_policy.next_delay(attempt, status, retry_after)
+            if delay is None:
+                raise aiohttp.ClientError(
+                    f"Cloudflare API returned {status}: {body[:200]}"
+                )
+            logger.warning(
+                f"Cloudflare AI returned {status}, retrying in {delay:.1f}s "
+                f"(attempt {attempt + 1}/{self.retry_policy.max_retries})"
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def generate_text(
+        self,
+        prompt: str,
+        model: str = DEFAULT_MODEL,
+        max_tokens: int = 512,
+        temperature: float = 0.7
+    ) -> Dict[str, Any]:
+        """Generuje tekst używając Cloudflare Workers AI (async)"""
+        url = f"{self.base_url}/{model}"
+        payload = build_payload(prompt, max_tokens, temperature)
+
+        try:
+            logger.info(f"Cloudflare AI request to {model}: {prompt[:50]}...")
+            return parse_result(await self._post(url, payload), model)
+        except asyncio.TimeoutError:
+            logger.error("Cloudflare AI request timeout")
+            return {
+                "success": False,
+                "error": "Request timeout - spróbuj ponownie"
+            }
+        except aiohttp.ClientError as e:
+            logger.error(f"Cloudflare AI request failed: {str(e)}")
+            return {
+                "success": False,
+                "error": f"Błąd połączenia: {str(e)}"
+            }
+        except Exception as e:
+            logger.error(f"Cloudflare AI unexpected error: {str(e)}")
+            return {
+                "success": False,
+                "error": f"Nieoczekiwany błąd: {str(e)}"
+            }
+
+    async def generate_many(
+        self, prompts: List[str], **kwargs
+    ) -> List[Dict[str, Any]]:
+        """Generuje odpowiedzi dla wielu promptów naraz"""
+        return await asyncio.gather(
+            *(self.generate_text(prompt, **kwargs) for prompt in prompts)
+        )
+
+    async def stream_text(
+        self,
+        prompt: str,
+        model: str = DEFAULT_MODEL,
+        max_tokens: int = 512,
+        temperature: float = 0.7
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Strumieniuje fragmenty odpowiedzi Workers AI (async)"""
+        url = f"{self.base_url}/{model}"
+        payload = build_payload(prompt, max_tokens, temperature)
+        payload["stream"] = True
+
+        logger.info(f"Cloudflare AI stream to {model}: {prompt[:50]}...")
+        slots = account_slots(self.account_id, self.max_concurrency)
+        resp = await self._open_stream(url, payload, slots)
+        try:
+            usage: Dict[str, Any] = {}
+            async for raw in resp.content:
+                line = raw.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                if chunk.get("usage"):
+                    usage = chunk["usage"]
+                if chunk.get("response"):
+                    yield {"response": chunk["response"]}
+            yield {
+                "done": True,
+                "model": model,
+                "usage": usage,
+                "provider": "cloudflare"
+            }
+        finally:
+            resp.close()
+            slots.release()
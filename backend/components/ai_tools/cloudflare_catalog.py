@@ -0,0 +1,214 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from ...metrics import upstream_span
+
+logger = logging.getLogger(__name__)
+
+CATALOG_CACHE_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "data",
+    "cloudflare_models.json"
+)
+CATALOG_TTL = 6 * 60 * 60  # 6 hours
+RETRY_INTERVAL = 5 * 60  # after a failed refresh
+DEFAULT_TASK = "Text Generation"
+PAGE_SIZE = 100
+
+# Used only when there is neither network nor a saved snapshot
+FALLBACK_MODELS = [
+    {
+        "id": "@cf/meta/llama-3.1-8b-instruct",
+        "name": "Llama 3.1 8B Instruct",
+        "description": "Zaawansowany model językowy Meta",
+        "task": DEFAULT_TASK
+    },
+    {
+        "id": "@cf/meta/llama-3.2-11b-vision-instruct",
+        "name": "Llama 3.2 11B Vision",
+        "description": "Model z obsługą obrazów",
+        "task": DEFAULT_TASK
+    },
+    {
+        "id": "@cf/mistral/mistral-7b-instruct-v0.1",
+        "name": "Mistral 7B Instruct",
+        "description": "Wydajny model Mistral AI",
+        "task": DEFAULT_TASK
+    },
+    {
+        "id": "@cf/microsoft/phi-2",
+        "name": "Microsoft Phi-2",
+        "description": "Kompaktowy model Microsoft",
+        "task": DEFAULT_TASK
+    }
+]
+
+
+def parse_model(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a models/search result to the dashboard's model format"""
+    model_id = item["name"]
+    return {
+        "id": model_id,
+        "name": model_id.rsplit("/", 1)[-1],
+        "description": item.get("description", ""),
+        "task": (item.get("task") or {}).get("name", "")
+    }
+
+
+class ModelCatalog:
+    """Workers AI model catalog; stale reads are served while it refreshes"""
+
+    def __init__(
+        self,
+        client,
+        cache_path: str = CATALOG_CACHE_PATH,
+        ttl: float = CATALOG_TTL,
+        retry_interval: float = RETRY_INTERVAL,
+    ):
+        self.client = client
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.models: List[Dict[str, Any]] = []
+        self.fetched_at: Optional[float] = None
+        self.failed_at: Optional[float] = None
+        self.etag: Optional[str] = None
+        self._refresh_lock = threading.Lock()
+        self._load_snapshot()
+
+    def _load_snapshot(self):
+        if not os.path.exists(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self.models = snapshot["models"]
+            self.fetched_at = snapshot.get("fetched_at")
+            self.etag = snapshot.get("etag")
+        except (json.JSONDecodeError, IOError, KeyError) as e:
+            logger.warning(f"Ignoring corrupt model catalog snapshot: {e}")
+
+    def _save_snapshot(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = self.cache_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "models": self.models,
+                    "fetched_at": self.fetched_at,
+                    "etag": self.etag
+                },
+                f,
+                indent=2,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, self.cache_path)
+
+    @property
+    def is_stale(self) -> bool:
+        return (
+            self.fetched_at is None
+            or time.time() - self.fetched_at > self.ttl
+        )
+
+    def get_models(
+        self, task: Optional[str] = DEFAULT_TASK
+    ) -> Dict[str, Any]:
+        """Models for a task type (None = all), served from cache"""
+        models, fetched_at = self.models, self.fetched_at
+        stale = self.is_stale
+        if stale:
+            self.refresh_in_background()
+
+        result = models or FALLBACK_MODELS
+        if task:
+            result = [m for m in result if m["task"] == task]
+        return {
+            "success": True,
+            "models": result,
+            "fetched_at": fetched_at,
+            "stale": stale,
+            "source": "live" if models else "fallback"
+        }
+
+    def refresh_in_background(self) -> None:
+        if self._refresh_lock.locked():
+            return
+        if (
+            self.failed_at is not None
+            and time.time() - self.failed_at < self.retry_interval
+        ):
+            return
+        threading.Thread(
+            target=self.refresh, name="cf-model-catalog", daemon=True
+        ).start()
+
+    def refresh(self) -> bool:
+        """Fetch the catalog; returns False if it could not be refreshed"""
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            headers = dict(self.client.headers)
+            if self.etag and self.models:
+                headers["If-None-Match"] = self.etag
+
+            url = f"{self.client.account_url}/models/search"
+            with upstream_span("cloudflare", "models"):
+                response = self.client.session.get(
+                    url,
+                    headers=headers,
+                    params={"per_page": PAGE_SIZE, "page": 1},
+                    timeout=10,
+                )
+            if response.status_code == 304:
+                logger.info("Cloudflare model catalog not modified")
+                self.fetched_at = time.time()
+                self.failed_at = None
+                self._save_snapshot()
+                return True
+            response.raise_for_status()
+
+            etag = response.headers.get("ETag")
+            body = response.json()
+            items = list(body.get("result", []))
+            total = (body.get("result_info") or {}).get("total_count", 0)
+            page = 1
+            while len(items) < total:
+                page += 1
+                with upstream_span("cloudflare", "models"):
+                    response = self.client.session.get(
+                        url,
+                        headers=self.client.headers,
+                        params={"per_page": PAGE_SIZE, "page": page},
+                        timeout=10,
+                    )
+                response.raise_for_status()
+                result = response.json().get("result", [])
+                if not result:
+                    break
+                items.extend(result)
+
+            self.models = sorted(
+                (parse_model(item) for item in items),
+                key=lambda m: m["id"]
+            )
+            self.etag = etag
+            self.fetched_at = time.time()
+            self.failed_at = None
+            self._save_snapshot()
+            logger.info(
+                f"✅ Cloudflare model catalog refreshed: "
+                f"{len(self.models)} models"
+            )
+            return True
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.warning(f"⚠️ Cloudflare model catalog refresh failed: {e}")
+            self.failed_at = time.time()
+            return False
+        finally:
+            self._refresh_lock.release()
@@ -0,0 +1,52 @@
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+# 429 = rate limited, 5xx = transient upstream failures
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter that honors Retry-After"""
+
+    max_retries: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 20.0
+
+    def next_delay(
+        self, attempt: int, status: int, retry_after: Optional[str] = None
+    ) -> Optional[float]:
+        """Seconds to sleep before retry number `attempt` (0-based), or
+        None if the response should be returned as-is.
+
+        Full jitter spreads concurrent callers apart. A server-provided
+        Retry-After is the lower bound; if it exceeds `max_delay` we give
+        up rather than hold the request open.
+        """
+        if status not in RETRYABLE_STATUSES or attempt >= self.max_retries:
+            return None
+        backoff = min(self.max_delay, self.base_delay * (2 ** attempt))
+        delay = random.uniform(0, backoff)
+        server_delay = parse_retry_after(retry_after)
+        if server_delay is not None:
+            if server_delay > self.max_delay:
+                return None
+            delay = max(delay, server_delay)
+        return delay
@@ -0,0 +1,127 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+    import jsonschema
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_DIR = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "config"
+)
+STAT_INTERVAL = 1.0  # seconds between schema file mtime checks
+
+Validator = Callable[[Any], None]
+
+
+class SchemaValidationError(ValueError):
+    """A document does not match its schema; `errors` lists every problem"""
+
+    def __init__(self, errors: List[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def compile_schema(schema: Dict[str, Any]) -> Validator:
+    """Compile a schema into a function raising SchemaValidationError.
+
+    fastjsonschema generates plain Python code for the schema, so a
+    check costs microseconds; jsonschema is the fallback.
+    """
+    if fastjsonschema is not None:
+        check = fastjsonschema.compile(schema)
+
+        def validate(document):
+            try:
+                check(document)
+            except fastjsonschema.JsonSchemaValueException as e:
+                raise SchemaValidationError([e.message]) from None
+        return validate
+
+    validator_class = jsonschema.validators.validator_for(schema)
+    checker = validator_class(
+        schema, format_checker=validator_class.FORMAT_CHECKER
+    )
+
+    def validate(document):
+        errors = [
+            f"{'.'.join(str(p) for p in e.absolute_path) or 'data'}: "
+            f"{e.message}"
+            for e in checker.iter_errors(document)
+        ]
+        if errors:
+            raise SchemaValidationError(errors)
+    return validate
+
+
+class SchemaRegistry:
+    """Precompiled validators for the JSON schemas in config/.
+
+    `<name>.schema.json` is compiled on first use and recompiled only
+    when the file changes. `definition` selects a `$defs` entry, e.g.
+    a single tool of ai_tools.schema.json.
+    """
+
+    def __init__(self, schema_dir: str = SCHEMA_DIR):
+        self.schema_dir = schema_dir
+        self._lock = threading.Lock()
+        # (name, definition) -> (file stamp, validator)
+        self._validators: Dict[Tuple[str, Optional[str]], Tuple[Any, Validator]] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._stamps: Dict[str, Any] = {}
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.schema_dir, f"{name}.schema.json")
+
+    def _stamp(self, name: str):
+        now = time.monotonic()
+        if now - self._checked_at.get(name, 0.0) >= STAT_INTERVAL:
+            st = os.stat(self.path(name))
+            self._stamps[name] = (st.st_mtime_ns, st.st_size)
+            self._checked_at[name] = now
+        return self._stamps[name]
+
+    def validator(self, name: str, definition: Optional[str] = None) -> Validator:
+        with self._lock:
+            stamp = self._stamp(name)
+            cached = self._validators.get((name, definition))
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+
+            with open(self.path(name), "r", encoding="utf-8") as f:
+                schema = json.load(f)
+            if definition is not None:
+                schema = {
+                    "$schema": schema.get("$schema"),
+                    "$defs": schema.get("$defs", {}),
+                    "$ref": f"#/$defs/{definition}",
+                }
+            validate = compile_schema(schema)
+            self._validators[(name, definition)] = (stamp, validate)
+            logger.info(f"📐 Compiled schema {name}"
+                        + (f"#{definition}" if definition else ""))
+            return validate
+
+    def validate(
+        self, name: str, document: Any, definition: Optional[str] = None
+    ) -> None:
+        self.validator(name, definition)(document)
+
+
+# Global registry instance
+_schema_registry = None
+
+
+def get_schema_registry() -> SchemaRegistry:
+    """Return the shared registry for config/*.schema.json"""
+    global _schema_registry
+    if _schema_registry is None:
+        _schema_registry = SchemaRegistry()
+    return _schema_registry
@@ -0,0 +1,164 @@
+import bisect
+import math
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+MIN_PREFIX = 2  # shorter query tokens only match whole words
+
+# Relevance weight of a token by the field it comes from
+FIELD_WEIGHTS = (("name", 3.0), ("tags", 2.0), ("category", 1.0),
+                 ("description", 1.0))
+
+
+def fold(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(fold(text))
+
+
+class ToolIndex:
+    """Inverted indices over AI tools: text tokens, categories and tags.
+
+    Kept up to date incrementally by `add()` / `remove()`, so a search
+    touches only the posting lists of the query terms and its cost does
+    not grow with the size of the catalog. Query tokens match whole
+    words or word prefixes; results are ranked by field-weighted,
+    IDF-scaled relevance.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, Dict[str, float]] = {}
+        self.categories: Dict[str, Set[str]] = {}
+        self.tags: Dict[str, Set[str]] = {}
+        self.order: Dict[str, int] = {}  # tool id -> catalog position
+        self._docs: Dict[str, Tuple[Dict[str, float], str, List[str]]] = {}
+        self._vocabulary: Optional[List[str]] = None
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def rebuild(self, tools: Iterable[Dict[str, Any]]) -> None:
+        self.__init__()
+        for tool in tools:
+            self.add(tool)
+
+    def add(self, tool: Dict[str, Any]) -> None:
+        """Index a tool, replacing an older version with the same id"""
+        tool_id = tool.get("id")
+        if not tool_id:
+            return
+        position = self.order.get(tool_id)
+        self.remove(tool_id)
+        if position is None:
+            position, self._next = self._next, self._next + 1
+        self.order[tool_id] = position
+
+        weights: Dict[str, float] = {}
+        for field, weight in FIELD_WEIGHTS:
+            value = tool.get(field) or ""
+            if isinstance(value, list):
+                value = " ".join(str(v) for v in value)
+            for token in tokenize(str(value)):
+                weights[token] = max(weights.get(token, 0.0), weight)
+        for token, weight in weights.items():
+            if token not in self.postings:
+                self._vocabulary = None
+            self.postings.setdefault(token, {})[tool_id] = weight
+
+        category = fold(tool.get("category") or "")
+        tags = [fold(tag) for tag in tool.get("tags") or []]
+        if category:
+            self.categories.setdefault(category, set()).add(tool_id)
+        for tag in tags:
+            self.tags.setdefault(tag, set()).add(tool_id)
+        self._docs[tool_id] = (weights, category, tags)
+
+    def remove(self, tool_id: str) -> None:
+        self.order.pop(tool_id, None)
+        doc = self._docs.pop(tool_id, None)
+        if doc is None:
+            return
+        weights, category, tags = doc
+        for token in weights:
+            posting = self.postings[token]
+            posting.pop(tool_id, None)
+            if not posting:
+                del self.postings[token]
+                self._vocabulary = None
+        for key, index in [(category, self.categories)] + [
+            (tag, self.tags) for tag in tags
+        ]:
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(tool_id)
+                if not ids:
+                    del index[key]
+
+    def _matching_terms(self, token: str) -> List[str]:
+        if len(token) < MIN_PREFIX:
+            return [token] if token in self.postings else []
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        start = bisect.bisect_left(self._vocabulary, token)
+        end = bisect.bisect_left(self._vocabulary, token + "\uffff")
+        return self._vocabulary[start:end]
+
+    def search(
+        self,
+        query: str = "",
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+    ) -> List[str]:
+        """Ids of matching tools, best match first.
+
+        Every query token must match (prefixes included); without a
+        query, filtered tools keep their catalog order.
+        """
+        candidates: Optional[Set[str]] = None
+        if category:
+            candidates = set(self.categories.get(fold(category), ()))
+        if tag:
+            tagged = self.tags.get(fold(tag), set())
+            candidates = (
+                tagged & candidates if candidates is not None else set(tagged)
+            )
+
+        tokens = tokenize(query or "")
+        if not tokens:
+            ids = self._docs.keys() if candidates is None else candidates
+            return sorted(ids, key=self.order.__getitem__)
+
+        total = len(self._docs) or 1
+        scores: Optional[Dict[str, float]] = None
+        for token in tokens:
+            token_scores: Dict[str, float] = {}
+            for term in self._matching_terms(token):
+                posting = self.postings[term]
+                idf = math.log(1 + total / len(posting))
+                exact = 1.0 if term == token else 0.5
+                for tool_id, weight in posting.items():
+                    if candidates is not None and tool_id not in candidates:
+                        continue
+                    score = weight * idf * exact
+                    if score > token_scores.get(tool_id, 0.0):
+                        token_scores[tool_id] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    tool_id: score + token_scores[tool_id]
+                    for tool_id, score in scores.items()
+                    if tool_id in token_scores
+                }
+            if not scores:
+                return []
+
+        return sorted(
+            scores, key=lambda tool_id: (-scores[tool_id], self.order[tool_id])
+        )
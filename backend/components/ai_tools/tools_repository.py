@@ -0,0 +1,252 @@
+import contextlib
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ...host_state import FileLock
+from .schema_validation import SchemaValidationError, get_schema_registry
+from .tools_index import ToolIndex
+
+logger = logging.getLogger(__name__)
+
+AI_TOOLS_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "config", "ai_tools.json"
+)
+DEFAULT_VERSION = "1.0.0"
+STAT_INTERVAL = 1.0  # seconds between mtime checks on reads
+
+
+def slugify(name: str) -> str:
+    """Tool id in the schema's format: 'My Tool!' -> 'my-tool'"""
+    return re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-") or "tool"
+
+
+class ToolsRepository:
+    """AI tools stored in config/ai_tools.json, safe for concurrent workers"""
+
+    def __init__(
+        self,
+        path: str = AI_TOOLS_PATH,
+        validate: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.path = path
+        self.validate = validate
+        self._lock = threading.RLock()
+        self._version = DEFAULT_VERSION
+        self._tools: List[Dict[str, Any]] = []
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self.index = ToolIndex()
+        self._stamp = None
+        self._checked_at = 0.0
+        self._batch_depth = 0
+        self._dirty = False
+
+    # --- reading -----------------------------------------------------
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _load(self, stamp) -> None:
+        version, tools = DEFAULT_VERSION, []
+        if stamp is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                version = data.get("version", DEFAULT_VERSION)
+                tools = data.get("tools", [])
+                if isinstance(tools, dict):
+                    # Legacy shape: {"<id>": {...}}
+                    tools = [
+                        dict(tool, id=tool.get("id") or tool_id)
+                        for tool_id, tool in tools.items()
+                    ]
+            except (json.JSONDecodeError, OSError, AttributeError) as e:
+                logger.error(f"❌ Could not read {self.path}: {e}")
+                return
+        self._version = version
+        self._tools = tools
+        self._by_id = {tool["id"]: tool for tool in tools if "id" in tool}
+        self.index.rebuild(tools)
+        self._stamp = stamp
+
+    def _refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked_at < STAT_INTERVAL:
+            return
+        self._checked_at = now
+        stamp = self._file_stamp()
+        if force or stamp != self._stamp:
+            self._load(stamp)
+
+    def list(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return [dict(tool) for tool in self._tools]
+
+    def get(self, tool_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            tool = self._by_id.get(tool_id)
+            return dict(tool) if tool else None
+
+    def search(
+        self,
+        query: str = "",
+        category: Optional[str] = None,
+        tag: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """(total matches, requested page of tools) ranked by relevance"""
+        with self._lock:
+            self._refresh()
+            ids = self.index.search(query, category, tag)
+            end = None if limit is None else offset + limit
+            return len(ids), [dict(self._by_id[i]) for i in ids[offset:end]]
+
+    @property
+    def version(self) -> str:
+        return self._version
+
+    # --- writing -----------------------------------------------------
+
+    @contextlib.contextmanager
+    def batch(self) -> Iterator["ToolsRepository"]:
+        """Apply several mutations under one lock and one file write"""
+        with self._lock:
+            if self._batch_depth:
+                self._batch_depth += 1
+                try:
+                    yield self
+                finally:
+                    self._batch_depth -= 1
+                return
+            with FileLock(self.path):
+                self._refresh(force=True)
+                self._batch_depth = 1
+                try:
+                    yield self
+                except BaseException:
+                    # Drop partial changes
+                    self._dirty = False
+                    self._refresh(force=True)
+                    raise
+                else:
+                    if self._dirty:
+                        self._write()
+                finally:
+                    self._batch_depth = 0
+
+    def _write(self) -> None:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": self._version, "tools": self._tools},
+                f,
+                indent=2,
+                ensure_ascii=False,
+            )
+            f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+        self._stamp = self._file_stamp()
+        self._checked_at = time.monotonic()
+
+    def add(self, tool: Dict[str, Any]) -> Dict[str, Any]:
+        """Store a new tool; an id is derived from its name if missing"""
+        if not isinstance(tool, dict) or not tool.get("name"):
+            raise ValueError("A tool needs at least a name")
+        with self.batch():
+            base = tool.get("id") or slugify(tool["name"])
+            tool_id, i = base, 2
+            while tool_id in self._by_id:
+                tool_id, i = f"{base}-{i}", i + 1
+            tool = dict(tool, id=tool_id)
+            if self.validate is not None:
+                self.validate(tool)
+            self._tools.append(tool)
+            self._by_id[tool_id] = tool
+            self.index.add(tool)
+            self._dirty = True
+        return dict(tool)
+
+    def update(
+        self, tool_id: str, tool: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Replace a tool; returns None if it does not exist"""
+        if not isinstance(tool, dict):
+            raise ValueError("Tool data must be an object")
+        with self.batch():
+            if tool_id not in self._by_id:
+                return None
+            tool = dict(tool, id=tool_id)
+            if self.validate is not None:
+                self.validate(tool)
+            self._tools = [
+                tool if t.get("id") == tool_id else t for t in self._tools
+            ]
+            self._by_id[tool_id] = tool
+            self.index.add(tool)
+            self._dirty = True
+        return dict(tool)
+
+    def import_tools(
+        self, tools: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Add many tools in one write; all or nothing.
+
+        Every tool is validated before anything is stored and all
+        problems are reported together, prefixed with the tool's index.
+        """
+        if not isinstance(tools, list):
+            raise ValueError("Import data must be a list of tools")
+        errors = []
+        with self.batch():
+            added = []
+            for i, tool in enumerate(tools):
+                try:
+                    added.append(self.add(tool))
+                except ValueError as e:
+                    errors.append(f"tools[{i}]: {e}")
+            if errors:
+                raise SchemaValidationError(errors)
+        return added
+
+    def delete(self, tool_id: str) -> bool:
+        with self.batch():
+            if tool_id not in self._by_id:
+                return False
+            self._tools = [t for t in self._tools if t.get("id") != tool_id]
+            del self._by_id[tool_id]
+            self.index.remove(tool_id)
+            self._dirty = True
+        return True
+
+
+# Global repository instance
+_tools_repository = None
+_tools_repository_lock = threading.Lock()
+
+
+def get_tools_repository() -> ToolsRepository:
+    """Return the shared repository for config/ai_tools.json"""
+    global _tools_repository
+    with _tools_repository_lock:
+        if _tools_repository is None:
+            # Looked up per write, so an edited schema applies at once
+            _tools_repository = ToolsRepository(validate=functools.partial(
+                get_schema_registry().validate, "ai_tools", definition="tool"
+            ))
+    return _tools_repository
@@ -0,0 +1,263 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import closing
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LEDGER_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "..", "data", "usage.db"
+)
+FLUSH_INTERVAL = 1.0  # seconds
+SYNC_INTERVAL = 1.0  # re-read other workers' usage at least this often
+FLUSH_BATCH = 500
+EVENT_RETENTION_DAYS = 30
+
+BUDGET_OK = "ok"
+BUDGET_SOFT = "soft"  # route to local Ollama
+BUDGET_HARD = "hard"  # reject
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage_events (
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    model TEXT NOT NULL,
+    caller TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    total_tokens INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS usage_daily (
+    day TEXT NOT NULL,
+    model TEXT NOT NULL,
+    caller TEXT NOT NULL,
+    calls INTEGER NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    total_tokens INTEGER NOT NULL,
+    PRIMARY KEY (day, model, caller)
+);
+"""
+
+ROLLUP_SQL = """
+INSERT INTO usage_daily VALUES (?, ?, ?, 1, ?, ?, ?)
+ON CONFLICT (day, model, caller) DO UPDATE SET
+    calls = calls + 1,
+    prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+    completion_tokens = completion_tokens + excluded.completion_tokens,
+    total_tokens = total_tokens + excluded.total_tokens
+"""
+
+
+class UsageLedger:
+    """Workers AI token usage, counted in memory and batched to SQLite"""
+
+    def __init__(
+        self,
+        path: str = LEDGER_PATH,
+        soft_daily_tokens: int = 0,
+        hard_daily_tokens: int = 0,
+        sync_interval: float = SYNC_INTERVAL,
+    ):
+        self.path = path
+        self.soft_daily_tokens = soft_daily_tokens
+        self.hard_daily_tokens = hard_daily_tokens
+        self.sync_interval = sync_interval
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._flushed = threading.Condition()
+        self._pending = 0
+        self._lock = threading.Lock()
+        # Today's total of every worker as last read from usage_daily,
+        # plus this process's tokens that are not written there yet
+        self._stored: Tuple[str, int] = ("", 0)
+        self._unwritten: Counter = Counter()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # `with db` alone only commits; closing() releases the connection
+        with closing(self._connect()) as db, db:
+            db.executescript(SCHEMA)
+            self._stored = self._read_today(db)
+
+        self._writer = threading.Thread(
+            target=self._write_loop, name="usage-ledger", daemon=True
+        )
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=10)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def record(
+        self, model: str, usage: Optional[Dict[str, Any]], caller: str
+    ) -> None:
+        """Enqueue one call's token usage (never blocks on I/O)"""
+        usage = usage or {}
+        prompt = int(usage.get("prompt_tokens") or 0)
+        completion = int(usage.get("completion_tokens") or 0)
+        total = int(usage.get("total_tokens") or prompt + completion)
+
+        now = time.time()
+        day = date.fromtimestamp(now).isoformat()
+        with self._lock:
+            self._unwritten[day] += total
+
+        with self._flushed:
+            self._pending += 1
+        self._queue.put(
+            (now, day, model, caller or "unknown", prompt, completion, total)
+        )
+
+    @staticmethod
+    def _read_today(db: sqlite3.Connection) -> Tuple[str, int]:
+        day = date.today().isoformat()
+        row = db.execute(
+            "SELECT COALESCE(SUM(total_tokens), 0) FROM usage_daily "
+            "WHERE day = ?",
+            (day,),
+        ).fetchone()
+        return day, row[0]
+
+    def today_tokens(self) -> int:
+        """Tokens used today by every worker sharing the database"""
+        day = date.today().isoformat()
+        with self._lock:
+            stored_day, stored = self._stored
+            return (stored if stored_day == day else 0) + self._unwritten[day]
+
+    def budget_state(self) -> str:
+        """'ok', 'soft' (use Ollama) or 'hard' (reject) for today"""
+        today_tokens = self.today_tokens()
+        if self.hard_daily_tokens and (
+            today_tokens >= self.hard_daily_tokens
+        ):
+            return BUDGET_HARD
+        if self.soft_daily_tokens and (
+            today_tokens >= self.soft_daily_tokens
+        ):
+            return BUDGET_SOFT
+        return BUDGET_OK
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until everything recorded so far is on disk"""
+        with self._flushed:
+            self._flushed.wait_for(lambda: self._pending == 0, timeout)
+
+    def _write_loop(self):
+        db = self._connect()
+        last_prune = 0.0
+        while True:
+            try:
+                batch = [self._queue.get(timeout=self.sync_interval)]
+            except queue.Empty:
+                self._sync(db, [])
+                continue
+            deadline = time.time() + FLUSH_INTERVAL
+            while len(batch) < FLUSH_BATCH:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                with db:
+                    db.executemany(
+                        "INSERT INTO usage_events "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        batch,
+                    )
+                    db.executemany(
+                        ROLLUP_SQL, [event[1:] for event in batch]
+                    )
+                    if time.time() - last_prune > 3600:
+                        cutoff = time.time() - EVENT_RETENTION_DAYS * 86400
+                        db.execute(
+                            "DELETE FROM usage_events WHERE ts < ?", (cutoff,)
+                        )
+                        last_prune = time.time()
+            except sqlite3.Error as e:
+                logger.error(f"Usage ledger write failed: {e}")
+            finally:
+                self._sync(db, batch)
+                with self._flushed:
+                    self._pending -= len(batch)
+                    self._flushed.notify_all()
+
+    def _sync(self, db: sqlite3.Connection, written: List[tuple]) -> None:
+        """Re-read today's total once `written` is in the database"""
+        try:
+            stored = self._read_today(db)
+        except sqlite3.Error as e:
+            logger.warning(f"Usage ledger read failed: {e}")
+            stored = None
+        with self._lock:
+            for event in written:
+                self._unwritten[event[1]] -= event[-1]
+            self._unwritten = +self._unwritten  # drop finished days
+            if stored is not None:
+                self._stored = stored
+
+    def summary(self, days: int = 7) -> Dict[str, Any]:
+        """Aggregated usage for the last `days` days"""
+        since = (date.today() - timedelta(days=days - 1)).isoformat()
+        with closing(self._connect()) as db:
+            rows = db.execute(
+                "SELECT day, model, caller, calls, prompt_tokens, "
+                "completion_tokens, total_tokens FROM usage_daily "
+                "WHERE day >= ? ORDER BY day, model, caller",
+                (since,),
+            ).fetchall()
+
+        columns = (
+            "day", "model", "caller", "calls", "prompt_tokens",
+            "completion_tokens", "total_tokens"
+        )
+        daily: List[Dict[str, Any]] = [dict(zip(columns, r)) for r in rows]
+
+        by_model: Dict[str, Dict[str, int]] = {}
+        for row in daily:
+            totals = by_model.setdefault(
+                row["model"], {"calls": 0, "total_tokens": 0}
+            )
+            totals["calls"] += row["calls"]
+            totals["total_tokens"] += row["total_tokens"]
+
+        return {
+            "since": since,
+            "daily": daily,
+            "by_model": by_model,
+            "today_tokens": self.today_tokens(),
+            "budget": {
+                "state": self.budget_state(),
+                "soft_daily_tokens": self.soft_daily_tokens,
+                "hard_daily_tokens": self.hard_daily_tokens
+            }
+        }
+
+
+# Global ledger instance
+_usage_ledger = None
+
+
+def get_usage_ledger() -> UsageLedger:
+    """Return the shared ledger; budgets come from the environment"""
+    global _usage_ledger
+    if _usage_ledger is None:
+        _usage_ledger = UsageLedger(
+            soft_daily_tokens=int(
+                os.getenv("CLOUDFLARE_SOFT_DAILY_TOKENS", "0")
+            ),
+            hard_daily_tokens=int(
+                os.getenv("CLOUDFLARE_HARD_DAILY_TOKENS", "0")
+            ),
+        )
+    return _usage_ledger
@@ -0,0 +1,284 @@
+import copy
+import functools
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # optional, falls back to polling
+    Observer = None
+
+from .host_state import FileLock
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "config", "config.json"
+)
+POLL_INTERVAL = 1.0  # seconds, when watchdog is not installed
+
+DEFAULT_SYSTEM_PROMPT = "You are a helpful AI assistant."
+DEFAULT_MODEL = "llama3.2:latest"
+DEFAULT_POLISH_MODEL = "bielik:7b"
+DEFAULT_CODE_MODEL = "codellama:7b"
+
+
+def strip_provider(model: Optional[str], default: str) -> str:
+    """'ollama:llama3.2:latest' -> 'llama3.2:latest'"""
+    if not model:
+        return default
+    return model.split(":", 1)[1] if model.startswith("ollama:") else model
+
+
+def real_key(value: Optional[str]) -> str:
+    """API key, or '' for empty values and 'YOUR_..._KEY' placeholders"""
+    value = (value or "").strip()
+    return "" if value.startswith("YOUR_") else value
+
+
+@dataclass(frozen=True)
+class AIConfig:
+    """Immutable, parsed snapshot of config/config.json"""
+
+    system_prompt: str = DEFAULT_SYSTEM_PROMPT
+    ollama_model: str = DEFAULT_MODEL
+    polish_model: str = DEFAULT_POLISH_MODEL
+    code_model: str = DEFAULT_CODE_MODEL
+    model_path: str = ""
+    ollama_api_key: str = ""
+    openai_api_key: str = ""
+    mcp_url: str = ""
+    file_paths: Tuple[str, ...] = ()
+    generation: int = 0
+    raw: Dict[str, Any] = field(default_factory=dict, compare=False, repr=False)
+
+    @property
+    def provider(self) -> str:
+        """Which backend AIChat should use"""
+        if self.ollama_api_key:
+            return "ollama"
+        if self.openai_api_key:
+            return "openai"
+        if self.model_path:
+            return "local"
+        return "ollama"
+
+
+def normalize_config(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Bring a config into the nested shape of config/config.json.
+
+    Accepts the nested file format as well as the flat form posted by
+    the dashboard settings modal (`ollama_api_key`, `system_prompt`,
+    `selected_ai_model`, ...). Only keys present in `data` are set, so
+    the result can be merged over an existing config.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Configuration must be a JSON object")
+    result: Dict[str, Any] = {
+        key: copy.deepcopy(value) for key, value in data.items()
+        if key in ("api_keys", "server", "ai_settings", "file_paths")
+    }
+    api_keys = result.setdefault("api_keys", {})
+    server = result.setdefault("server", {})
+    ai_settings = result.setdefault("ai_settings", {})
+    models = ai_settings.setdefault("models", {})
+
+    flat = {
+        "ollama_api_key": (api_keys, "ollama"),
+        "openai_api_key": (api_keys, "openai"),
+        "mcp_server_url": (server, "mcp_url"),
+        "system_prompt": (ai_settings, "system_prompt"),
+        "model_path": (ai_settings, "model_path"),
+    }
+    for key, (section, name) in flat.items():
+        if key in data:
+            section[name] = data[key]
+    for key in ("selected_ai_model", "ollama_model"):
+        if data.get(key):
+            models["default"] = f"ollama:{strip_provider(data[key], '')}"
+
+    for name in ("api_keys", "server", "ai_settings"):
+        if not result[name] or result[name] == {"models": {}}:
+            del result[name]
+    return result
+
+
+def merge_config(base: Dict[str, Any], update: Dict[str, Any]) -> Dict[str, Any]:
+    merged = copy.deepcopy(base)
+    for key, value in update.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def parse_config(data: Dict[str, Any], generation: int = 0) -> AIConfig:
+    nested = normalize_config(data)
+    api_keys = nested.get("api_keys", {})
+    ai_settings = nested.get("ai_settings", {})
+    models = ai_settings.get("models", {})
+    language = models.get("language") or {}
+    file_paths = nested.get("file_paths") or []
+    if not isinstance(file_paths, list):
+        raise ValueError("file_paths must be a list")
+    return AIConfig(
+        system_prompt=ai_settings.get("system_prompt") or DEFAULT_SYSTEM_PROMPT,
+        ollama_model=strip_provider(models.get("default"), DEFAULT_MODEL),
+        polish_model=strip_provider(
+            language.get("polish"), DEFAULT_POLISH_MODEL
+        ),
+        code_model=strip_provider(models.get("code"), DEFAULT_CODE_MODEL),
+        model_path=ai_settings.get("model_path") or "",
+        ollama_api_key=real_key(api_keys.get("ollama")),
+        openai_api_key=real_key(api_keys.get("openai")),
+        mcp_url=nested.get("server", {}).get("mcp_url") or "",
+        file_paths=tuple(str(p) for p in file_paths),
+        generation=generation,
+        raw=nested,
+    )
+
+
+class ConfigService:
+    """Immutable config snapshots, reloaded when the file changes"""
+
+    def __init__(
+        self,
+        path: str = CONFIG_PATH,
+        watch: bool = True,
+        validate: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        self.path = os.path.abspath(path)
+        self.validate = validate
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._stamp = None
+        self._listeners: List[Callable[[AIConfig, AIConfig], None]] = []
+        self._config = AIConfig()
+        self._stop = threading.Event()
+        self._observer = None
+        self.reload()
+        if watch:
+            self.start_watching()
+
+    @property
+    def config(self) -> AIConfig:
+        return self._config
+
+    def subscribe(self, listener: Callable[[AIConfig, AIConfig], None]):
+        """Call `listener(old, new)` after every successful reload"""
+        self._listeners.append(listener)
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def reload(self) -> bool:
+        with self._lock:
+            stamp = self._file_stamp()
+            try:
+                data = {}
+                if stamp is not None:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                new = parse_config(data, self._config.generation + 1)
+            except (OSError, json.JSONDecodeError, ValueError,
+                    AttributeError) as e:
+                logger.error(f"❌ Invalid config {self.path}, keeping old: {e}")
+                self._stamp = stamp
+                return False
+            old, self._config, self._stamp = self._config, new, stamp
+
+        logger.info(f"⚙️ Configuration loaded (generation {new.generation})")
+        for listener in self._listeners:
+            try:
+                listener(old, new)
+            except Exception as e:
+                logger.warning(f"Config listener failed: {e}")
+        return True
+
+    def check(self) -> bool:
+        """Reload if the file changed since the last load"""
+        if self._file_stamp() != self._stamp:
+            return self.reload()
+        return False
+
+    def save(self, update: Dict[str, Any]) -> AIConfig:
+        """Merge `update` (nested or flat form) into the file and reload"""
+        normalized = normalize_config(update)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # One writer at a time, in this process and across workers
+        with self._save_lock, FileLock(self.path):
+            # Merge into what is on disk, not a snapshot another saver
+            # has already replaced
+            self.check()
+            merged = merge_config(self._config.raw, normalized)
+            # validate before touching the file
+            if self.validate is not None:
+                self.validate(merged)
+            parse_config(merged)
+
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(merged, f, indent=2, ensure_ascii=False)
+                f.write("\n")
+            os.replace(tmp_path, self.path)
+            self.reload()
+            return self._config
+
+    def start_watching(self) -> None:
+        if Observer is not None:
+            service = self
+
+            class Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    if os.path.abspath(
+                        getattr(event, "dest_path", "") or event.src_path
+                    ) == service.path:
+                        service.check()
+
+            self._observer = Observer()
+            self._observer.schedule(Handler(), os.path.dirname(self.path))
+            self._observer.daemon = True
+            self._observer.start()
+            return
+
+        def poll():
+            while not self._stop.wait(POLL_INTERVAL):
+                try:
+                    self.check()
+                except Exception as e:
+                    logger.warning(f"Config poll failed: {e}")
+
+        threading.Thread(target=poll, name="config-watch", daemon=True).start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+
+
+# Global config service instance
+_config_service = None
+_config_service_lock = threading.Lock()
+
+
+def get_config_service() -> ConfigService:
+    """Return the shared service for config/config.json"""
+    global _config_service
+    from .components.ai_tools.schema_validation import get_schema_registry
+
+    with _config_service_lock:
+        if _config_service is None:
+            _config_service = ConfigService(validate=functools.partial(
+                get_schema_registry().validate, "config"
+            ))
+    return _config_service
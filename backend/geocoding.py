@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import unicodedata
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+GEOCODE_INDEX_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "data", "geocode_index.json"
+)
+# Names the geocoder did not know are retried after this many seconds
+MISS_TTL = 600
+
+# Letters NFKD does not decompose into base letter + diacritic
+_EXTRA_FOLDS = str.maketrans({"ł": "l", "ø": "o", "đ": "d", "ħ": "h", "ı": "i"})
+
+
+def fold_name(name: str) -> str:
+    """Case and diacritic folded city name: ' Łódź , PL' -> 'lodz,pl'"""
+    name = unicodedata.normalize("NFKD", name.casefold())
+    name = "".join(c for c in name if not unicodedata.combining(c))
+    parts = (
+        " ".join(part.split())
+        for part in name.translate(_EXTRA_FOLDS).split(",")
+    )
+    return ",".join(part for part in parts if part)
+
+
+def _retrieve(task: asyncio.Future) -> None:
+    # Mark retrieved so a failure nobody awaited is not logged
+    if not task.cancelled():
+        task.exception()
+
+
+@dataclass
+class Location:
+    name: str
+    country: str
+    lat: float
+    lon: float
+    state: Optional[str] = None
+    city_id: Optional[int] = None  # OpenWeatherMap id, learned from /weather
+
+    @property
+    def key(self) -> str:
+        """Canonical cache key shared by every alias of the city"""
+        return f"{self.lat:.2f},{self.lon:.2f}"
+
+
+class CityResolver:
+    """Resolves city names to canonical locations, caching them forever.
+
+    Names are folded (case, diacritics, whitespace) and looked up in an
+    alias index persisted as JSON. Unknown names go to the geocoding
+    API once; the result is stored under the query, the official name,
+    "name,country" and every local name, so "Warsaw", "warszawa" and
+    "Warsaw,PL" all map to the same location. Names the API does not
+    know are remembered in memory for `miss_ttl` seconds only.
+    """
+
+    def __init__(
+        self,
+        path: str = GEOCODE_INDEX_PATH,
+        miss_ttl: float = MISS_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.path = path
+        self.miss_ttl = miss_ttl
+        self.clock = clock
+        self.locations: Dict[str, Location] = {}
+        self.aliases: Dict[str, str] = {}
+        self._misses: Dict[str, float] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._save_lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            self.locations = {
+                key: Location(**loc) for key, loc in index["locations"].items()
+            }
+            self.aliases = {
+                alias: key for alias, key in index["aliases"].items()
+                if key in self.locations
+            }
+        except (json.JSONDecodeError, IOError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring corrupt geocode index: {e}")
+
+    def save(self):
+        with self._save_lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "locations": {
+                            key: asdict(loc)
+                            for key, loc in self.locations.items()
+                        },
+                        "aliases": self.aliases,
+                    },
+                    f,
+                    ensure_ascii=False,
+                )
+            os.replace(tmp_path, self.path)
+
+    def lookup(self, name: str) -> Optional[Location]:
+        """Already resolved location for a name, without network"""
+        key = self.aliases.get(fold_name(name))
+        return self.locations.get(key) if key else None
+
+    async def resolve(
+        self, name: str, geocode: Callable[[str], Awaitable[List[Dict]]]
+    ) -> Optional[Location]:
+        """Location for a name; None if the geocoder does not know it"""
+        location = self.lookup(name)
+        if location is not None:
+            return location
+
+        alias = fold_name(name)
+        if self._misses.get(alias, 0) > self.clock():
+            return None
+        self._misses.pop(alias, None)
+        # Owned by the resolver, so a cancelled caller never cancels the
+        # lookup for the others sharing it
+        task = self._inflight.get(alias)
+        if task is None:
+            task = asyncio.ensure_future(self._geocode(alias, name, geocode))
+            task.add_done_callback(_retrieve)
+            self._inflight[alias] = task
+        return await asyncio.shield(task)
+
+    async def _geocode(
+        self,
+        alias: str,
+        name: str,
+        geocode: Callable[[str], Awaitable[List[Dict]]],
+    ) -> Optional[Location]:
+        try:
+            results = await geocode(name)
+            if results:
+                return self.add(alias, results[0])
+            self._misses[alias] = self.clock() + self.miss_ttl
+            return None
+        finally:
+            del self._inflight[alias]
+
+    def add(self, alias: str, result: Dict) -> Location:
+        """Index a geocoding API result under all its names"""
+        location = Location(
+            name=result["name"],
+            country=result.get("country", ""),
+            lat=result["lat"],
+            lon=result["lon"],
+            state=result.get("state"),
+        )
+        key = location.key
+        location = self.locations.setdefault(key, location)
+        names = [alias, location.name, f"{location.name},{location.country}"]
+        names.extend((result.get("local_names") or {}).values())
+        for name in names:
+            folded = fold_name(name)
+            if folded:
+                self.aliases[folded] = key
+        self.save()
+        logger.info(f"📍 Resolved '{alias}' to {location.name} ({key})")
+        return location
+
+    def remember_city_id(self, key: str, city_id: int) -> None:
+        location = self.locations.get(key)
+        if location is not None and location.city_id != city_id:
+            location.city_id = city_id
+            self.save()
@@ -0,0 +1,329 @@
+"""3D models (GLB): header metadata and the manifest served to the 3D view."""
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+
+from .model_store import file_checksum
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BASE_DIR, "..", "frontend", "static", "models")
+INDEX_PATH = os.path.join(BASE_DIR, "..", "frontend", "build", "glb_index.json")
+MODELS_JSON = "models.json"
+
+GLB_MAGIC = b"glTF"
+GLB_HEADER = struct.Struct("<4sII")  # magic, version, total length
+GLB_CHUNK = struct.Struct("<II")  # chunk length, chunk type
+GLB_CHUNK_JSON = 0x4E4F534A
+
+HASH_LENGTH = 12
+
+IDENTITY = [
+    [1.0, 0.0, 0.0, 0.0],
+    [0.0, 1.0, 0.0, 0.0],
+    [0.0, 0.0, 1.0, 0.0],
+    [0.0, 0.0, 0.0, 1.0],
+]
+
+
+def matmul(a: List[List[float]], b: List[List[float]]) -> List[List[float]]:
+    return [
+        [sum(a[r][k] * b[k][c] for k in range(4)) for c in range(4)]
+        for r in range(4)
+    ]
+
+
+def node_matrix(node: Dict[str, Any]) -> List[List[float]]:
+    """Local transform of a glTF node (`matrix` or translation/rotation/scale)"""
+    if "matrix" in node:
+        m = node["matrix"]  # column-major
+        return [[m[c * 4 + r] for c in range(4)] for r in range(4)]
+    tx, ty, tz = node.get("translation", (0, 0, 0))
+    x, y, z, w = node.get("rotation", (0, 0, 0, 1))
+    sx, sy, sz = node.get("scale", (1, 1, 1))
+    rotation = [
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ]
+    scale = (sx, sy, sz)
+    translation = (tx, ty, tz)
+    return [
+        [rotation[r][c] * scale[c] for c in range(3)] + [translation[r]]
+        for r in range(3)
+    ] + [[0.0, 0.0, 0.0, 1.0]]
+
+
+def scene_bounds(gltf: Dict[str, Any]) -> Optional[Dict[str, List[float]]]:
+    """World-space bounding box of the default scene.
+
+    Each primitive's POSITION min/max box is transformed by its node's
+    world matrix; the result encloses the model (it can be slightly
+    larger than the tight box for rotated nodes).
+    """
+    nodes = gltf.get("nodes", [])
+    meshes = gltf.get("meshes", [])
+    accessors = gltf.get("accessors", [])
+    scenes = gltf.get("scenes")
+    if scenes:
+        roots = scenes[gltf.get("scene", 0)].get("nodes", [])
+    else:
+        children = {c for node in nodes for c in node.get("children", [])}
+        roots = [i for i in range(len(nodes)) if i not in children]
+
+    low = [float("inf")] * 3
+    high = [float("-inf")] * 3
+    stack = [(IDENTITY, root) for root in roots]
+    visited = set()
+    while stack:
+        parent, index = stack.pop()
+        if index in visited:  # malformed file with a cycle
+            continue
+        visited.add(index)
+        node = nodes[index]
+        world = matmul(parent, node_matrix(node))
+        for child in node.get("children", []):
+            stack.append((world, child))
+        if "mesh" not in node:
+            continue
+        for primitive in meshes[node["mesh"]].get("primitives", []):
+            position = primitive.get("attributes", {}).get("POSITION")
+            if position is None:
+                continue
+            accessor = accessors[position]
+            if "min" not in accessor or "max" not in accessor:
+                continue
+            lo, hi = accessor["min"], accessor["max"]
+            for cx in (lo[0], hi[0]):
+                for cy in (lo[1], hi[1]):
+                    for cz in (lo[2], hi[2]):
+                        point = [
+                            world[r][0] * cx + world[r][1] * cy
+                            + world[r][2] * cz + world[r][3]
+                            for r in range(3)
+                        ]
+                        low = [min(a, b) for a, b in zip(low, point)]
+                        high = [max(a, b) for a, b in zip(high, point)]
+
+    if low[0] == float("inf"):
+        return None
+    return {
+        "min": [round(v, 6) for v in low],
+        "max": [round(v, 6) for v in high],
+    }
+
+
+def read_glb_metadata(path: str) -> Dict[str, Any]:
+    """Vertex count, mesh count and bounding box from a GLB header"""
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            magic, version, length = GLB_HEADER.unpack_from(buf, 0)
+            if magic != GLB_MAGIC:
+                raise ValueError(f"{path} is not a GLB file")
+            if length > len(buf):
+                raise ValueError(f"{path} is truncated")
+            chunk_length, chunk_type = GLB_CHUNK.unpack_from(
+                buf, GLB_HEADER.size
+            )
+            if chunk_type != GLB_CHUNK_JSON:
+                raise ValueError(f"{path} has no JSON chunk")
+            start = GLB_HEADER.size + GLB_CHUNK.size
+            gltf = json.loads(bytes(buf[start:start + chunk_length]))
+
+    accessors = gltf.get("accessors", [])
+    vertex_count = 0
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh.get("primitives", []):
+            position = primitive.get("attributes", {}).get("POSITION")
+            if position is not None:
+                vertex_count += accessors[position].get("count", 0)
+
+    asset = gltf.get("asset", {})
+    return {
+        "format": "glb",
+        "glb_version": version,
+        "gltf_version": asset.get("version"),
+        "generator": asset.get("generator"),
+        "mesh_count": len(gltf.get("meshes", [])),
+        "vertex_count": vertex_count,
+        "bbox": scene_bounds(gltf),
+    }
+
+
+class GLBIndex:
+    """GLB file metadata, recomputed only when a file changes"""
+
+    def __init__(self, models_dir: str = MODELS_DIR, index_path: str = INDEX_PATH):
+        self.models_dir = models_dir
+        self.index_path = index_path
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Ignoring corrupt GLB index: {e}")
+                self._entries = {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _describe(self, path: str, stat: os.stat_result) -> Dict[str, Any]:
+        entry = {
+            "file": os.path.basename(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": file_checksum(path),
+        }
+        try:
+            entry.update(read_glb_metadata(path))
+        except (ValueError, OSError, struct.error, KeyError, IndexError) as e:
+            logger.warning(f"Could not read GLB header of {path}: {e}")
+            entry["error"] = str(e)
+        return entry
+
+    def _refresh(self, name: str, stat: os.stat_result) -> bool:
+        cached = self._entries.get(name)
+        if (
+            cached
+            and cached["mtime_ns"] == stat.st_mtime_ns
+            and cached["size"] == stat.st_size
+        ):
+            return False
+        self._entries[name] = self._describe(
+            os.path.join(self.models_dir, name), stat
+        )
+        return True
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Up-to-date entry of one model file, None if it does not exist"""
+        if os.path.basename(name) != name or not name.endswith(".glb"):
+            return None
+        try:
+            stat = os.stat(os.path.join(self.models_dir, name))
+        except OSError:
+            return None
+        with self._lock:
+            if self._refresh(name, stat):
+                self._save()
+            return self._entries[name]
+
+    def list_models(self) -> List[Dict[str, Any]]:
+        """Entries for every .glb file, re-reading only changed files"""
+        if not os.path.isdir(self.models_dir):
+            return []
+
+        with self._lock:
+            changed = False
+            seen = set()
+            for dir_entry in os.scandir(self.models_dir):
+                if not dir_entry.is_file() or not dir_entry.name.endswith(
+                    ".glb"
+                ):
+                    continue
+                seen.add(dir_entry.name)
+                changed |= self._refresh(dir_entry.name, dir_entry.stat())
+
+            for name in list(self._entries):
+                if name not in seen:
+                    del self._entries[name]
+                    changed = True
+
+            if changed:
+                self._save()
+            return sorted(self._entries.values(), key=lambda e: e["file"])
+
+
+class GLBManifest:
+    """models.json merged with file metadata and content-addressed URLs"""
+
+    def __init__(
+        self,
+        models_dir: str = MODELS_DIR,
+        index_path: str = INDEX_PATH,
+        url_prefix: str = "/models",
+    ):
+        self.models_dir = models_dir
+        self.url_prefix = url_prefix
+        self.index = GLBIndex(models_dir, index_path)
+
+    def url(self, entry: Dict[str, Any]) -> str:
+        return (
+            f"{self.url_prefix}/{entry['sha256'][:HASH_LENGTH]}/"
+            f"{quote(entry['file'])}"
+        )
+
+    def listed_models(self) -> List[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.models_dir, MODELS_JSON), "r",
+                      encoding="utf-8") as f:
+                return json.load(f).get("models", [])
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not read {MODELS_JSON}: {e}")
+            return []
+
+    def describe(self, item: Dict[str, Any], meta: Optional[Dict]) -> Dict:
+        item = dict(item)
+        if meta is None:
+            item["available"] = False
+            return item
+        item.update({
+            "available": "error" not in meta,
+            "url": self.url(meta),
+            "file": meta["file"],
+            "size": meta["size"],
+            "sha256": meta["sha256"],
+            "vertex_count": meta.get("vertex_count"),
+            "mesh_count": meta.get("mesh_count"),
+            "bbox": meta.get("bbox"),
+        })
+        if "error" in meta:
+            item["error"] = meta["error"]
+        return item
+
+    def models(self) -> List[Dict[str, Any]]:
+        files = {entry["file"]: entry for entry in self.index.list_models()}
+        models = []
+        listed = set()
+        for item in self.listed_models():
+            name = os.path.basename(item.get("path", ""))
+            listed.add(name)
+            models.append(self.describe(item, files.get(name)))
+        for name, meta in sorted(files.items()):
+            if name in listed:
+                continue
+            model_id = os.path.splitext(name)[0]
+            models.append(self.describe({
+                "id": model_id,
+                "name": model_id,
+                "path": f"/static/models/{name}",
+                "category": "uncategorized",
+            }, meta))
+        return models
+
+
+# Global manifest instance
+_glb_manifest = None
+_glb_manifest_lock = threading.Lock()
+
+
+def get_glb_manifest() -> GLBManifest:
+    global _glb_manifest
+    with _glb_manifest_lock:
+        if _glb_manifest is None:
+            _glb_manifest = GLBManifest()
+    return _glb_manifest
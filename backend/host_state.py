@@ -0,0 +1,219 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from .metrics import upstream_span
+from .startup import lazy_import
+
+logger = logging.getLogger(__name__)
+
+
+def default_state_dir() -> str:
+    """Per-host directory for state shared by worker processes.
+
+    /dev/shm (RAM) where available, otherwise the temp directory;
+    DASHBOARD_STATE_DIR overrides both.
+    """
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.getenv("DASHBOARD_STATE_DIR") or os.path.join(
+        base, f"kozak-dashboard-{getattr(os, 'getuid', lambda: 0)()}"
+    )
+
+
+class FileLock:
+    """Exclusive inter-process lock on `<path>.lock`"""
+
+    def __init__(self, path: str):
+        self.path = path + ".lock"
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a+")
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+class HostLeader:
+    """Elects one process per host for background work, via a file lock"""
+
+    def __init__(self, state_dir: str):
+        self.path = os.path.join(state_dir, "leader.lock")
+        self._file = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._file is not None
+
+    def try_acquire(self) -> bool:
+        if self._file is not None:
+            return True
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        f = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        logger.info(f"👑 Process {os.getpid()} runs the host background jobs")
+        return True
+
+    def release(self) -> None:
+        if self._file is not None:
+            self._file.close()  # closing drops the lock
+            self._file = None
+
+
+def sample_host(cpu_interval: Optional[float] = None) -> Dict[str, Any]:
+    """CPU, memory, disk and GPU usage; the slow part is nvidia-smi.
+
+    With `cpu_interval=None` CPU usage is measured since the previous
+    call, i.e. over one sampling interval.
+    """
+    psutil = lazy_import("psutil")
+    GPUtil = lazy_import("GPUtil")
+
+    with upstream_span("psutil", "sample_host"):
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage(os.path.splitdrive(os.getcwd())[0] + os.sep)
+        cpu_percent = psutil.cpu_percent(interval=cpu_interval)
+    try:
+        with upstream_span("gputil", "get_gpus"):
+            gpus = GPUtil.getGPUs()
+    except Exception:
+        gpus = []
+    return {
+        "cpu_percent": cpu_percent,
+        "memory_percent": memory.percent,
+        "memory_used": memory.used,
+        "memory_total": memory.total,
+        "disk_percent": disk.percent,
+        "disk_used": disk.used,
+        "disk_total": disk.total,
+        "gpu_usage": gpus[0].load * 100 if gpus else 0,
+        "gpu_memory_percent": gpus[0].memoryUtil * 100 if gpus else 0,
+        "timestamp": psutil.boot_time(),
+    }
+
+
+class HostSampler:
+    """Samples host resources once per host and shares them through a file"""
+
+    def __init__(
+        self,
+        state_dir: Optional[str] = None,
+        interval: float = 2.0,
+    ):
+        self.state_dir = state_dir or default_state_dir()
+        self.path = os.path.join(self.state_dir, "host_metrics.json")
+        self.interval = interval
+        self.leader = HostLeader(self.state_dir)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._cached = (None, None)  # (file stamp, snapshot)
+
+    def publish(self, snapshot: Dict[str, Any]) -> None:
+        os.makedirs(self.state_dir, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(snapshot, sampled_at=time.time()), f)
+        os.replace(tmp_path, self.path)
+
+    def latest(self, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Last published sample, or None if missing or older than max_age"""
+        if max_age is None:
+            max_age = 3 * self.interval
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached_stamp, snapshot = self._cached
+        if stamp != cached_stamp:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                return None
+            self._cached = (stamp, snapshot)
+        if time.time() - snapshot.get("sampled_at", 0) > max_age:
+            return None
+        return snapshot
+
+    def tick(self) -> bool:
+        """Sample and publish if this process is the leader"""
+        if not self.leader.try_acquire():
+            return False
+        self.publish(sample_host())
+        return True
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logger.warning(f"⚠️ Host sampling failed: {e}")
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="host-sampler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.leader.release()
+
+
+# Global sampler instance
+_host_sampler = None
+_host_sampler_lock = threading.Lock()
+
+
+def get_host_sampler() -> HostSampler:
+    """Return this process's sampler (HOST_SAMPLE_INTERVAL seconds)"""
+    global _host_sampler
+    with _host_sampler_lock:
+        if _host_sampler is None:
+            _host_sampler = HostSampler(
+                interval=float(os.getenv("HOST_SAMPLE_INTERVAL", "2"))
+            )
+    return _host_sampler
+
+
+def is_host_leader() -> bool:
+    """Whether this process runs the once-per-host background jobs"""
+    return get_host_sampler().leader.try_acquire()
@@ -0,0 +1,501 @@
+"""Prometheus metrics (`/metrics`) for requests and upstream calls."""
+import atexit
+import json
+import os
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .serving import on_close
+from .startup import lazy_import
+
+Labels = Tuple[Tuple[str, str], ...]
+Key = Tuple[str, Labels]
+
+BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+REQUEST_DURATION = "dashboard_http_request_duration_seconds"
+REQUESTS_IN_FLIGHT = "dashboard_http_requests_in_flight"
+REQUEST_BYTES = "dashboard_http_request_bytes_total"
+RESPONSE_BYTES = "dashboard_http_response_bytes_total"
+UPSTREAM_DURATION = "dashboard_upstream_duration_seconds"
+
+METRICS = {
+    REQUEST_DURATION: (
+        "histogram", "HTTP request latency by route, method and status",
+    ),
+    REQUESTS_IN_FLIGHT: ("gauge", "HTTP requests being served"),
+    REQUEST_BYTES: ("counter", "HTTP request body bytes received"),
+    RESPONSE_BYTES: ("counter", "HTTP response body bytes sent"),
+    UPSTREAM_DURATION: (
+        "histogram", "Latency of calls to upstream services",
+    ),
+}
+
+UNMATCHED_ROUTE = "<unmatched>"
+PUBLISH_INTERVAL = 5.0
+RETIRED_FILENAME = "metrics.retired.json"
+
+
+class Shard:
+    """Metric values written by one thread"""
+
+    def __init__(self, thread: Optional[threading.Thread] = None):
+        self.thread = thread
+        self.values: Dict[Key, float] = {}
+        # Per bucket counts (the last one is +Inf), then the sum
+        self.histograms: Dict[Key, List[float]] = {}
+
+
+def merge_into(
+    values: Dict[Key, float],
+    histograms: Dict[Key, List[float]],
+    shard_values: Iterable,
+    shard_histograms: Iterable,
+) -> None:
+    for key, value in shard_values:
+        values[key] = values.get(key, 0) + value
+    for key, counts in shard_histograms:
+        total = histograms.get(key)
+        if total is None:
+            histograms[key] = list(counts)
+        else:
+            for i, count in enumerate(counts):
+                total[i] += count
+
+
+class MetricsRegistry:
+    """Counters and histograms recorded without a lock on the request path"""
+
+    def __init__(self, buckets: Tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards: List[Shard] = []
+        self._retired = Shard()
+        self._lock = threading.Lock()
+
+    def _shard(self) -> Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = Shard(threading.current_thread())
+            self._local.shard = shard
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name: str, labels: Labels, value: float = 1) -> None:
+        values = self._shard().values
+        key = (name, labels)
+        values[key] = values.get(key, 0) + value
+
+    def observe(self, name: str, labels: Labels, value: float) -> None:
+        self._observe(self._shard().histograms, (name, labels), value)
+
+    def _observe(self, histograms, key: Key, value: float) -> None:
+        counts = histograms.get(key)
+        if counts is None:
+            counts = histograms[key] = [0] * (len(self.buckets) + 2)
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def record_request(
+        self,
+        method: str,
+        route: str,
+        status: str,
+        duration: float,
+        request_bytes: int,
+        response_bytes: int,
+        was_in_flight: bool = True,
+    ) -> None:
+        """All metrics of one finished request, with one shard lookup"""
+        shard = self._shard()
+        values = shard.values
+        route_labels = (("method", method), ("route", route))
+        status_labels = route_labels + (("status", status),)
+        self._observe(
+            shard.histograms, (REQUEST_DURATION, status_labels), duration
+        )
+        if was_in_flight:
+            key = (REQUESTS_IN_FLIGHT, route_labels)
+            values[key] = values.get(key, 0) - 1
+        if request_bytes:
+            key = (REQUEST_BYTES, route_labels)
+            values[key] = values.get(key, 0) + request_bytes
+        if response_bytes:
+            key = (RESPONSE_BYTES, status_labels)
+            values[key] = values.get(key, 0) + response_bytes
+
+    def snapshot(self) -> Tuple[Dict[Key, float], Dict[Key, List[float]]]:
+        """Sum of all shards of this process"""
+        values: Dict[Key, float] = {}
+        histograms: Dict[Key, List[float]] = {}
+        with self._lock:
+            alive = []
+            for shard in self._shards:
+                if shard.thread.is_alive():
+                    alive.append(shard)
+                else:
+                    # Nobody writes to a finished thread's shard any more
+                    merge_into(
+                        self._retired.values, self._retired.histograms,
+                        shard.values.items(), shard.histograms.items(),
+                    )
+            self._shards = alive
+            for shard in [self._retired] + alive:
+                # dict.copy() is atomic under the GIL, iterating is not
+                merge_into(
+                    values, histograms,
+                    shard.values.copy().items(),
+                    shard.histograms.copy().items(),
+                )
+        return values, histograms
+
+
+def write_snapshot(
+    path: str, values: Dict[Key, float], histograms: Dict[Key, List[float]]
+) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "values": [[n, labels, v] for (n, labels), v in values.items()],
+            "histograms": [
+                [n, labels, counts] for (n, labels), counts in histograms.items()
+            ],
+        }, f)
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str):
+    """(values, histograms) written by `write_snapshot`, None if unreadable"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return (
+        {(n, tuple(map(tuple, labels))): v for n, labels, v in data["values"]},
+        {
+            (n, tuple(map(tuple, labels))): counts
+            for n, labels, counts in data["histograms"]
+        },
+    )
+
+
+def format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"')
+            .replace("\n", "\\n"),
+        )
+        for name, value in labels
+    ]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def render(
+    values: Dict[Key, float],
+    histograms: Dict[Key, List[float]],
+    buckets: Tuple[float, ...] = BUCKETS,
+) -> str:
+    """Prometheus text exposition format 0.0.4"""
+    lines = []
+    for name, (metric_type, help_text) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        if metric_type != "histogram":
+            for (key_name, labels), value in sorted(values.items()):
+                if key_name == name:
+                    lines.append(
+                        f"{name}{format_labels(labels)} {format_value(value)}"
+                    )
+            continue
+        for (key_name, labels), counts in sorted(histograms.items()):
+            if key_name != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + (None,), counts[:-1]):
+                cumulative += count
+                le = "+Inf" if bound is None else repr(bound)
+                bucket_labels = format_labels(labels, 'le="%s"' % le)
+                lines.append(
+                    f"{name}_bucket{bucket_labels} {format_value(cumulative)}"
+                )
+            lines.append(
+                f"{name}_sum{format_labels(labels)} "
+                f"{format_value(counts[-1])}"
+            )
+            lines.append(
+                f"{name}_count{format_labels(labels)} "
+                f"{format_value(cumulative)}"
+            )
+    return "\n".join(lines) + "\n"
+
+
+class SharedMetrics:
+    """Metrics of all worker processes on this host, summed at scrape time"""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry,
+        state_dir: Optional[str] = None,
+        interval: float = PUBLISH_INTERVAL,
+    ):
+        from .host_state import default_state_dir
+
+        self.registry = registry
+        self.state_dir = state_dir or default_state_dir()
+        self.interval = interval
+        self.retired_path = os.path.join(self.state_dir, RETIRED_FILENAME)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def path_for(self, pid: int) -> str:
+        return os.path.join(self.state_dir, f"metrics.{pid}.json")
+
+    def publish(self) -> None:
+        os.makedirs(self.state_dir, exist_ok=True)
+        write_snapshot(self.path_for(os.getpid()), *self.registry.snapshot())
+
+    def retire(self, paths: List[str]) -> None:
+        """Fold exited workers' counters and histograms into the host total.
+
+        Without this, every recycled worker would make the `_total` and
+        histogram series drop, which Prometheus reads as a counter reset.
+        Gauges describe the dead process only and are dropped.
+        """
+        from .host_state import FileLock
+
+        with FileLock(self.retired_path):
+            values, histograms = read_snapshot(self.retired_path) or ({}, {})
+            for path in paths:
+                # Another worker may have retired it while we waited
+                published = read_snapshot(path)
+                if published is None:
+                    continue
+                merge_into(
+                    values, histograms,
+                    (
+                        (key, value) for key, value in published[0].items()
+                        if METRICS.get(key[0], ("",))[0] != "gauge"
+                    ),
+                    published[1].items(),
+                )
+                write_snapshot(self.retired_path, values, histograms)
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def collect(self) -> Tuple[Dict[Key, float], Dict[Key, List[float]]]:
+        values, histograms = self.registry.snapshot()
+        try:
+            names = os.listdir(self.state_dir)
+        except FileNotFoundError:
+            return values, histograms
+        psutil = lazy_import("psutil")
+        dead = []
+        for name in names:
+            parts = name.split(".")
+            if (
+                len(parts) != 3 or parts[0] != "metrics"
+                or parts[2] != "json" or not parts[1].isdigit()
+            ):
+                continue
+            pid = int(parts[1])
+            if pid == os.getpid():
+                continue
+            path = os.path.join(self.state_dir, name)
+            if not psutil.pid_exists(pid):
+                dead.append(path)
+                continue
+            published = read_snapshot(path)
+            if published is not None:
+                merge_into(
+                    values, histograms,
+                    published[0].items(), published[1].items(),
+                )
+        if dead:
+            self.retire(dead)
+        retired = read_snapshot(self.retired_path)
+        if retired is not None:
+            merge_into(
+                values, histograms, retired[0].items(), retired[1].items()
+            )
+        return values, histograms
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.publish()
+            except OSError:
+                pass
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        if self._thread is None:
+            # Counts since the last periodic publish survive a clean exit
+            atexit.register(self.publish)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="metrics-publisher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+
+class CountingResult:
+    """Streamed body without Content-Length: counts the bytes sent"""
+
+    __slots__ = ("result", "finished", "sent")
+
+    def __init__(self, result, finished: Callable[[int], None]):
+        self.result = result
+        self.finished = finished
+        self.sent = 0
+
+    def __iter__(self):
+        for chunk in self.result:
+            self.sent += len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            close = getattr(self.result, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self.finished(self.sent)
+
+
+class MetricsMiddleware:
+    """WSGI middleware timing each request until its body is sent.
+
+    The route label is the matched URL rule (e.g.
+    `/api/weather/<city>`), stored in the environ by the Flask hook from
+    `init_app`, so label values stay bounded. File responses keep their
+    `wsgi.file_wrapper` type, so sendfile still applies.
+    """
+
+    def __init__(self, app, registry: Optional[MetricsRegistry] = None):
+        self.app = app
+        self.registry = registry or get_metrics()
+
+    def __call__(self, environ, start_response):
+        started = perf_counter()
+        response = {"status": "500", "length": None}
+
+        def capture(status, headers, exc_info=None):
+            response["status"] = status[:3]
+            for name, value in headers:
+                if name.lower() == "content-length":
+                    response["length"] = int(value)
+            return start_response(status, headers, exc_info)
+
+        def finished(sent: Optional[int] = None):
+            method = environ["REQUEST_METHOD"]
+            if method == "HEAD":
+                sent = 0
+            # Only requests that reached the Flask hook were counted in flight
+            route = environ.get("dashboard.route")
+            self.registry.record_request(
+                method,
+                route or UNMATCHED_ROUTE,
+                response["status"],
+                perf_counter() - started,
+                int(environ.get("CONTENT_LENGTH") or 0),
+                sent if sent is not None else response["length"] or 0,
+                was_in_flight=route is not None,
+            )
+
+        try:
+            result = self.app(environ, capture)
+        except BaseException:
+            finished(0)
+            raise
+        if response["length"] is not None:
+            return on_close(environ, result, finished)
+        return CountingResult(result, finished)
+
+
+def init_app(app, registry: Optional[MetricsRegistry] = None) -> None:
+    """Instrument a Flask app"""
+    registry = registry or get_metrics()
+
+    @app.before_request
+    def track_route():
+        from flask import request
+
+        rule = request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE
+        request.environ["dashboard.route"] = rule
+        registry.inc(
+            REQUESTS_IN_FLIGHT, (("method", request.method), ("route", rule)), 1
+        )
+
+    app.wsgi_app = MetricsMiddleware(app.wsgi_app, registry)
+
+
+@contextmanager
+def upstream_span(upstream: str, operation: str):
+    """Time a call to an upstream service (`outcome` is ok or error)"""
+    started = perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        get_metrics().observe(
+            UPSTREAM_DURATION,
+            (
+                ("upstream", upstream),
+                ("operation", operation),
+                ("outcome", outcome),
+            ),
+            perf_counter() - started,
+        )
+
+
+# Global registry instance (one per process)
+_metrics = None
+_shared_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> MetricsRegistry:
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = MetricsRegistry()
+    return _metrics
+
+
+def get_shared_metrics() -> SharedMetrics:
+    global _shared_metrics
+    registry = get_metrics()
+    with _metrics_lock:
+        if _shared_metrics is None:
+            _shared_metrics = SharedMetrics(
+                registry,
+                interval=float(
+                    os.getenv("METRICS_PUBLISH_INTERVAL", PUBLISH_INTERVAL)
+                ),
+            )
+    return _shared_metrics
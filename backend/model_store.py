@@ -0,0 +1,463 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import shutil
+import struct
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
+MODEL_EXTENSIONS = (".bin", ".gguf")
+INDEX_FILENAME = ".model_index.json"
+COPY_CHUNK_SIZE = 8 * 1024 * 1024  # 8 MiB
+
+# Linux FICLONE ioctl (copy-on-write clone on btrfs/xfs)
+FICLONE = 0x40049409
+
+GGUF_MAGIC = b"GGUF"
+
+# GGUF metadata value types
+GGUF_SCALAR_FORMATS = {
+    0: "<B",  # uint8
+    1: "<b",  # int8
+    2: "<H",  # uint16
+    3: "<h",  # int16
+    4: "<I",  # uint32
+    5: "<i",  # int32
+    6: "<f",  # float32
+    7: "<?",  # bool
+    10: "<Q",  # uint64
+    11: "<q",  # int64
+    12: "<d",  # float64
+}
+GGUF_TYPE_STRING = 8
+GGUF_TYPE_ARRAY = 9
+
+# llama.cpp `general.file_type` values
+GGUF_FILE_TYPES = {
+    0: "F32",
+    1: "F16",
+    2: "Q4_0",
+    3: "Q4_1",
+    7: "Q8_0",
+    8: "Q5_0",
+    9: "Q5_1",
+    10: "Q2_K",
+    11: "Q3_K_S",
+    12: "Q3_K_M",
+    13: "Q3_K_L",
+    14: "Q4_K_S",
+    15: "Q4_K_M",
+    16: "Q5_K_S",
+    17: "Q5_K_M",
+    18: "Q6_K",
+    19: "IQ2_XXS",
+    20: "IQ2_XS",
+    21: "Q2_K_S",
+    22: "IQ3_XS",
+    23: "IQ3_XXS",
+    24: "IQ1_S",
+    25: "IQ4_NL",
+    26: "IQ3_S",
+    27: "IQ3_M",
+    28: "IQ2_S",
+    29: "IQ2_M",
+    30: "IQ4_XS",
+    31: "IQ1_M",
+    32: "BF16",
+}
+
+
+class GGUFReader:
+    """Sequential reader over a memory-mapped GGUF header"""
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.offset = 0
+
+    def unpack(self, fmt: str):
+        value = struct.unpack_from(fmt, self.buf, self.offset)[0]
+        self.offset += struct.calcsize(fmt)
+        return value
+
+    def read_string(self) -> str:
+        length = self.unpack("<Q")
+        start = self.offset
+        self.offset += length
+        return bytes(self.buf[start:self.offset]).decode(
+            "utf-8", errors="replace"
+        )
+
+    def read_value(self, value_type: int):
+        if value_type == GGUF_TYPE_STRING:
+            return self.read_string()
+        if value_type == GGUF_TYPE_ARRAY:
+            self.skip_array()
+            return None
+        return self.unpack(GGUF_SCALAR_FORMATS[value_type])
+
+    def skip_array(self):
+        """Skip an array value without decoding it (tokenizer vocabularies)"""
+        item_type = self.unpack("<I")
+        count = self.unpack("<Q")
+        if item_type in GGUF_SCALAR_FORMATS:
+            item_size = struct.calcsize(GGUF_SCALAR_FORMATS[item_type])
+            self.offset += item_size * count
+        elif item_type == GGUF_TYPE_STRING:
+            for _ in range(count):
+                length = self.unpack("<Q")
+                self.offset += length
+        else:
+            for _ in range(count):
+                self.read_value(item_type)
+
+
+def read_gguf_metadata(path: str) -> Dict[str, Any]:
+    """Read architecture, quantization and sizes from a GGUF header.
+
+    The file is memory-mapped so only the pages holding the header are
+    touched; tensor data is never read.
+    """
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            if buf[:4] != GGUF_MAGIC:
+                raise ValueError(f"{path} is not a GGUF file")
+
+            reader = GGUFReader(buf)
+            reader.offset = 4
+            version = reader.unpack("<I")
+            count_format = "<I" if version == 1 else "<Q"
+            tensor_count = reader.unpack(count_format)
+            kv_count = reader.unpack(count_format)
+
+            metadata = {
+                "format": "gguf",
+                "gguf_version": version,
+                "tensor_count": tensor_count,
+                "architecture": None,
+                "name": None,
+                "quantization": None,
+                "context_length": None,
+            }
+            for _ in range(kv_count):
+                key = reader.read_string()
+                value = reader.read_value(reader.unpack("<I"))
+                if key == "general.architecture":
+                    metadata["architecture"] = value
+                elif key == "general.name":
+                    metadata["name"] = value
+                elif key == "general.file_type":
+                    metadata["quantization"] = GGUF_FILE_TYPES.get(
+                        value, str(value)
+                    )
+                elif key.endswith(".context_length"):
+                    metadata["context_length"] = value
+                if all(
+                    metadata[k] is not None
+                    for k in ("architecture", "quantization", "context_length")
+                ):
+                    break
+            return metadata
+
+
+def file_checksum(path: str, progress=None) -> str:
+    """SHA-256 of a file, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(COPY_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if progress:
+                progress(len(chunk))
+    return digest.hexdigest()
+
+
+class ModelIndex:
+    """Metadata index for local model files.
+
+    Entries are keyed by file name and reused while (mtime, size) are
+    unchanged, so listings only stat the directory. The index is persisted
+    next to the models so restarts stay instant as well.
+    """
+
+    def __init__(self, models_dir: str = MODELS_DIR):
+        self.models_dir = models_dir
+        self.index_path = os.path.join(models_dir, INDEX_FILENAME)
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"Ignoring corrupt model index: {e}")
+                self._entries = {}
+
+    def _save(self):
+        os.makedirs(self.models_dir, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def _describe(self, path: str, stat: os.stat_result) -> Dict[str, Any]:
+        entry = {
+            "file": os.path.basename(path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": None,
+        }
+        if path.endswith(".gguf"):
+            try:
+                entry.update(read_gguf_metadata(path))
+            except (ValueError, OSError, struct.error, KeyError) as e:
+                logger.warning(f"Could not read GGUF header of {path}: {e}")
+                entry["error"] = str(e)
+        else:
+            entry["format"] = "bin"
+        return entry
+
+    def list_models(self) -> List[Dict[str, Any]]:
+        """Metadata for every model file, re-reading only changed files"""
+        if not os.path.isdir(self.models_dir):
+            return []
+
+        with self._lock:
+            changed = False
+            seen = set()
+            for dir_entry in os.scandir(self.models_dir):
+                if not dir_entry.is_file() or not dir_entry.name.endswith(
+                    MODEL_EXTENSIONS
+                ):
+                    continue
+                stat = dir_entry.stat()
+                seen.add(dir_entry.name)
+                cached = self._entries.get(dir_entry.name)
+                if (
+                    cached
+                    and cached["mtime"] == stat.st_mtime
+                    and cached["size"] == stat.st_size
+                ):
+                    continue
+                self._entries[dir_entry.name] = self._describe(
+                    dir_entry.path, stat
+                )
+                changed = True
+
+            for name in list(self._entries):
+                if name not in seen:
+                    del self._entries[name]
+                    changed = True
+
+            if changed:
+                self._save()
+            return sorted(self._entries.values(), key=lambda e: e["file"])
+
+    def checksum(self, name: str) -> str:
+        """Cached SHA-256 of a model file, computed on first use"""
+        self.list_models()
+        with self._lock:
+            entry = self._entries[name]
+            if entry.get("sha256"):
+                return entry["sha256"]
+        # Hashing a multi-GB file must not block list_models()
+        sha256 = file_checksum(os.path.join(self.models_dir, name))
+        with self._lock:
+            # Only if the file was not replaced while it was being hashed
+            if self._entries.get(name) is entry:
+                entry["sha256"] = sha256
+                self._save()
+        return sha256
+
+    def record_checksum(self, name: str, sha256: str):
+        """Store a checksum computed elsewhere (e.g. during a copy)"""
+        self.list_models()
+        with self._lock:
+            if name in self._entries:
+                self._entries[name]["sha256"] = sha256
+                self._save()
+
+    def find_same_size(self, size: int) -> List[str]:
+        """Names of indexed models with the given size (dedup candidates)"""
+        return [e["file"] for e in self.list_models() if e["size"] == size]
+
+
+class ImportJob:
+    """Progress of a background model copy"""
+
+    def __init__(self, source: str, destination: str, total: int):
+        self.id = uuid.uuid4().hex
+        self.source = source
+        self.destination = destination
+        self.total = total
+        self.done = 0
+        self.status = "pending"
+        self.error: Optional[str] = None
+        self.started = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "source": self.source,
+            "file": os.path.basename(self.destination),
+            "status": self.status,
+            "bytes_done": self.done,
+            "bytes_total": self.total,
+            "progress": round(self.done / self.total * 100, 1)
+            if self.total
+            else 100.0,
+            "error": self.error,
+        }
+
+
+class ModelStore:
+    """Imports local model files into the models directory"""
+
+    def __init__(self, models_dir: str = MODELS_DIR):
+        self.models_dir = models_dir
+        self.index = ModelIndex(models_dir)
+        self.jobs: Dict[str, ImportJob] = {}
+
+    def import_model(self, source_path: str) -> Dict[str, Any]:
+        """Import a model file.
+
+        Uses a reflink or hardlink when source and destination share a
+        filesystem; otherwise starts a chunked background copy and returns
+        its job so the caller can poll progress.
+        """
+        source_path = os.path.abspath(source_path)
+        if not os.path.isfile(source_path):
+            raise FileNotFoundError(f"Model file not found: {source_path}")
+        if not source_path.endswith(MODEL_EXTENSIONS):
+            raise ValueError(
+                f"Unsupported model file type (expected {MODEL_EXTENSIONS})"
+            )
+
+        os.makedirs(self.models_dir, exist_ok=True)
+        name = os.path.basename(source_path)
+        destination = os.path.join(self.models_dir, name)
+        source_stat = os.stat(source_path)
+
+        if os.path.exists(destination):
+            if os.path.samefile(source_path, destination):
+                return {"status": "exists", "file": name}
+            if os.path.getsize(destination) != source_stat.st_size:
+                raise FileExistsError(
+                    f"A different model named {name} is already installed"
+                )
+
+        if source_stat.st_dev == os.stat(self.models_dir).st_dev:
+            method = self._link(source_path, destination)
+            if method:
+                logger.info(f"Model {name} imported via {method}")
+                return {"status": "installed", "file": name, "method": method}
+
+        job = ImportJob(source_path, destination, source_stat.st_size)
+        self.jobs[job.id] = job
+        threading.Thread(
+            target=self._run_copy, args=(job,), daemon=True
+        ).start()
+        return {"status": "copying", "file": name, "job": job.to_dict()}
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def _link(self, source: str, destination: str) -> Optional[str]:
+        """Try reflink, then hardlink. Returns the method used or None."""
+        if os.path.exists(destination):
+            return None
+        try:
+            import fcntl
+
+            with open(source, "rb") as src, open(destination, "wb") as dst:
+                fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            return "reflink"
+        except (ImportError, OSError):
+            if os.path.exists(destination):
+                os.unlink(destination)
+        try:
+            os.link(source, destination)
+            return "hardlink"
+        except OSError:
+            return None
+
+    def _run_copy(self, job: ImportJob):
+        name = os.path.basename(job.destination)
+        try:
+            duplicate = self._find_duplicate(job)
+            if duplicate:
+                job.status = "duplicate"
+                job.done = job.total
+                job.destination = os.path.join(self.models_dir, duplicate)
+                logger.info(f"Model {name} already installed as {duplicate}")
+                return
+
+            job.status = "copying"
+            job.done = 0
+            digest = hashlib.sha256()
+            tmp_path = job.destination + ".part"
+            with open(job.source, "rb") as src, open(tmp_path, "wb") as dst:
+                while True:
+                    chunk = src.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    digest.update(chunk)
+                    job.done += len(chunk)
+            shutil.copystat(job.source, tmp_path)
+            os.replace(tmp_path, job.destination)
+            self.index.record_checksum(name, digest.hexdigest())
+            job.status = "installed"
+            logger.info(f"Model {name} copied ({job.total} bytes)")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"Model import of {job.source} failed: {e}")
+            if os.path.exists(job.destination + ".part"):
+                os.unlink(job.destination + ".part")
+
+    def _find_duplicate(self, job: ImportJob) -> Optional[str]:
+        """Name of an installed model with identical contents, if any"""
+        candidates = self.index.find_same_size(job.total)
+        if not candidates:
+            return None
+
+        job.status = "verifying"
+
+        def progress(n):
+            job.done += n
+
+        source_sum = file_checksum(job.source, progress)
+        for candidate in candidates:
+            if self.index.checksum(candidate) == source_sum:
+                return candidate
+        if os.path.exists(job.destination):
+            raise FileExistsError(
+                f"A different model named "
+                f"{os.path.basename(job.destination)} is already installed"
+            )
+        return None
+
+
+# Global model store instance
+_model_store = None
+
+
+def get_model_store() -> ModelStore:
+    """Return the shared model store, creating it on first use"""
+    global _model_store
+    if _model_store is None:
+        _model_store = ModelStore()
+    return _model_store
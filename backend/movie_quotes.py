@@ -0,0 +1,184 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUOTES_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "config", "movie_quotes.json"
+)
+RELOAD_CHECK_INTERVAL = 2.0  # seconds between mtime checks
+
+
+class MovieQuote:
+    __slots__ = ("quote", "movie", "character", "year", "weather_condition")
+
+    def __init__(
+        self, quote: str, movie: str, character: str, year: int,
+        weather_condition: str
+    ):
+        self.quote = quote
+        self.movie = movie
+        self.character = character
+        self.year = year
+        self.weather_condition = weather_condition
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class QuoteIndex:
+    """Immutable snapshot of the corpus with precomputed indices"""
+
+    __slots__ = ("quotes", "by_condition", "by_movie", "by_decade")
+
+    def __init__(self, quotes: List[MovieQuote]):
+        self.quotes = quotes
+        self.by_condition: Dict[str, List[int]] = {}
+        self.by_movie: Dict[str, List[int]] = {}
+        self.by_decade: Dict[int, List[int]] = {}
+        for i, quote in enumerate(quotes):
+            self.by_condition.setdefault(quote.weather_condition, []).append(i)
+            self.by_movie.setdefault(quote.movie.casefold(), []).append(i)
+            self.by_decade.setdefault(quote.year // 10 * 10, []).append(i)
+
+
+class ShuffleBag:
+    """Draws every index once, in random order, before repeating any"""
+
+    __slots__ = ("indices", "_bag", "_last")
+
+    def __init__(self, indices: List[int]):
+        self.indices = indices
+        self._bag: List[int] = []
+        self._last: Optional[int] = None
+
+    def draw(self) -> int:
+        if not self._bag:
+            self._bag = list(self.indices)
+            random.shuffle(self._bag)
+            # No immediate repeat across a refill
+            if len(self._bag) > 1 and self._bag[-1] == self._last:
+                self._bag[0], self._bag[-1] = self._bag[-1], self._bag[0]
+        self._last = self._bag.pop()
+        return self._last
+
+
+class WeatherMovieQuotes:
+    """Movie quotes collection organized by weather conditions.
+
+    The corpus is read from `config/movie_quotes.json` and reloaded when
+    the file changes. Lookups go through precomputed indices and
+    per-condition shuffle bags, so drawing a quote is O(1) regardless
+    of corpus size and does not repeat until the bag is exhausted.
+    """
+
+    def __init__(self, path: str = QUOTES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._index = QuoteIndex([])
+        self._bags: Dict[Optional[str], ShuffleBag] = {}
+        self.reload()
+
+    def reload(self) -> bool:
+        """Re-read the corpus file; keeps the old corpus if it is invalid"""
+        try:
+            mtime = os.path.getmtime(self.path)
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            quotes = [
+                MovieQuote(
+                    q["quote"], q["movie"], q["character"], int(q["year"]),
+                    q["weather_condition"],
+                )
+                for q in data["quotes"]
+            ]
+        except (OSError, json.JSONDecodeError, KeyError, TypeError,
+                ValueError) as e:
+            logger.error(f"❌ Could not load movie quotes from {self.path}: {e}")
+            return False
+
+        with self._lock:
+            self._index = QuoteIndex(quotes)
+            self._bags = {}
+            self._mtime = mtime
+        logger.info(f"🎬 Loaded {len(quotes)} movie quotes")
+        return True
+
+    def _check_reload(self):
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.path.getmtime(self.path)
+            if mtime != self._mtime:
+                # Remember it even if invalid so a broken file is
+                # reported once, not on every check
+                self._mtime = mtime
+                self.reload()
+        except OSError:
+            pass
+
+    @property
+    def conditions(self) -> List[str]:
+        return sorted(self._index.by_condition)
+
+    def get_random_quote(
+        self, weather_condition: Optional[str] = None
+    ) -> MovieQuote:
+        """Get random movie quote for weather condition (None = any).
+
+        Raises ValueError for a condition without quotes.
+        """
+        self._check_reload()
+        with self._lock:
+            index = self._index
+            bag = self._bags.get(weather_condition)
+            if bag is None:
+                if weather_condition is None:
+                    indices = list(range(len(index.quotes)))
+                else:
+                    indices = index.by_condition.get(weather_condition)
+                if not indices:
+                    raise ValueError(
+                        f"No movie quotes for weather condition "
+                        f"'{weather_condition}'"
+                    )
+                bag = self._bags[weather_condition] = ShuffleBag(indices)
+            return index.quotes[bag.draw()]
+
+    def get_quotes_by_movie(self, movie: str) -> List[MovieQuote]:
+        self._check_reload()
+        index = self._index
+        return [
+            index.quotes[i] for i in index.by_movie.get(movie.casefold(), [])
+        ]
+
+    def get_quotes_by_decade(self, decade: int) -> List[MovieQuote]:
+        self._check_reload()
+        index = self._index
+        return [index.quotes[i] for i in index.by_decade.get(decade, [])]
+
+    def get_all_quotes(self) -> List[MovieQuote]:
+        """Get all quotes as flat list"""
+        self._check_reload()
+        return list(self._index.quotes)
+
+
+# Global quotes corpus
+_movie_quotes = None
+
+
+def get_movie_quotes() -> WeatherMovieQuotes:
+    """Return the shared corpus, loading it on first use"""
+    global _movie_quotes
+    if _movie_quotes is None:
+        _movie_quotes = WeatherMovieQuotes()
+    return _movie_quotes
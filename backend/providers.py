@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ProviderHealth:
+    healthy: Optional[bool] = None  # None until the first probe finishes
+    checked_at: Optional[float] = None
+    latency_ms: Optional[float] = None
+    error: Optional[str] = None
+
+
+class Provider:
+    """A lazily created client plus its cached health status"""
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        health_check: Optional[Callable[[Any], Dict[str, Any]]] = None,
+    ):
+        self.name = name
+        self.factory = factory
+        self.health_check = health_check
+        self.instance = None
+        self.init_error: Optional[str] = None
+        self.health = ProviderHealth()
+        self.lock = threading.Lock()
+
+
+class ProviderRegistry:
+    """Creates AI provider clients on first use and probes their health.
+
+    Nothing here touches the network at import or registration time:
+    clients are built on the first `get()`, and health checks run on a
+    background thread so a slow or offline upstream never delays startup.
+    """
+
+    def __init__(self, probe_interval: float = 60.0):
+        self.probe_interval = probe_interval
+        self._providers: Dict[str, Provider] = {}
+        self._probe_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def register(
+        self,
+        name: str,
+        factory: Callable[[], Any],
+        health_check: Optional[Callable[[Any], Dict[str, Any]]] = None,
+    ) -> None:
+        """Register a provider factory. `health_check(instance)` must be
+        cheap and return a dict with at least a `success` key."""
+        self._providers[name] = Provider(name, factory, health_check)
+
+    def get(self, name: str) -> Optional[Any]:
+        """Return the provider client, creating it on first use.
+
+        Returns None if the provider is unknown or failed to initialize.
+        """
+        provider = self._providers.get(name)
+        if not provider:
+            return None
+        if provider.instance is not None or provider.init_error:
+            return provider.instance
+
+        with provider.lock:
+            if provider.instance is None and not provider.init_error:
+                try:
+                    provider.instance = provider.factory()
+                    logger.info(f"✅ Provider '{name}' initialized")
+                except Exception as e:
+                    provider.init_error = str(e)
+                    provider.health = ProviderHealth(
+                        healthy=False, checked_at=time.time(), error=str(e)
+                    )
+                    logger.error(
+                        f"❌ Failed to initialize provider '{name}': {e}"
+                    )
+        return provider.instance
+
+    def probe(self, name: str) -> ProviderHealth:
+        """Run the provider's health check now and cache the result"""
+        provider = self._providers[name]
+        instance = self.get(name)
+        if instance is None:
+            return provider.health
+        if not provider.health_check:
+            provider.health = ProviderHealth(
+                healthy=True, checked_at=time.time()
+            )
+            return provider.health
+
+        started = time.time()
+        try:
+            result = provider.health_check(instance)
+            healthy = bool(result.get("success"))
+            error = None if healthy else str(result.get("error"))
+        except Exception as e:
+            healthy, error = False, str(e)
+
+        previous = provider.health.healthy
+        provider.health = ProviderHealth(
+            healthy=healthy,
+            checked_at=time.time(),
+            latency_ms=round((time.time() - started) * 1000, 1),
+            error=error,
+        )
+        if previous is not healthy:
+            if healthy:
+                logger.info(f"✅ Provider '{name}' is healthy")
+            else:
+                logger.warning(
+                    f"⚠️ Provider '{name}' is unhealthy: {error}"
+                )
+        return provider.health
+
+    def health(
+        self, name: str, max_age: Optional[float] = None
+    ) -> ProviderHealth:
+        """Cached health; re-probes synchronously if older than max_age"""
+        provider = self._providers[name]
+        checked_at = provider.health.checked_at
+        if max_age is not None and (
+            checked_at is None or time.time() - checked_at > max_age
+        ):
+            return self.probe(name)
+        return provider.health
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        """Cached health of every provider, without probing"""
+        return {
+            name: dict(
+                asdict(provider.health),
+                initialized=provider.instance is not None,
+            )
+            for name, provider in self._providers.items()
+        }
+
+    def start_health_probes(self) -> None:
+        """Probe all providers now and every `probe_interval` seconds"""
+        if self._probe_thread and self._probe_thread.is_alive():
+            return
+        self._stop.clear()
+        self._probe_thread = threading.Thread(
+            target=self._probe_loop, name="provider-health", daemon=True
+        )
+        self._probe_thread.start()
+
+    def stop_health_probes(self) -> None:
+        self._stop.set()
+
+    def _probe_loop(self):
+        while not self._stop.is_set():
+            for name in list(self._providers):
+                try:
+                    self.probe(name)
+                except Exception as e:
+                    logger.error(f"Health probe for '{name}' failed: {e}")
+            self._stop.wait(self.probe_interval)
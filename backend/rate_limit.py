@@ -0,0 +1,164 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+from .host_state import FileLock
+
+
+class QuotaExceeded(Exception):
+    """Raised instead of calling upstream when no quota is left"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QuotaGuard:
+    """Client-side OpenWeatherMap quota: per-minute bucket + daily cap.
+
+    The free tier allows 60 calls per minute and a fixed number per
+    day (reset at midnight UTC). `acquire()` waits up to `max_wait`
+    seconds for a minute token and otherwise raises `QuotaExceeded`,
+    so callers fall back to cached data instead of hitting the API.
+    With `path` the counters live in that file, shared by every worker
+    process on the host. `clock` and `sleep` are injectable so tests
+    need not wait.
+    """
+
+    def __init__(
+        self,
+        per_minute: int = 60,
+        per_day: int = 30000,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+        path: Optional[str] = None,
+    ):
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.rate = per_minute / 60  # minute tokens refilled per second
+        self.clock = clock
+        self.sleep = sleep
+        self.path = path
+        self._lock = threading.Lock()
+        self._local = self._new_state()
+        self.queued = 0
+        self.rejected = 0
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(timezone.utc).date().isoformat()
+
+    def _new_state(self) -> Dict[str, Any]:
+        return {
+            "tokens": float(self.per_minute),
+            "updated": self.clock(),
+            "day": self._today(),
+            "day_used": 0,
+        }
+
+    def _refill(self, state: Dict[str, Any]) -> None:
+        now = self.clock()
+        elapsed = max(0.0, now - state["updated"])
+        state["tokens"] = min(
+            self.per_minute, state["tokens"] + elapsed * self.rate
+        )
+        state["updated"] = now
+        today = self._today()
+        if state["day"] != today:
+            state["day"], state["day_used"] = today, 0
+
+    @contextmanager
+    def _state(self) -> Iterator[Dict[str, Any]]:
+        """Up-to-date counters, read and written back under a file lock"""
+        with self._lock:
+            if self.path is None:
+                self._refill(self._local)
+                yield self._local
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with FileLock(self.path):
+                try:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        state = json.load(f)
+                except (OSError, ValueError):
+                    state = self._new_state()
+                self._refill(state)
+                yield state
+                tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.path)
+
+    def _seconds_to_midnight(self) -> float:
+        now = datetime.now(timezone.utc)
+        midnight = datetime.combine(
+            now.date() + timedelta(days=1), datetime.min.time(), timezone.utc
+        )
+        return (midnight - now).total_seconds()
+
+    def _take(self) -> Optional[float]:
+        """0 if a call was taken, else seconds to wait; None if none today"""
+        with self._state() as state:
+            if state["day_used"] >= self.per_day:
+                return None
+            if state["tokens"] >= 1:
+                state["tokens"] -= 1
+                state["day_used"] += 1
+                return 0.0
+            return (1 - state["tokens"]) / self.rate
+
+    def remaining(self) -> int:
+        """Calls that could be made right now"""
+        with self._state() as state:
+            day = self.per_day - state["day_used"]
+            return max(0, min(day, int(state["tokens"])))
+
+    async def acquire(self, max_wait: float = 0) -> None:
+        deadline = self.clock() + max_wait
+        waited = False
+        while True:
+            wait = self._take()
+            if wait == 0:
+                return
+            if wait is None:
+                with self._lock:
+                    self.rejected += 1
+                raise QuotaExceeded(
+                    "Daily OpenWeatherMap quota exhausted",
+                    self._seconds_to_midnight(),
+                )
+            if self.clock() + wait > deadline:
+                with self._lock:
+                    self.rejected += 1
+                raise QuotaExceeded(
+                    "OpenWeatherMap per-minute quota exhausted", wait
+                )
+            if not waited:
+                waited = True
+                with self._lock:
+                    self.queued += 1
+            await self.sleep(wait)
+
+    def status(self) -> Dict[str, Any]:
+        with self._state() as state:
+            available = int(state["tokens"])
+            day_used = state["day_used"]
+        return {
+            "minute": {
+                "limit": self.per_minute,
+                "available": available,
+            },
+            "day": {
+                "limit": self.per_day,
+                "used": day_used,
+                "remaining": max(0, self.per_day - day_used),
+                "resets_in": round(self._seconds_to_midnight()),
+            },
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
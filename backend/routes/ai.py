@@ -1,181 +1,246 @@
-from flask import Blueprint, jsonify, request
-import subprocess
+from flask import Blueprint, request
 import os
-import shutil
-import json
+import subprocess
+
+from ..api import api_response, handle_errors
+from ..components.ai_tools.schema_validation import SchemaValidationError
+from ..components.ai_tools.tools_repository import get_tools_repository
+from ..config_service import get_config_service
+from ..model_store import get_model_store
+from ..services import get_providers
+
 ai_bp = Blueprint('ai', __name__)
 
-def get_ai_tools_config():
-    config_path = os.path.join(
-        os.path.dirname(__file__), "..", "..", "config", "ai_tools.json"
-    )
-    if os.path.exists(config_path):
-        with open(config_path, "r") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return {"version": "1.0.0", "tools": {}}
-    return {"version": "1.0.0", "tools": {}}
-
-
-def save_ai_tools_config(config):
-    config_path = os.path.join(
-        os.path.dirname(__file__), "..", "..", "config", "ai_tools.json"
-    )
-    os.makedirs(os.path.dirname(config_path), exist_ok=True)
-    with open(config_path, "w") as f:
-        json.dump(config, f, indent=4)
+MAX_TOOLS_PAGE = 500
+CHAT_NOT_INITIALIZED_ERROR = "AI Chat service not initialized"
+
+
+def parse_chat_message(data):
+    """Message of a chat request (shared with asgi.py), or an error"""
+    message = (data or {}).get("message", "")
+    if not message:
+        return "", "Message is required"
+    return message, None
+
+
+@ai_bp.route("/api/chat", methods=["POST"])
+@handle_errors
+def chat():
+    ai_chat_instance = get_providers().get("chat")
+    if not ai_chat_instance:
+        return api_response(
+            success=False, error=CHAT_NOT_INITIALIZED_ERROR, status_code=503
+        )
+
+    user_message, error = parse_chat_message(request.json)
+    if error:
+        return api_response(success=False, error=error, status_code=400)
+
+    response = ai_chat_instance.get_response(user_message)
+    return api_response(data={"response": response})
+
+
+@ai_bp.route("/api/config/ai", methods=["POST"])
+@handle_errors
+def save_ai_config():
+    config_data = request.json
+    if not config_data:
+        return api_response(
+            success=False,
+            error="No configuration data provided",
+            status_code=400,
+        )
+
+    try:
+        config = get_config_service().save(config_data)
+    except ValueError as e:
+        return api_response(success=False, error=str(e), status_code=400)
+
+    # AIChat reads the new snapshot on its next request, no restart needed
+    return api_response(data={
+        "message": "Configuration saved successfully",
+        "generation": config.generation,
+    })
 
 
 @ai_bp.route("/api/ai/list_models", methods=["GET"])
+@handle_errors
 def list_ai_models():
-    try:
-        # Placeholder for listing Ollama models
-        # In a real scenario, you'd run 'ollama list' and parse its output
-        ollama_models = ["llama2", "mistral", "codellama"]
-
-        # Placeholder for listing local models from a directory
-        # You would define a configurable path for local models
-        local_models_path = os.path.join(
-            os.path.dirname(__file__), "..", "..", "models"
+    """Ollama models plus local model files (metadata from GGUF headers)"""
+    local_models = get_model_store().index.list_models()
+
+    ai_chat_instance = get_providers().get("chat")
+    if ai_chat_instance:
+        test_result = ai_chat_instance.test_connection()
+    else:
+        test_result = {
+            "ollama": False, "models": [],
+            "error": "AI Chat service not initialized",
+        }
+    if not test_result["ollama"] and not local_models:
+        return api_response(
+            success=False, error=test_result["error"], status_code=503
         )
-        local_models = []
-        if os.path.exists(local_models_path):
-            for f in os.listdir(local_models_path):
-                if f.endswith((".bin", ".gguf")):
-                    local_models.append(f)
 
-        all_models = sorted(list(set(ollama_models + local_models)))
-        return jsonify({"models": all_models})
-    except Exception as e:
-        print(f"Error listing AI models: {e}")
-        return jsonify({"error": "Could not list AI models"}), 500
+    models = set(test_result["models"]) | {m["file"] for m in local_models}
+    return api_response(data={
+        "models": sorted(models),
+        "local_models": local_models,
+        "ollama_error": test_result["error"],
+    })
 
 
 @ai_bp.route("/api/ai/install_model", methods=["POST"])
+@handle_errors
 def install_ai_model():
-    try:
-        data = request.json
-        model_name = data.get("model_name")
-        if not model_name:
-            return jsonify({
-                "success": False, "error": "Model name not provided"
-            }), 400
-
-        # Check if it's an Ollama model or a local path
-        is_path = any(c in model_name for c in ["/", "\\", "."])
-        if is_path:  # Simple check for path/file
-            # Assume it's a local path, copy to the models directory
-            # NOTE: This is a simplified example.
-            source_path = model_name
-            destination_dir = os.path.join(
-                os.path.dirname(__file__), "..", "..", "models"
-            )
-            os.makedirs(destination_dir, exist_ok=True)
-            destination_path = os.path.join(
-                destination_dir, os.path.basename(source_path)
-            )
-            shutil.copy(source_path, destination_path)
-            return jsonify(
-                {
-                    "success": True,
-                    "message": f"Local model {model_name} installed."
-                }
-            )
-        else:
-            # Assume it's an Ollama model, run ollama pull
-            command = ["ollama", "pull", model_name]
-            process = subprocess.run(
-                command, capture_output=True, text=True, check=True
+    data = request.json
+    model_name = data.get("model_name")
+    if not model_name:
+        return api_response(
+            success=False, error="Model name not provided", status_code=400
+        )
+
+    if os.path.exists(model_name) or model_name.lower().endswith(".gguf"):
+        # Local file: linked when possible, otherwise copied in the
+        # background (poll /api/ai/install_model/<job_id> for progress)
+        try:
+            result = get_model_store().import_model(model_name)
+        except (FileNotFoundError, FileExistsError, ValueError) as e:
+            return api_response(success=False, error=str(e), status_code=400)
+        if result["status"] == "copying":
+            return api_response(
+                data={
+                    "message": f"Copying local model {model_name}...",
+                    "job": result["job"],
+                },
+                status_code=202,
             )
-            return jsonify({
-                "success": True, "message": process.stdout.strip()
-            })
+        return api_response(data={
+            "message": f"Local model {model_name} installed",
+            "method": result.get("method", result["status"]),
+        })
+
+    try:
+        # Try to install via Ollama
+        command = ["ollama", "pull", model_name]
+        subprocess.run(
+            command, capture_output=True, text=True, check=True
+        )
+        return api_response(
+            data={"message": f"Model {model_name} installed successfully"}
+        )
     except subprocess.CalledProcessError as e:
-        print(f"Error installing Ollama model: {e.stderr}")
-        return jsonify({"success": False, "error": e.stderr.strip()}), 500
-    except Exception as e:
-        print(f"Error installing AI model: {e}")
-        return jsonify({"success": False, "error": str(e)}), 500
+        return api_response(
+            success=False,
+            error=f"Failed to install model: {e.stderr}",
+            status_code=500,
+        )
+
+
+@ai_bp.route("/api/ai/install_model/<string:job_id>", methods=["GET"])
+@handle_errors
+def install_model_progress(job_id):
+    job = get_model_store().get_job(job_id)
+    if not job:
+        return api_response(
+            success=False, error="Job not found", status_code=404
+        )
+    return api_response(data={"job": job})
 
 
 @ai_bp.route("/api/ai_tools", methods=["GET"])
+@handle_errors
 def list_ai_tools():
+    """All tools, or a ranked page for ?q=&category=&tag=&limit=&offset="""
+    tools = get_tools_repository()
+    args = request.args
+    if not any(k in args for k in ("q", "category", "tag", "limit", "offset")):
+        return api_response(
+            data={"version": tools.version, "tools": tools.list()}
+        )
     try:
-        config = get_ai_tools_config()
-        return jsonify(config)
-    except Exception as e:
-        print(f"Error listing AI tools: {e}")
-        return jsonify({"error": "Could not list AI tools"}), 500
+        limit = max(1, min(int(args.get("limit", 50)), MAX_TOOLS_PAGE))
+        offset = max(int(args.get("offset", 0)), 0)
+    except ValueError:
+        return api_response(
+            success=False, error="limit and offset must be integers",
+            status_code=400,
+        )
+    total, page = tools.search(
+        args.get("q", ""), args.get("category"), args.get("tag"),
+        limit, offset,
+    )
+    return api_response(data={
+        "version": tools.version,
+        "tools": page,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+    })
 
 
 @ai_bp.route("/api/ai_tools", methods=["POST"])
+@handle_errors
 def add_ai_tool():
     try:
-        new_tool_data = request.json
-        config = get_ai_tools_config()
-
-        # Generate a simple unique ID from the name
-        tool_name = new_tool_data.get("name", "").lower().replace(" ", "_")
-        tool_id = tool_name
-        i = 1
-        while tool_id in config["tools"]:
-            tool_id = f"{tool_name}_{i}"
-            i += 1
-
-        config["tools"][tool_id] = new_tool_data
-        save_ai_tools_config(config)
-        return (
-            jsonify(
-                {
-                    "success": True,
-                    "message": "AI tool added successfully",
-                    "tool_id": tool_id,
-                }
-            ),
-            201,
+        tool = get_tools_repository().add(request.json)
+    except ValueError as e:
+        return api_response(success=False, error=str(e), status_code=400)
+    return api_response(
+        data={"message": "AI tool added successfully", "id": tool["id"]},
+        status_code=201,
+    )
+
+
+@ai_bp.route("/api/ai_tools/import", methods=["POST"])
+@handle_errors
+def import_ai_tools():
+    """Bulk add: {"tools": [...]} or a bare list, validated in one pass"""
+    payload = request.json
+    tools = payload.get("tools") if isinstance(payload, dict) else payload
+    try:
+        added = get_tools_repository().import_tools(tools)
+    except SchemaValidationError as e:
+        return api_response(
+            success=False, data={"errors": e.errors},
+            error=f"{len(e.errors)} invalid tool(s), nothing imported",
+            status_code=400,
         )
-    except Exception as e:
-        print(f"Error adding AI tool: {e}")
-        return jsonify({
-            "success": False, "error": "Could not add AI tool"
-        }), 500
+    except ValueError as e:
+        return api_response(success=False, error=str(e), status_code=400)
+    return api_response(
+        data={"message": f"Imported {len(added)} AI tools",
+              "ids": [tool["id"] for tool in added]},
+        status_code=201,
+    )
 
 
-@ai_bp.route("/api/ai_tools/<string:tool_id>", methods=["PUT"])
+@ai_bp.route("/api/ai_tools/<tool_id>", methods=["PUT"])
+@handle_errors
 def update_ai_tool(tool_id):
     try:
-        updated_tool = request.json
-        config = get_ai_tools_config()
-        if tool_id not in config["tools"]:
-            return jsonify({"success": False, "error": "Tool not found"}), 404
-        config["tools"][tool_id] = updated_tool
-        save_ai_tools_config(config)
-        return jsonify({
-            "success": True, "message": "AI tool updated successfully"
-        })
-    except Exception as e:
-        print(f"Error updating AI tool: {e}")
-        return jsonify({
-            "success": False, "error": "Could not update AI tool"
-        }), 500
+        tool = get_tools_repository().update(tool_id, request.json)
+    except ValueError as e:
+        return api_response(success=False, error=str(e), status_code=400)
+    if tool is None:
+        return api_response(
+            success=False, error="Tool not found", status_code=404
+        )
+    return api_response(data={"message": "AI tool updated successfully"})
 
 
-@ai_bp.route("/api/ai_tools/<string:tool_id>", methods=["DELETE"])
+@ai_bp.route("/api/ai_tools/<tool_id>", methods=["DELETE"])
+@handle_errors
 def delete_ai_tool(tool_id):
-    try:
-        config = get_ai_tools_config()
-        if tool_id not in config["tools"]:
-            return jsonify({"success": False, "error": "Tool not found"}), 404
-        del config["tools"][tool_id]
-        save_ai_tools_config(config)
-        return jsonify({
-            "success": True, "message": "AI tool deleted successfully"
-        })
-    except Exception as e:
-        print(f"Error deleting AI tool: {e}")
-        return jsonify({
-            "success": False, "error": "Could not delete AI tool"
-        }), 500
+    if not get_tools_repository().delete(tool_id):
+        return api_response(
+            success=False, error="Tool not found", status_code=404
+        )
+    return api_response(data={"message": "AI tool deleted successfully"})
 
 
+@ai_bp.route('/api/providers/health', methods=['GET'])
+@handle_errors
+def providers_health():
+    """Cached health status of all AI providers"""
+    return api_response(data=get_providers().status())
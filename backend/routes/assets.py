@@ -0,0 +1,71 @@
+from flask import Blueprint, abort, current_app, request, send_file, url_for
+import mimetypes
+import os
+from typing import Optional, Tuple
+
+from ..assets import ENCODINGS, get_asset_manifest
+
+# Fingerprinted assets built by backend/assets.py; the plain
+# /static/<name> URLs keep working for anything not in the manifest
+assets_bp = Blueprint('assets', __name__)
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def manifest():
+    return get_asset_manifest(current_app.config["ASSETS_DIR"])
+
+
+def negotiate(encodings) -> Optional[Tuple[str, str]]:
+    """Best prebuilt variant the client accepts (brotli before gzip)"""
+    accepted = request.accept_encodings
+    for encoding, suffix in ENCODINGS:
+        if encoding in encodings and accepted[encoding] > 0:
+            return encoding, suffix
+    return None
+
+
+@assets_bp.route("/assets/<path:filename>", methods=["GET"])
+def asset(filename):
+    """Hashed asset, cached by the browser for a year.
+
+    The body goes out through the server's `wsgi.file_wrapper`
+    (sendfile(2) under gunicorn), never through Python buffers.
+    """
+    entry = manifest().lookup(filename)
+    if entry is None:
+        abort(404)
+
+    path = os.path.join(manifest().static_dir, filename)
+    etag = entry["hash"]
+    variant = negotiate(entry["encodings"])
+    if variant:
+        path += variant[1]
+        etag += f"-{variant[0]}"
+
+    response = send_file(
+        path,
+        mimetype=mimetypes.guess_type(filename)[0]
+        or "application/octet-stream",
+        etag=etag,
+        max_age=IMMUTABLE_MAX_AGE,
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    response.vary.add("Accept-Encoding")
+    if variant:
+        response.headers["Content-Encoding"] = variant[0]
+    return response
+
+
+def asset_url(name: str) -> str:
+    """Hashed URL of a static file, or its plain URL if not built"""
+    return manifest().url(name) or url_for("static", filename=name)
+
+
+@assets_bp.app_context_processor
+def asset_helpers():
+    return {
+        "asset_url": asset_url,
+        "asset_import_map": lambda imports: manifest().import_map(imports),
+    }
@@ -0,0 +1,307 @@
+from flask import (
+    Blueprint,
+    Response,
+    jsonify,
+    request,
+    stream_with_context,
+)
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..api import api_response, handle_errors
+from ..components.ai_tools.usage_ledger import (
+    BUDGET_HARD,
+    BUDGET_SOFT,
+    get_usage_ledger,
+)
+from ..services import get_providers
+from ..startup import lazy_import
+
+logger = logging.getLogger(__name__)
+
+cloudflare_bp = Blueprint('cloudflare', __name__)
+
+DEFAULT_MODEL = "@cf/meta/llama-3.1-8b-instruct"
+MAX_BATCH_PROMPTS = 50
+NOT_CONFIGURED_ERROR = "Cloudflare Workers AI nie jest skonfigurowane"
+BUDGET_EXCEEDED_ERROR = "Przekroczono dzienny budżet Cloudflare Workers AI"
+PROMPT_REQUIRED_ERROR = "Prompt jest wymagany"
+PROMPTS_REQUIRED_ERROR = "Lista promptów jest wymagana"
+PROMPTS_TYPE_ERROR = "Pole prompts musi być listą tekstów"
+INTERNAL_ERROR = "Błąd wewnętrzny serwera"
+
+# (response body, status code) of a request that is turned down
+Rejection = Tuple[Dict[str, Any], int]
+
+
+# Request handling shared with the ASGI app (asgi.py); only the
+# upstream calls differ between the two serving modes
+
+def rejection(error: str, status_code: int) -> Rejection:
+    return {"success": False, "error": error}, status_code
+
+
+def parse_prompt(data: Optional[Dict]) -> Tuple[str, Optional[Rejection]]:
+    prompt = (data or {}).get('prompt', '')
+    if not isinstance(prompt, str) or not prompt.strip():
+        return "", rejection(PROMPT_REQUIRED_ERROR, 400)
+    return prompt.strip(), None
+
+
+def parse_prompts(
+    data: Optional[Dict],
+) -> Tuple[List[str], Optional[Rejection]]:
+    prompts = (data or {}).get('prompts', [])
+    if not isinstance(prompts, list) or not all(
+        isinstance(p, str) for p in prompts
+    ):
+        return [], rejection(PROMPTS_TYPE_ERROR, 400)
+    prompts = [p.strip() for p in prompts if p.strip()]
+    if not prompts:
+        return [], rejection(PROMPTS_REQUIRED_ERROR, 400)
+    if len(prompts) > MAX_BATCH_PROMPTS:
+        return [], rejection(f"Maksymalnie {MAX_BATCH_PROMPTS} promptów", 400)
+    return prompts, None
+
+
+def generation_options(data: Dict) -> Dict[str, Any]:
+    return {
+        "model": data.get('model', DEFAULT_MODEL),
+        "max_tokens": data.get('max_tokens', 512),
+        "temperature": data.get('temperature', 0.7),
+    }
+
+
+def check_budget() -> Tuple[str, Optional[Rejection]]:
+    """Budget state; over the hard limit the request is turned down"""
+    budget = get_usage_ledger().budget_state()
+    if budget == BUDGET_HARD:
+        return budget, rejection(BUDGET_EXCEEDED_ERROR, 429)
+    return budget, None
+
+
+def fallback_result(ai_chat_instance, response: str) -> Dict:
+    """Ollama's answer in the shape of a Cloudflare result"""
+    return {
+        "success": True,
+        "response": response,
+        "model": ai_chat_instance.config.ollama_model,
+        "usage": {},
+        "provider": "ollama",
+        "budget": BUDGET_SOFT
+    }
+
+
+def fallback_chunks(result: Dict) -> List[Dict]:
+    """Stream chunks of a fallback answer"""
+    return [{"response": result.get("response", "")}, dict(result, done=True)]
+
+
+def record_usage(results: List[Dict], caller: str) -> None:
+    ledger = get_usage_ledger()
+    for result in results:
+        if result.get("success"):
+            ledger.record(result["model"], result.get("usage"), caller)
+
+
+def sse_event(data: Dict, event: Optional[str] = None) -> str:
+    """Format one server-sent event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_chunk(chunk: Dict, model: str, caller: str) -> str:
+    """SSE for one stream chunk; the final one is billed in the ledger"""
+    if not chunk.get("done"):
+        return sse_event(chunk)
+    if chunk.get("provider") == "cloudflare":
+        get_usage_ledger().record(model, chunk.get("usage"), caller)
+    return sse_event(chunk, event="done")
+
+
+def caller_id() -> str:
+    """Who to bill a Cloudflare call to in the usage ledger"""
+    return request.headers.get("X-Caller") or request.remote_addr or ""
+
+
+def ollama_fallback(prompt: str) -> Dict:
+    """Answer with local Ollama once the soft budget is exceeded"""
+    ai_chat_instance = get_providers().get("chat")
+    if not ai_chat_instance:
+        return {"success": False, "error": BUDGET_EXCEEDED_ERROR}
+    return fallback_result(
+        ai_chat_instance, ai_chat_instance.get_ollama_response(prompt)
+    )
+
+
+def rejected(response: Rejection):
+    body, status_code = response
+    return jsonify(body), status_code
+
+
+@cloudflare_bp.route('/api/cloudflare-ai', methods=['POST'])
+def cloudflare_ai_endpoint():
+    """Endpoint dla Cloudflare Workers AI"""
+    cloudflare_ai = get_providers().get("cloudflare")
+    if not cloudflare_ai:
+        return rejected(rejection(NOT_CONFIGURED_ERROR, 503))
+
+    try:
+        data = request.get_json()
+        prompt, refusal = parse_prompt(data)
+        if refusal:
+            return rejected(refusal)
+        budget, refusal = check_budget()
+        if refusal:
+            return rejected(refusal)
+        if budget == BUDGET_SOFT:
+            return jsonify(ollama_fallback(prompt))
+
+        logger.info(f"Cloudflare AI request: {prompt[:100]}...")
+        result = cloudflare_ai.generate_text(
+            prompt=prompt, **generation_options(data)
+        )
+        record_usage([result], caller_id())
+        return jsonify(result)
+
+    except Exception as e:
+        logger.error(f"Cloudflare AI endpoint error: {e}")
+        return rejected(rejection(INTERNAL_ERROR, 500))
+
+
+@cloudflare_bp.route('/api/cloudflare-ai/stream', methods=['POST'])
+def cloudflare_ai_stream():
+    """Strumieniowanie odpowiedzi Cloudflare Workers AI (SSE)"""
+    cloudflare_ai = get_providers().get("cloudflare")
+    if not cloudflare_ai:
+        return rejected(rejection(NOT_CONFIGURED_ERROR, 503))
+
+    data = request.get_json(silent=True) or {}
+    prompt, refusal = parse_prompt(data)
+    if refusal:
+        return rejected(refusal)
+    budget, refusal = check_budget()
+    if refusal:
+        return rejected(refusal)
+
+    options = generation_options(data)
+    caller = caller_id()
+    if budget == BUDGET_SOFT:
+        chunks = iter(fallback_chunks(ollama_fallback(prompt)))
+    else:
+        chunks = cloudflare_ai.stream_text(prompt=prompt, **options)
+
+    def generate():
+        # When the browser disconnects the WSGI server closes this
+        # generator; closing `chunks` then drops the upstream connection
+        try:
+            for chunk in chunks:
+                yield sse_chunk(chunk, options["model"], caller)
+        except Exception as e:
+            logger.error(f"Cloudflare AI stream error: {e}")
+            yield sse_event({"error": str(e)}, event="error")
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@cloudflare_bp.route('/api/cloudflare-ai/batch', methods=['POST'])
+def cloudflare_ai_batch():
+    """Wiele promptów w jednym żądaniu, wykonywanych równolegle"""
+    cloudflare_ai = get_providers().get("cloudflare")
+    if not cloudflare_ai:
+        return rejected(rejection(NOT_CONFIGURED_ERROR, 503))
+
+    try:
+        data = request.get_json()
+        prompts, refusal = parse_prompts(data)
+        if refusal:
+            return rejected(refusal)
+        budget, refusal = check_budget()
+        if refusal:
+            return rejected(refusal)
+        if budget == BUDGET_SOFT:
+            results = [ollama_fallback(prompt) for prompt in prompts]
+            return jsonify({"success": True, "results": results})
+
+        logger.info(f"Cloudflare AI batch request: {len(prompts)} prompts")
+        # Runs on the shared event loop so the aiohttp session and the
+        # per-account semaphore are shared by every batch request
+        async_runner = lazy_import("..async_runner", __package__)
+        results = async_runner.get_async_runner().run(
+            cloudflare_ai.async_client().generate_many(
+                prompts, **generation_options(data)
+            )
+        )
+        record_usage(results, caller_id())
+        return jsonify({"success": True, "results": results})
+
+    except Exception as e:
+        logger.error(f"Cloudflare AI batch endpoint error: {e}")
+        return rejected(rejection(INTERNAL_ERROR, 500))
+
+
+@cloudflare_bp.route('/api/cloudflare-ai/usage', methods=['GET'])
+@handle_errors
+def cloudflare_usage():
+    """Zużycie tokenów Cloudflare Workers AI (agregaty dzienne)"""
+    days = min(max(request.args.get('days', 7, type=int), 1), 366)
+    return api_response(data=get_usage_ledger().summary(days))
+
+
+@cloudflare_bp.route('/api/cloudflare-ai/models', methods=['GET'])
+def cloudflare_models():
+    """Lista dostępnych modeli Cloudflare Workers AI"""
+    cloudflare_ai = get_providers().get("cloudflare")
+    if not cloudflare_ai:
+        return rejected(rejection(NOT_CONFIGURED_ERROR, 503))
+
+    try:
+        # ?task= filters by task type; ?task=all returns every model
+        task = request.args.get('task', 'Text Generation')
+        result = cloudflare_ai.list_available_models(
+            None if task == 'all' else task
+        )
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Cloudflare models endpoint error: {e}")
+        return rejected(rejection(INTERNAL_ERROR, 500))
+
+
+@cloudflare_bp.route('/api/cloudflare-ai/test', methods=['GET'])
+def cloudflare_test():
+    """Test połączenia z Cloudflare Workers AI"""
+    if not get_providers().get("cloudflare"):
+        return jsonify({
+            "success": False,
+            "message": NOT_CONFIGURED_ERROR
+        }), 503
+
+    try:
+        # Cached background probe result, refreshed if older than 30 s
+        health = get_providers().health("cloudflare", max_age=30)
+        if health.healthy:
+            message = "Połączenie z Cloudflare Workers AI działa poprawnie"
+        else:
+            message = (
+                f"Błąd połączenia z Cloudflare Workers AI: {health.error}"
+            )
+        return jsonify({
+            "success": bool(health.healthy),
+            "message": message,
+            "checked_at": health.checked_at,
+            "latency_ms": health.latency_ms,
+        })
+    except Exception as e:
+        logger.error(f"Cloudflare test endpoint error: {e}")
+        return jsonify({
+            "success": False,
+            "message": f"Błąd testu: {str(e)}"
+        }), 500
@@ -0,0 +1,27 @@
+from flask import Blueprint, make_response, render_template, request
+
+from ..api import api_response, handle_errors
+from ..startup import lazy_import
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+
+@dashboard_bp.route("/")
+def index():
+    response = make_response(render_template("dashboard.html"))
+    # Asset URLs change with their content, so the page itself is
+    # revalidated every time; an unchanged page is a 304
+    response.add_etag()
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+@dashboard_bp.route("/api/joke", methods=["GET"])
+@handle_errors
+def get_joke():
+    requests = lazy_import("requests")
+    headers = {"Accept": "application/json"}
+    response = requests.get("https://icanhazdadjoke.com/", headers=headers)
+    response.raise_for_status()
+    joke_data = response.json()
+    return api_response(data={"joke": joke_data["joke"]})
@@ -0,0 +1,121 @@
+from flask import Blueprint, abort, current_app, request
+import mmap
+import os
+
+from werkzeug.datastructures import ContentRange
+
+from ..api import api_response, handle_errors
+from ..glb_models import HASH_LENGTH, get_glb_manifest
+
+# 3D models for the 3D view: manifest plus Range-capable file serving
+glb_bp = Blueprint('glb', __name__)
+
+GLB_MIMETYPE = "model/gltf-binary"
+CHUNK_SIZE = 256 * 1024
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+class MmapBody:
+    """Fallback body for servers without wsgi.file_wrapper"""
+
+    def __init__(self, f, start: int, stop: int):
+        # The mapping stays valid after the file is closed
+        self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        f.close()
+        self.start = start
+        self.stop = stop
+
+    def __iter__(self):
+        for offset in range(self.start, self.stop, CHUNK_SIZE):
+            yield self.buf[offset:min(offset + CHUNK_SIZE, self.stop)]
+
+    def close(self):
+        self.buf.close()
+
+
+def send_model(path: str, size: int, etag: str, immutable: bool):
+    """Send a model file with ETag, If-None-Match and single Range support.
+
+    The file is positioned at the range start and handed to the
+    server's `wsgi.file_wrapper`, so gunicorn sends it with sendfile(2)
+    and both gunicorn and waitress stop at Content-Length.
+    """
+    response = current_app.response_class(mimetype=GLB_MIMETYPE)
+    response.set_etag(etag)
+    response.accept_ranges = "bytes"
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+
+    if request.if_none_match.contains_weak(etag):
+        response.status_code = 304
+        return response
+
+    start, stop = 0, size
+    ranges = request.range
+    if_range = request.if_range
+    if ranges is not None and (
+        if_range.etag is None and if_range.date is None
+        or if_range.etag == etag
+    ) and len(ranges.ranges) == 1:
+        bounds = ranges.range_for_length(size)
+        if bounds is None:
+            response.status_code = 416
+            response.content_range = ContentRange("bytes", None, None, size)
+            return response
+        start, stop = bounds
+        response.status_code = 206
+        response.content_range = ContentRange("bytes", start, stop, size)
+
+    f = open(path, "rb")
+    f.seek(start)
+    file_wrapper = request.environ.get("wsgi.file_wrapper")
+    if stop == start:
+        f.close()
+        response.set_data(b"")
+    elif file_wrapper is not None:
+        response.response = file_wrapper(f, CHUNK_SIZE)
+    else:
+        response.response = MmapBody(f, start, stop)
+    response.direct_passthrough = True
+    response.content_length = stop - start
+    return response
+
+
+@glb_bp.route("/api/3d/models", methods=["GET"])
+@handle_errors
+def glb_manifest():
+    """Modele 3D z rozmiarem, hashem, bbox i liczbą wierzchołków"""
+    response, status = api_response(
+        data={"models": get_glb_manifest().models()}
+    )
+    response.add_etag()
+    response.cache_control.no_cache = True
+    return response.make_conditional(request), status
+
+
+@glb_bp.route("/models/<digest>/<filename>", methods=["GET"])
+def glb_model_hashed(digest, filename):
+    """Content-addressed URL from the manifest, cached for good"""
+    entry = get_glb_manifest().index.get(filename)
+    if entry is None or entry["sha256"][:HASH_LENGTH] != digest:
+        abort(404)
+    return send_model(
+        os.path.join(get_glb_manifest().models_dir, filename),
+        entry["size"], entry["sha256"], immutable=True,
+    )
+
+
+@glb_bp.route("/models/<filename>", methods=["GET"])
+def glb_model(filename):
+    """Plain URL: revalidated with If-None-Match on every load"""
+    entry = get_glb_manifest().index.get(filename)
+    if entry is None:
+        abort(404)
+    return send_model(
+        os.path.join(get_glb_manifest().models_dir, filename),
+        entry["size"], entry["sha256"], immutable=False,
+    )
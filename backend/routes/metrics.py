@@ -0,0 +1,17 @@
+from flask import Blueprint, Response
+
+from ..metrics import get_shared_metrics, render
+
+# Prometheus scrape endpoint (all worker processes on this host)
+metrics_bp = Blueprint('metrics', __name__)
+
+PROMETHEUS_MIMETYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@metrics_bp.route('/metrics')
+def prometheus_metrics():
+    """Metryki w formacie tekstowym Prometheus"""
+    values, histograms = get_shared_metrics().collect()
+    response = Response(render(values, histograms), mimetype=PROMETHEUS_MIMETYPE)
+    response.headers["Cache-Control"] = "no-store"
+    return response
@@ -1,95 +1,128 @@
-from flask import Blueprint, jsonify
-import psutil
-import GPUtil
+from flask import Blueprint, current_app
+import os
 import platform
-import tempfile
 import shutil
-import os
+import tempfile
+
+from ..api import api_response, handle_errors
+from ..host_state import get_host_sampler, sample_host
+from ..metrics import upstream_span
+from ..startup import lazy_import
 
+# psutil, GPUtil and speedtest are imported by the first request that
+# needs them, not at startup
 system_bp = Blueprint('system', __name__)
 
+
 @system_bp.route("/api/system/resources", methods=["GET"])
+@handle_errors
 def system_resources():
-    try:
-        cpu_percent = psutil.cpu_percent(interval=0.5)
-        memory_percent = psutil.virtual_memory().percent
-        disk_path = os.path.splitdrive(os.getcwd())[0] + os.sep
-        disk_percent = psutil.disk_usage(disk_path).percent
-
-        gpus = GPUtil.getGPUs()
-        gpu_usage = gpus[0].load * 100 if gpus else 0
-        gpu_memory_percent = gpus[0].memoryUtil * 100 if gpus else 0
-
-        data = {
-            "cpu_percent": cpu_percent,
-            "memory_percent": memory_percent,
-            "disk_percent": disk_percent,
-            "gpu_usage": gpu_usage,
-            "gpu_memory_percent": gpu_memory_percent,
-            "timestamp": psutil.boot_time(),
-        }
-        return jsonify({"success": True, "data": data, "error": None})
-    except Exception as e:
-        print(f"Error fetching system resources: {e}")
-        return jsonify({
-            "success": False,
-            "data": None,
-            "error": "Could not fetch system resources"
-        }), 500
+    # Sampled once per host in the background (see host_state); sample
+    # here only when no fresh snapshot exists
+    data = get_host_sampler().latest()
+    if data is None:
+        data = sample_host(cpu_interval=0.5)
+    return api_response(data=data)
+
 
 @system_bp.route("/api/system/cleanup", methods=["POST"])
+@handle_errors
 def cleanup_system():
-    try:
-        temp_dir = tempfile.gettempdir()
-        for filename in os.listdir(temp_dir):
-            file_path = os.path.join(temp_dir, filename)
-            try:
-                if os.path.isfile(file_path) or os.path.islink(file_path):
-                    os.unlink(file_path)
-                elif os.path.isdir(file_path):
-                    shutil.rmtree(file_path)
-            except Exception as e:
-                print(f"Failed to delete {file_path}. Reason: {e}")
-        return jsonify({"message": "System cleanup successful"})
-    except Exception as e:
-        print(f"Error during system cleanup: {e}")
-        return jsonify({"error": "Could not perform system cleanup"}), 500
+    cleaned_files = 0
+    errors = []
+    temp_dir = tempfile.gettempdir()
+
+    for filename in os.listdir(temp_dir):
+        file_path = os.path.join(temp_dir, filename)
+        try:
+            if os.path.isfile(file_path) or os.path.islink(file_path):
+                os.unlink(file_path)
+                cleaned_files += 1
+            elif os.path.isdir(file_path):
+                shutil.rmtree(file_path)
+                cleaned_files += 1
+        except Exception as e:
+            errors.append(f"Failed to delete {file_path}: {str(e)}")
+
+    data = {
+        "cleaned_files": cleaned_files,
+        "errors": errors if errors else None,
+        "message": f"Cleaned {cleaned_files} files/folders",
+    }
+
+    return api_response(data=data)
+
+
+@system_bp.route("/api/network/stats", methods=["GET"])
+@handle_errors
+def network_stats():
+    speedtest = lazy_import("speedtest")
+    with upstream_span("speedtest", "best_server"):
+        s = speedtest.Speedtest()
+        s.get_best_server()
+
+    with upstream_span("speedtest", "download"):
+        download_speed = s.download() / 1024 / 1024  # Convert to Mbps
+    with upstream_span("speedtest", "upload"):
+        upload_speed = s.upload() / 1024 / 1024  # Convert to Mbps
+    ping_time = s.results.ping
+
+    data = {
+        "download": download_speed,
+        "upload": upload_speed,
+        "ping": ping_time,
+    }
+
+    return api_response(data=data)
+
 
 @system_bp.route("/api/system/processes", methods=["GET"])
+@handle_errors
 def system_processes():
-    try:
-        processes = []
-        proc_attrs = [
-            "pid", "name", "username", "cpu_percent", "memory_percent"
-        ]
-        for proc in psutil.process_iter(proc_attrs):
-            processes.append(proc.info)
-        # Sort by cpu_percent by default
-        processes = sorted(
-            processes, key=lambda p: p["cpu_percent"], reverse=True
-        )[:10]
-        return jsonify({"success": True, "data": processes, "error": None})
-    except Exception as e:
-        print(f"Error getting system processes: {e}")
-        return jsonify({
-            "success": False,
-            "data": None,
-            "error": "Could not get system processes"
-        }), 500
+    psutil = lazy_import("psutil")
+    processes = []
+    with upstream_span("psutil", "process_iter"):
+        proc_iter = psutil.process_iter(
+            ["pid", "name", "username", "cpu_percent", "memory_percent"]
+        )
+        for proc in proc_iter:
+            try:
+                pinfo = proc.info
+                pinfo["cpu_percent"] = round(pinfo["cpu_percent"], 1)
+                pinfo["memory_percent"] = round(pinfo["memory_percent"], 1)
+                processes.append(pinfo)
+            except (
+                psutil.NoSuchProcess,
+                psutil.AccessDenied,
+                psutil.ZombieProcess,
+            ):
+                continue
+
+    # Sort by CPU usage and get top 10
+    processes = sorted(
+        processes, key=lambda p: p["cpu_percent"], reverse=True
+    )[:10]
+    return api_response(data=processes)
+
 
 @system_bp.route("/api/system/info", methods=["GET"])
+@handle_errors
 def system_info():
-    try:
-        data = {
-            "hostname": platform.uname().node,
-            "os": platform.uname().system,
-            "uptime": psutil.boot_time(),
-        }
-        return jsonify({"success": True, "data": data, "error": None})
-    except Exception as e:
-        print(f"Error getting system info: {e}")
-        return jsonify({
-            "success": False,
-            "data": None,
-            "error": "Could not get system info"
-        }), 500
+    psutil = lazy_import("psutil")
+    uname = platform.uname()
+    data = {
+        "hostname": uname.node,
+        "os": f"{uname.system} {uname.release}",
+        "version": uname.version,
+        "machine": uname.machine,
+        "processor": uname.processor,
+        "uptime": psutil.boot_time(),
+    }
+    return api_response(data=data)
+
+
+@system_bp.route("/api/debug/startup", methods=["GET"])
+@handle_errors
+def startup_report():
+    """Startup phases and the modules deferred to first use"""
+    return api_response(data=current_app.extensions["startup"].to_dict())
@@ -1,45 +1,92 @@
-from flask import Blueprint, jsonify
-from ..weather_integration import get_weather, get_random_movie_quote
+from flask import Blueprint, jsonify, request
+
+from ..api import api_response, handle_errors
+from ..startup import lazy_import
 
 weather_bp = Blueprint('weather', __name__)
 
+
+def weather_service():
+    # aiohttp and the weather caches load on the first weather request
+    return lazy_import("..weather_integration", __package__)
+
+
+def parse_cities(cities, limit: int):
+    """City list of a batch request (shared with asgi.py), or an error"""
+    if isinstance(cities, str):
+        cities = cities.split(",")
+    if not isinstance(cities, list):
+        cities = []
+    cities = [c for c in cities if isinstance(c, str) and c.strip()]
+    if not cities:
+        return [], "No cities provided"
+    if len(cities) > limit:
+        return [], f"At most {limit} cities per request"
+    return cities, None
+
+
+@weather_bp.route("/api/weather", methods=["GET"])
 @weather_bp.route("/api/weather/<city>", methods=["GET"])
-def weather_endpoint(city):
+@handle_errors
+def weather(city=None):
     """
     Get weather data with movie quotes and graphics
+    (?include=uv,forecast adds UV index and a 24h forecast)
     """
-    try:
-        weather_data = get_weather(city)
-        return jsonify(weather_data)
-    except Exception as e:
-        return (
-            jsonify(
-                {
-                    "success": False,
-                    "error": f"Błąd pobierania danych pogodowych: {str(e)}",
-                }
-            ),
-            500,
-        )
+    service = weather_service()
+    target_city = city or request.args.get("city", "Warsaw")
+    include = service.parse_include(request.args.get("include"))
+    return jsonify(service.get_weather(target_city, include))
 
-@weather_bp.route("/api/weather/quote/<condition>", methods=["GET"])
-def movie_quote_endpoint(condition):
+
+@weather_bp.route("/api/weather/batch", methods=["GET", "POST"])
+@handle_errors
+def weather_batch():
     """
-    Get random movie quote for weather condition
+    Weather for many cities in one request (?cities=a,b,c or POST body)
     """
-    try:
-        quote_data = get_random_movie_quote(condition)
-        return jsonify({"success": True, "quote": quote_data})
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+    service = weather_service()
+    if request.method == "POST":
+        cities = (request.json or {}).get("cities", [])
+    else:
+        cities = request.args.get("cities", "")
+    cities, error = parse_cities(cities, service.MAX_BATCH_CITIES)
+    if error:
+        return api_response(success=False, error=error, status_code=400)
+    return api_response(data={"results": service.get_weather_batch(cities)})
+
+
+@weather_bp.route("/api/weather/stats", methods=["GET"])
+@handle_errors
+def weather_cache_stats():
+    """
+    Weather cache hit/miss counters
+    """
+    return api_response(data=weather_service().get_weather_cache_stats())
+
+
+@weather_bp.route("/api/weather/quota", methods=["GET"])
+@handle_errors
+def weather_quota():
+    """
+    Remaining OpenWeatherMap quota
+    """
+    return api_response(data=weather_service().get_weather_quota())
+
 
 @weather_bp.route("/api/weather/quote", methods=["GET"])
-def random_quote_endpoint():
+@weather_bp.route("/api/weather/quote/<condition>", methods=["GET"])
+@handle_errors
+def weather_quote(condition=None):
     """
-    Get completely random movie quote
+    Get random movie quote, optionally for a weather condition
     """
+    # Quotes come from a local file: no need to load the weather client
+    movie_quotes = lazy_import("..movie_quotes", __package__)
     try:
-        quote_data = get_random_movie_quote()
-        return jsonify({"success": True, "quote": quote_data})
-    except Exception as e:
-        return jsonify({"success": False, "error": str(e)}), 500
+        quote_data = (
+            movie_quotes.get_movie_quotes().get_random_quote(condition)
+        ).to_dict()
+    except ValueError as e:
+        return api_response(success=False, error=str(e), status_code=404)
+    return api_response(data={"quote": quote_data})
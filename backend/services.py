@@ -0,0 +1,56 @@
+import os
+import threading
+
+from .providers import ProviderRegistry
+
+
+def create_chat():
+    from .chatbot import AIChat
+    return AIChat()
+
+
+def create_cloudflare_ai():
+    from .components.ai_tools.cloudflare_ai import CloudflareAI
+
+    account_id = os.getenv("CLOUDFLARE_ACCOUNT_ID")
+    api_token = os.getenv("CLOUDFLARE_API_TOKEN")
+    if not account_id or not api_token:
+        raise ValueError(
+            "CLOUDFLARE_ACCOUNT_ID and CLOUDFLARE_API_TOKEN must be set"
+        )
+    client = CloudflareAI(
+        account_id,
+        api_token,
+        max_concurrency=int(os.getenv("CLOUDFLARE_MAX_CONCURRENCY", "4")),
+    )
+    # Serve the saved model catalog right away, revalidate it off-thread
+    if client.catalog.is_stale:
+        client.catalog.refresh_in_background()
+    return client
+
+
+# Global provider registry; clients (and ollama / requests / aiohttp) are
+# created on first use, health is probed in the background so that
+# startup never waits on Ollama or Cloudflare
+_providers = None
+_providers_lock = threading.Lock()
+
+
+def get_providers() -> ProviderRegistry:
+    global _providers
+    with _providers_lock:
+        if _providers is None:
+            _providers = ProviderRegistry(
+                probe_interval=float(
+                    os.getenv("PROVIDER_PROBE_INTERVAL", "60")
+                )
+            )
+            _providers.register(
+                "chat", create_chat,
+                health_check=lambda chat: chat.health_check()
+            )
+            _providers.register(
+                "cloudflare", create_cloudflare_ai,
+                health_check=lambda cf: cf.health_check()
+            )
+    return _providers
@@ -0,0 +1,239 @@
+"""Production serving: gunicorn (pre-fork), waitress or uvicorn (ASGI).
+
+In-flight requests, such as chat generations and SSE streams, are given
+`drain_timeout` to finish on shutdown.
+"""
+import json
+import logging
+import os
+import signal
+import threading
+import time
+import _thread
+from typing import Any, Callable, Dict, Iterable
+
+logger = logging.getLogger(__name__)
+
+DRAIN_TIMEOUT = 60.0  # longer than a slow LLM call
+FLUSH_GRACE = 1.0  # lets the server send the last responses' bytes
+
+SHUTTING_DOWN_BODY = json.dumps({
+    "success": False, "data": None, "error": "Server is shutting down",
+}).encode()
+
+
+class ClosingResult:
+    """Lightweight ClosingIterator: calls `callback` when the server closes it"""
+
+    __slots__ = ("result", "callback")
+
+    def __init__(self, result, callback: Callable[[], None]):
+        self.result = result
+        self.callback = callback
+
+    def __iter__(self):
+        return iter(self.result)
+
+    def close(self) -> None:
+        try:
+            close = getattr(self.result, "close", None)
+            if close is not None:
+                close()
+        finally:
+            self.callback()
+
+
+def on_close(environ, result, callback: Callable[[], None]):
+    """Call `callback` on close without hiding the server's file wrapper"""
+    # gunicorn and waitress only use sendfile for their own wrapper class,
+    # so a file response keeps its type and gets `close` chained in place
+    file_wrapper = environ.get("wsgi.file_wrapper")
+    if isinstance(file_wrapper, type) and isinstance(result, file_wrapper):
+        close = getattr(result, "close", None)
+
+        def chained_close():
+            try:
+                if close is not None:
+                    close()
+            finally:
+                callback()
+
+        result.close = chained_close
+        return result
+    return ClosingResult(result, callback)
+
+
+class InFlightTracker:
+    """WSGI middleware counting requests that have not finished yet.
+
+    A request counts until its response iterable is closed, so streamed
+    responses are covered too. After `drain()` starts, new requests get
+    a 503 with `Retry-After`.
+    """
+
+    def __init__(self, app: Callable):
+        self.app = app
+        self.in_flight = 0
+        self.draining = False
+        self._cond = threading.Condition()
+
+    def __call__(self, environ, start_response) -> Iterable[bytes]:
+        with self._cond:
+            if self.draining:
+                start_response("503 Service Unavailable", [
+                    ("Content-Type", "application/json"),
+                    ("Retry-After", "1"),
+                    ("Connection", "close"),
+                ])
+                return [SHUTTING_DOWN_BODY]
+            self.in_flight += 1
+        try:
+            result = self.app(environ, start_response)
+        except BaseException:
+            self._finished()
+            raise
+        return on_close(environ, result, self._finished)
+
+    def _finished(self) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def drain(self, timeout: float = DRAIN_TIMEOUT) -> bool:
+        """Refuse new requests and wait for running ones to finish"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self.draining = True
+            if self.in_flight:
+                logger.info(f"⏳ Draining {self.in_flight} in-flight requests")
+            while self.in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.warning(
+                        f"⚠️ Drain timed out, {self.in_flight} requests cut off"
+                    )
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+
+def build_app() -> InFlightTracker:
+    from .app import create_app
+    return InFlightTracker(create_app())
+
+
+def serve_waitress(
+    host: str, port: int, threads: int, drain_timeout: float = DRAIN_TIMEOUT
+) -> None:
+    """One process, `threads` worker threads (works on Windows)"""
+    import waitress
+
+    app = build_app()
+    server = waitress.create_server(app, host=host, port=port, threads=threads)
+
+    drained = threading.Event()
+
+    def shutdown():
+        app.drain(drain_timeout)
+        time.sleep(FLUSH_GRACE)
+        drained.set()
+        # Delivered to on_signal below in the main thread
+        _thread.interrupt_main()
+
+    def on_signal(signum, frame):
+        if drained.is_set():
+            # The main loop exits on KeyboardInterrupt and stops the threads
+            raise KeyboardInterrupt
+        if not app.draining:
+            logger.info("🛑 Shutting down, waiting for in-flight requests")
+            threading.Thread(target=shutdown, daemon=True).start()
+
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, on_signal)
+    logger.info(f"🚀 waitress on http://{host}:{port} ({threads} threads)")
+    server.run()
+
+
+def serve_gunicorn(
+    host: str,
+    port: int,
+    workers: int,
+    threads: int,
+    drain_timeout: float = DRAIN_TIMEOUT,
+) -> None:
+    """`workers` pre-forked processes with `threads` threads each.
+
+    The app is built after the fork, so every worker has its own
+    threads and connections; once-per-host jobs are shared through
+    `host_state`. On SIGTERM gunicorn stops accepting and waits up to
+    `graceful_timeout` for in-flight requests.
+    """
+    from gunicorn.app.base import BaseApplication
+
+    options: Dict[str, Any] = {
+        "bind": f"{host}:{port}",
+        "workers": workers,
+        "threads": threads,
+        "worker_class": "gthread",
+        "graceful_timeout": int(drain_timeout),
+        "preload_app": False,
+    }
+
+    class DashboardApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return build_app()
+
+    DashboardApplication().run()
+
+
+def serve_uvicorn(
+    host: str,
+    port: int,
+    workers: int,
+    drain_timeout: float = DRAIN_TIMEOUT,
+) -> None:
+    """The ASGI variant (`backend.asgi`): slow chat, Cloudflare and
+    weather calls wait on the event loop instead of holding threads"""
+    import uvicorn
+
+    uvicorn.run(
+        "backend.asgi:create_asgi_app",
+        factory=True,
+        host=host,
+        port=port,
+        workers=workers or 1,
+        timeout_graceful_shutdown=int(drain_timeout),
+    )
+
+
+def serve(
+    server: str = "auto",
+    host: str = "127.0.0.1",
+    port: int = 5080,
+    workers: int = 0,
+    threads: int = 8,
+    drain_timeout: float = DRAIN_TIMEOUT,
+) -> None:
+    """Serve with gunicorn where available (not on Windows), else waitress.
+
+    `uvicorn` has to be asked for explicitly.
+    """
+    if server == "auto":
+        try:
+            import gunicorn  # noqa: F401
+            server = "gunicorn" if os.name != "nt" else "waitress"
+        except ImportError:
+            server = "waitress"
+    if server == "gunicorn":
+        workers = workers or min((os.cpu_count() or 1) * 2 + 1, 8)
+        serve_gunicorn(host, port, workers, threads, drain_timeout)
+    elif server == "waitress":
+        serve_waitress(host, port, threads, drain_timeout)
+    elif server == "uvicorn":
+        serve_uvicorn(host, port, workers, drain_timeout)
+    else:
+        raise ValueError(f"Unknown server: {server}")
@@ -0,0 +1,96 @@
+import contextlib
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+# As close to process start as the backend package gets
+PROCESS_T0 = time.perf_counter()
+
+# Third-party modules kept off the startup path (imported by endpoints)
+HEAVY_MODULES = (
+    "aiohttp", "GPUtil", "ollama", "psutil", "requests", "speedtest"
+)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+class StartupReport:
+    """App startup time broken down into phases"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases: List[Dict[str, Any]] = []
+        self.ready_at: Optional[float] = None
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append({
+                "name": name,
+                "ms": _ms(time.perf_counter() - start),
+            })
+
+    def ready(self) -> None:
+        self.ready_at = time.perf_counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        ready_at = self.ready_at or time.perf_counter()
+        with _imports_lock:
+            deferred = list(_deferred_imports)
+        return {
+            "process_to_ready_ms": _ms(ready_at - PROCESS_T0),
+            "create_app_ms": _ms(ready_at - self.started),
+            "phases": module_phases.phases + self.phases,
+            "deferred_imports": deferred,
+            "heavy_modules_loaded": {
+                name: name in sys.modules for name in HEAVY_MODULES
+            },
+        }
+
+
+# Module-level imports of backend.app, timed once per process
+module_phases = StartupReport()
+
+_deferred_imports: List[Dict[str, Any]] = []
+_imports_lock = threading.Lock()
+
+
+def lazy_import(name: str, package: Optional[str] = None):
+    """Import a module on first use and log how long it took.
+
+    `name` may be relative to `package`, as in
+    `lazy_import("..weather_integration", __package__)`.
+    """
+    full_name = importlib.util.resolve_name(name, package)
+    module = sys.modules.get(full_name)
+    spec = getattr(module, "__spec__", None)
+    if module is not None and not getattr(spec, "_initializing", False):
+        return module
+
+    start = time.perf_counter()
+    module = importlib.import_module(full_name)
+    elapsed = time.perf_counter() - start
+
+    endpoint = None
+    try:
+        from flask import has_request_context, request
+        if has_request_context():
+            endpoint = request.endpoint
+    except ImportError:
+        pass
+    with _imports_lock:
+        if not any(i["module"] == full_name for i in _deferred_imports):
+            _deferred_imports.append({
+                "module": full_name,
+                "ms": _ms(elapsed),
+                "endpoint": endpoint,
+            })
+    return module
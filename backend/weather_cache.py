@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    __slots__ = ("value", "fetched_at", "expires_at")
+
+    def __init__(self, value: Any, fetched_at: float, expires_at: float):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+
+
+class AsyncTTLCache:
+    """Bounded TTL cache for coroutine results with stale-while-revalidate.
+
+    - fresh entry: returned immediately
+    - expired but within `stale_ttl`: returned immediately while one
+      background refresh runs for that key
+    - missing or too old: fetched; concurrent callers for the same key
+      share a single fetch
+    Least recently used entries are evicted beyond `maxsize`.
+    """
+
+    def __init__(
+        self, maxsize: int = 256, ttl: float = 300, stale_ttl: float = 600
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_errors = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """Entry for `key` (even if expired) without touching stats"""
+        return self._entries.get(key)
+
+    def set(
+        self, key: str, value: Any, ttl: Optional[float] = None,
+        fetched_at: Optional[float] = None
+    ) -> None:
+        fetched_at = fetched_at or time.time()
+        expires_at = fetched_at + (self.ttl if ttl is None else ttl)
+        self._entries[key] = CacheEntry(value, fetched_at, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        entry = self._entries.get(key)
+        now = time.time()
+        if entry is not None:
+            self._entries.move_to_end(key)
+            if now < entry.expires_at:
+                self.hits += 1
+                return entry.value
+            if now < entry.expires_at + self.stale_ttl:
+                self.stale_hits += 1
+                self.refresh(key, fetch, ttl)
+                return entry.value
+
+        self.misses += 1
+        return await self._fetch(key, fetch, ttl)
+
+    def refresh(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+    ) -> None:
+        """Start a background refresh of `key` unless one is running"""
+        if key in self._inflight:
+            return
+
+        async def run():
+            try:
+                await self._fetch(key, fetch, ttl)
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.warning(f"Background refresh of {key} failed: {e}")
+
+        task = asyncio.ensure_future(run())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[float],
+    ) -> Any:
+        # The fetch is owned by the cache, so a cancelled caller never
+        # cancels it for the others sharing it
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._store(key, fetch, ttl))
+            task.add_done_callback(self._fetched)
+            self._inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _store(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[float],
+    ) -> Any:
+        try:
+            value = await fetch()
+            self.set(key, value, ttl)
+            return value
+        finally:
+            del self._inflight[key]
+
+    @staticmethod
+    def _fetched(task: asyncio.Future) -> None:
+        # Mark retrieved so a failure nobody awaited is not logged
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refresh_errors": self.refresh_errors,
+            "hit_rate": round(
+                (self.hits + self.stale_hits) / lookups, 3
+            ) if lookups else None,
+        }
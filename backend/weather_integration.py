@@ -1,16 +1,30 @@
-import random
+import os
 import time
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 import asyncio
+import concurrent.futures
+import weakref
 import aiohttp
-import requests
-from functools import lru_cache
+from .async_runner import get_async_runner
+from .weather_cache import AsyncTTLCache
+from .weather_store import WeatherStore
+from .weather_prefetch import WeatherPrefetcher
+from .geocoding import CityResolver, fold_name
+from .host_state import default_state_dir, is_host_leader
+from .metrics import upstream_span
+from .rate_limit import QuotaGuard
+from .movie_quotes import get_movie_quotes
 
 logger = logging.getLogger(__name__)
 
+GROUP_LIMIT = 20  # max city ids per OpenWeatherMap /group call
+MAX_BATCH_CITIES = 50
+FORECAST_STEPS = 8  # 3-hour steps, i.e. the next 24 hours
+ENRICHMENTS = ("uv", "forecast")
+
 @dataclass
 class WeatherData:
     city: str
@@ -25,108 +39,67 @@ class WeatherData:
     description: str
     icon: str
     visibility: int
-    uv_index: float
+    uv_index: Optional[float]
     sunrise: int
     sunset: int
     timestamp: float
 
-@dataclass
-class MovieQuote:
-    quote: str
-    movie: str
-    character: str
-    year: int
-    weather_condition: str
-
-class WeatherMovieQuotes:
-    """Movie quotes collection organized by weather conditions"""
-    def __init__(self):
-        self.quotes = {
-            "sunny": [
-                MovieQuote(
-                    "Frankly, my dear, I don't give a damn!",
-                    "Gone with the Wind",
-                    "Rhett Butler",
-                    1939,
-                    "sunny",
-                ),
-                # ... (other sunny quotes)
-            ],
-            "cloudy": [
-                MovieQuote(
-                    "I'm gonna make him an offer he can't refuse.",
-                    "The Godfather",
-                    "Don Vito Corleone",
-                    1972,
-                    "cloudy",
-                ),
-                # ... (other cloudy quotes)
-            ],
-            "rainy": [
-                MovieQuote(
-                    "Singing in the rain, just singing in the rain!",
-                    "Singin' in the Rain",
-                    "Don Lockwood",
-                    1952,
-                    "rainy",
-                ),
-                # ... (other rainy quotes)
-            ],
-            "stormy": [
-                MovieQuote(
-                    "I am your father.",
-                    "Star Wars: Empire Strikes Back",
-                    "Darth Vader",
-                    1980,
-                    "stormy",
-                ),
-                # ... (other stormy quotes)
-            ],
-            "snowy": [
-                MovieQuote(
-                    "The cold never bothered me anyway.",
-                    "Frozen",
-                    "Elsa",
-                    2013,
-                    "snowy",
-                ),
-                # ... (other snowy quotes)
-            ],
-            "foggy": [
-                MovieQuote(
-                    "Elementary, my dear Watson.",
-                    "Sherlock Holmes",
-                    "Sherlock Holmes",
-                    1939,
-                    "foggy",
-                ),
-                # ... (other foggy quotes)
-            ],
-        }
-
-    def get_random_quote(self, weather_condition: Optional[str] = None) -> MovieQuote:
-        """Get random movie quote for weather condition"""
-        condition_quotes = self.quotes.get(weather_condition, self.quotes["sunny"]) if weather_condition else [
-            quote for quotes in self.quotes.values() for quote in quotes
-        ]
-        return random.choice(condition_quotes)
-
-    def get_all_quotes(self) -> List[MovieQuote]:
-        """Get all quotes as flat list"""
-        return [quote for quotes in self.quotes.values() for quote in quotes]
+def owm_quota(path: Optional[str] = None) -> QuotaGuard:
+    """Quota from OWM_CALLS_PER_MINUTE/_PER_DAY; host-wide with `path`"""
+    return QuotaGuard(
+        per_minute=int(os.getenv("OWM_CALLS_PER_MINUTE", "60")),
+        per_day=int(os.getenv("OWM_CALLS_PER_DAY", "30000")),
+        path=path,
+    )
 
 class WeatherAPI:
     """Enhanced weather service with graphics and movie quotes"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self, api_key: Optional[str] = None,
+        store: Optional[WeatherStore] = None,
+        resolver: Optional[CityResolver] = None,
+        quota: Optional[QuotaGuard] = None,
+    ):
         self.api_key = api_key or os.getenv('WEATHER_API_KEY')
         if not self.api_key:
             raise ValueError("OpenWeatherMap API key is required")
             
         self.base_url = "http://api.openweathermap.org/data/2.5"
-        self.cache = {}
+        self.geo_url = "http://api.openweathermap.org/geo/1.0"
+        self.onecall_url = "https://api.openweathermap.org/data/3.0"
         self.cache_duration = 300  # 5 minutes
-        self.movie_quotes = WeatherMovieQuotes()
+        # Serve up to 10 minutes past expiry while refreshing in background
+        self.cache = AsyncTTLCache(
+            maxsize=256, ttl=self.cache_duration, stale_ttl=600
+        )
+        # Optional enrichments change more slowly than current conditions
+        self.uv_cache = AsyncTTLCache(maxsize=256, ttl=3600, stale_ttl=3600)
+        self.forecast_cache = AsyncTTLCache(
+            maxsize=256, ttl=1800, stale_ttl=1800
+        )
+        # One Call 3.0 needs a separate subscription; pause UV on 401
+        self.uv_disabled_until = 0.0
+        self.request_timeout = 15  # seconds, for sync callers
+        # Every upstream call takes a token; waits at most quota_wait
+        # seconds, then callers get cached/stale data instead
+        self.quota = quota or owm_quota()
+        self.quota_wait = 2.0
+        self.batch_concurrency = 8
+        # cache key -> OpenWeatherMap city id, learned from responses
+        self.city_ids: Dict[str, int] = {}
+        # Sessions for event loops other than the shared runner (e.g. ASGI)
+        self._loop_sessions = weakref.WeakKeyDictionary()
+        self.movie_quotes = get_movie_quotes()
+        # Optional disk tier: survives restarts, serves the last real
+        # observation when OpenWeatherMap is unreachable
+        self.store = store
+        # Optional geocoding: aliases of a city share one canonical key
+        self.resolver = resolver
+        if resolver is not None:
+            for key, location in resolver.locations.items():
+                if location.city_id:
+                    self.city_ids[key] = location.city_id
 
         # Weather condition mapping for graphics
         self.weather_graphics = {
@@ -188,6 +161,30 @@ class WeatherAPI:
             },
         }
 
+        if self.store is not None:
+            self.warm_cache()
+
+    def warm_cache(self) -> int:
+        """Load recent observations from the store into the memory cache"""
+        max_age = self.cache.ttl + self.cache.stale_ttl
+        try:
+            rows = self.store.load_recent(max_age)
+        except Exception as e:
+            logger.warning(f"⚠️ Weather store warm-up failed: {e}")
+            return 0
+        for key, data, fetched_at in rows:
+            try:
+                self.cache.set(
+                    key, self.parse_weather(data, fetched_at),
+                    fetched_at=fetched_at
+                )
+            except (KeyError, IndexError, TypeError):
+                continue
+            if data.get("id"):
+                self.city_ids[key] = data["id"]
+        logger.info(f"🌤️ Weather cache warmed with {len(rows)} observations")
+        return len(rows)
+
     def get_weather_condition(self, weather_main: str) -> str:
         """Map OpenWeather condition to our graphics system"""
         return weather_main.lower()
@@ -196,111 +193,418 @@ class WeatherAPI:
         """Get graphics data for weather condition"""
         return self.weather_graphics.get(condition, self.weather_graphics["clear"])
 
-    @lru_cache(maxsize=32)
-    async def get_weather_data_async(self, city: str) -> Dict:
-        """Get weather data with movie quotes and graphics (async)"""
+    def get_session(self) -> aiohttp.ClientSession:
+        """Long-lived HTTP session for the current event loop"""
+        runner = get_async_runner()
+        if runner.in_loop_thread():
+            return runner.session
+        loop = asyncio.get_running_loop()
+        session = self._loop_sessions.get(loop)
+        if session is None or session.closed:
+            session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+            self._loop_sessions[loop] = session
+        return session
+
+    @staticmethod
+    def cache_key(city: str) -> str:
+        return fold_name(city)
+
+    def key_for(self, city: str) -> str:
+        """Cache key for a city: canonical if already resolved"""
+        if self.resolver is not None:
+            location = self.resolver.lookup(city)
+            if location is not None:
+                return location.key
+        return self.cache_key(city)
+
+    async def locate(self, city: str) -> Tuple[str, Dict]:
+        """Cache key and /weather query parameters for a city name.
+
+        Resolved cities are queried by coordinates; if geocoding is off
+        or fails, the name itself is used.
+        """
+        if self.resolver is not None:
+            try:
+                location = await self.resolver.resolve(city, self.geocode)
+            except Exception as e:
+                logger.warning(f"⚠️ Geocoding {city} failed: {e}")
+                location = None
+            if location is not None:
+                return location.key, {"lat": location.lat, "lon": location.lon}
+        return self.cache_key(city), {"q": city}
+
+    async def geocode(self, city: str) -> List[Dict]:
+        """OpenWeatherMap direct geocoding (best match only)"""
+        return await self.request(
+            "direct", {"q": city, "limit": 1}, base_url=self.geo_url
+        )
+
+    async def request(
+        self, endpoint: str, params: Dict, base_url: Optional[str] = None
+    ) -> Dict:
+        """GET an OpenWeatherMap endpoint and return the JSON body"""
+        await self.quota.acquire(self.quota_wait)
+        url = f"{base_url or self.base_url}/{endpoint}"
+        params = dict(params, appid=self.api_key, units="metric", lang="pl")
+        with upstream_span("openweathermap", endpoint):
+            async with self.get_session().get(url, params=params) as response:
+                if response.status != 200:
+                    error_data = await response.text()
+                    raise Exception(
+                        f"API Error {response.status}: {error_data}"
+                    )
+                return await response.json()
+
+    async def fetch_weather(self, city: str) -> Dict:
+        """Fetch current weather from OpenWeatherMap (no cache, no quote)"""
+        key, query = await self.locate(city)
+        shared = await self.shared_observation(key)
+        if shared is not None:
+            return shared
+        data = await self.request("weather", query)
+        # Remember the city id so batch requests can use /group
+        self.city_ids[key] = data["id"]
+        if self.resolver is not None:
+            self.resolver.remember_city_id(key, data["id"])
+        if self.store is not None:
+            self.store.save(key, data)
+        logger.info(f"✅ Weather data for {city} fetched successfully")
+        return self.parse_weather(data)
+
+    async def shared_observation(self, key: str) -> Optional[Dict]:
+        """A fresh observation stored by another worker process.
+
+        The memory cache gives whatever it gets a full TTL, so only
+        observations younger than half the TTL are reused.
+        """
+        if self.store is None:
+            return None
+        try:
+            # SQLite would block the event loop
+            row = await asyncio.get_running_loop().run_in_executor(
+                None, self.store.load, key
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Weather store read failed: {e}")
+            return None
+        if row is None or time.time() - row[1] > self.cache.ttl / 2:
+            return None
+        data, fetched_at = row
+        if data.get("id"):
+            self.city_ids[key] = data["id"]
+        return self.parse_weather(data, fetched_at)
+
+    async def fetch_group(self, city_ids: List[int]) -> Dict[int, Dict]:
+        """Raw responses for up to GROUP_LIMIT city ids, in one API call"""
+        data = await self.request(
+            "group", {"id": ",".join(str(i) for i in city_ids)}
+        )
+        return {item["id"]: item for item in data["list"]}
+
+    async def fetch_uv(self, lat: float, lon: float) -> Optional[float]:
+        """Current UV index from One Call 3.0 (None if not subscribed)"""
+        if time.time() < self.uv_disabled_until:
+            return None
         try:
-            # Check cache first
-            cache_key = f"{city}_{int(time.time() / self.cache_duration)}"
-            if cache_key in self.cache:
-                logger.info(f"🚀 Weather data for {city} loaded from cache")
-                return self.cache[cache_key]
-
-            # Make API request
-            url = f"{self.base_url}/weather"
-            params = {
-                "q": city,
-                "appid": self.api_key,
-                "units": "metric",
-                "lang": "pl"
+            data = await self.request(
+                "onecall",
+                {
+                    "lat": lat,
+                    "lon": lon,
+                    "exclude": "minutely,hourly,daily,alerts",
+                },
+                base_url=self.onecall_url,
+            )
+        except Exception as e:
+            if "API Error 401" in str(e):
+                logger.warning("⚠️ UV index unavailable for this API key")
+                self.uv_disabled_until = time.time() + 3600
+                return None
+            raise
+        return data.get("current", {}).get("uvi")
+
+    async def fetch_forecast(self, query: Dict) -> List[Dict]:
+        """Next FORECAST_STEPS 3-hour forecast steps"""
+        data = await self.request(
+            "forecast", dict(query, cnt=FORECAST_STEPS)
+        )
+        return [
+            {
+                "time": datetime.fromtimestamp(item["dt"]).strftime("%H:%M"),
+                "timestamp": item["dt"],
+                "temperature": round(item["main"]["temp"], 1),
+                "condition": item["weather"][0]["main"],
+                "description": item["weather"][0]["description"].title(),
+                "icon": self.get_weather_graphics(
+                    self.get_weather_condition(item["weather"][0]["main"])
+                )["icon"],
+                "precipitation_chance": round(item.get("pop", 0) * 100),
             }
+            for item in data["list"]
+        ]
 
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-
-                        # Parse weather data
-                        weather_data = WeatherData(
-                            city=data["name"],
-                            country=data["sys"]["country"],
-                            temperature=data["main"]["temp"],
-                            feels_like=data["main"]["feels_like"],
-                            humidity=data["main"]["humidity"],
-                            pressure=data["main"]["pressure"],
-                            wind_speed=data["wind"]["speed"],
-                            wind_direction=data["wind"].get("deg", 0),
-                            condition=data["weather"][0]["main"],
-                            description=data["weather"][0]["description"],
-                            icon=data["weather"][0]["icon"],
-                            visibility=data.get("visibility", 0),
-                            uv_index=0,  # Requires additional API call
-                            sunrise=data["sys"]["sunrise"],
-                            sunset=data["sys"]["sunset"],
-                            timestamp=time.time(),
-                        )
-
-                        # Get graphics and quote
-                        condition = self.get_weather_condition(weather_data.condition)
-                        graphics = self.get_weather_graphics(condition)
-                        quote = self.movie_quotes.get_random_quote(graphics["condition"])
-
-                        # Build response
-                        result = {
-                            "success": True,
-                            "weather": {
-                                "city": weather_data.city,
-                                "country": weather_data.country,
-                                "temperature": round(weather_data.temperature, 1),
-                                "feels_like": round(weather_data.feels_like, 1),
-                                "humidity": weather_data.humidity,
-                                "pressure": weather_data.pressure,
-                                "wind_speed": weather_data.wind_speed,
-                                "wind_direction": weather_data.wind_direction,
-                                "condition": weather_data.condition,
-                                "description": weather_data.description.title(),
-                                "visibility": weather_data.visibility,
-                                "sunrise": datetime.fromtimestamp(weather_data.sunrise).strftime("%H:%M"),
-                                "sunset": datetime.fromtimestamp(weather_data.sunset).strftime("%H:%M"),
-                                "timestamp": weather_data.timestamp,
-                            },
-                            "graphics": {
-                                "icon": graphics["icon"],
-                                "color": graphics["color"],
-                                "gradient": graphics["gradient"],
-                                "animation": graphics["animation"],
-                                "condition": graphics["condition"],
-                            },
-                            "movie_quote": {
-                                "quote": quote.quote,
-                                "movie": quote.movie,
-                                "character": quote.character,
-                                "year": quote.year,
-                            },
-                        }
+    async def enrich(
+        self, key: str, query: Dict, include: List[str]
+    ) -> Dict:
+        """UV and/or forecast for a location, each from its own cache"""
+        parts = {}
+        if "uv" in include and "lat" in query:
+            parts["uv_index"] = self.uv_cache.get_or_fetch(
+                key, lambda: self.fetch_uv(query["lat"], query["lon"])
+            )
+        if "forecast" in include:
+            parts["forecast"] = self.forecast_cache.get_or_fetch(
+                key, lambda: self.fetch_forecast(query)
+            )
+        values = await asyncio.gather(
+            *parts.values(), return_exceptions=True
+        )
+        enrichment = {}
+        for name, value in zip(parts, values):
+            if isinstance(value, Exception):
+                logger.warning(f"⚠️ Weather {name} for {key} failed: {value}")
+                value = None
+            enrichment[name] = value
+        return enrichment
 
-                        # Cache the result
-                        self.cache[cache_key] = result
-                        logger.info(f"✅ Weather data for {city} fetched successfully")
+    def parse_weather(
+        self, data: Dict, fetched_at: Optional[float] = None
+    ) -> Dict:
+        """Build the cacheable payload from an OpenWeatherMap response"""
+        weather_data = WeatherData(
+            city=data["name"],
+            country=data["sys"]["country"],
+            temperature=data["main"]["temp"],
+            feels_like=data["main"]["feels_like"],
+            humidity=data["main"]["humidity"],
+            pressure=data["main"]["pressure"],
+            wind_speed=data["wind"]["speed"],
+            wind_direction=data["wind"].get("deg", 0),
+            condition=data["weather"][0]["main"],
+            description=data["weather"][0]["description"],
+            icon=data["weather"][0]["icon"],
+            visibility=data.get("visibility", 0),
+            uv_index=None,  # from the One Call API, only with ?include=uv
+            sunrise=data["sys"]["sunrise"],
+            sunset=data["sys"]["sunset"],
+            timestamp=fetched_at or time.time(),
+        )
 
-                        return result
-                    else:
-                        error_data = await response.text()
-                        raise Exception(f"API Error {response.status}: {error_data}")
+        condition = self.get_weather_condition(weather_data.condition)
+        graphics = self.get_weather_graphics(condition)
+
+        return {
+            "success": True,
+            "weather": {
+                "city": weather_data.city,
+                "country": weather_data.country,
+                "temperature": round(weather_data.temperature, 1),
+                "feels_like": round(weather_data.feels_like, 1),
+                "humidity": weather_data.humidity,
+                "pressure": weather_data.pressure,
+                "wind_speed": weather_data.wind_speed,
+                "wind_direction": weather_data.wind_direction,
+                "condition": weather_data.condition,
+                "description": weather_data.description.title(),
+                "visibility": weather_data.visibility,
+                "sunrise": datetime.fromtimestamp(weather_data.sunrise).strftime("%H:%M"),
+                "sunset": datetime.fromtimestamp(weather_data.sunset).strftime("%H:%M"),
+                "timestamp": weather_data.timestamp,
+            },
+            "graphics": {
+                "icon": graphics["icon"],
+                "color": graphics["color"],
+                "gradient": graphics["gradient"],
+                "animation": graphics["animation"],
+                "condition": graphics["condition"],
+            },
+        }
+
+    def with_quote(self, payload: Dict) -> Dict:
+        """Copy of a cached payload with a fresh movie quote"""
+        condition = payload["graphics"]["condition"]
+        try:
+            quote = self.movie_quotes.get_random_quote(condition)
+        except ValueError:
+            logger.warning(f"⚠️ No movie quotes for '{condition}'")
+            quote = self.movie_quotes.get_random_quote()
+        return dict(
+            payload,
+            movie_quote={
+                "quote": quote.quote,
+                "movie": quote.movie,
+                "character": quote.character,
+                "year": quote.year,
+            },
+        )
+
+    def last_known(self, city: str, error: str) -> Optional[Dict]:
+        """Last real observation for a city, marked stale, or None"""
+        key = self.key_for(city)
+        entry = self.cache.peek(key)
+        if entry is not None:
+            payload, fetched_at = entry.value, entry.fetched_at
+        elif self.store is not None:
+            try:
+                row = self.store.load(key)
+                if row is None:
+                    return None
+                payload = self.parse_weather(row[0], row[1])
+                fetched_at = row[1]
+            except Exception as e:
+                logger.warning(f"⚠️ Weather store read failed: {e}")
+                return None
+        else:
+            return None
+        return dict(
+            self.with_quote(payload),
+            stale=True,
+            observed_at=fetched_at,
+            error=error,
+        )
 
+    async def get_weather_data_async(
+        self, city: str, include: Optional[List[str]] = None
+    ) -> Dict:
+        """Get weather data with movie quotes and graphics (async).
+
+        `include` may ask for "uv" and/or "forecast"; they are fetched
+        concurrently with current conditions and cached separately (UV
+        hourly, forecast every 30 minutes). UV needs coordinates, so it
+        is only available for geocoded cities.
+        """
+        try:
+            key, query = await self.locate(city)
+            current = self.cache.get_or_fetch(
+                key, lambda: self.fetch_weather(city)
+            )
+            if not include:
+                return self.with_quote(await current)
+            payload, enrichment = await asyncio.gather(
+                current, self.enrich(key, query, include)
+            )
+            payload = dict(payload, weather=dict(payload["weather"]))
+            if "uv_index" in enrichment:
+                payload["weather"]["uv_index"] = enrichment["uv_index"]
+            if "forecast" in enrichment:
+                payload["forecast"] = enrichment["forecast"]
+            return self.with_quote(payload)
         except Exception as e:
             logger.error(f"❌ Weather API error: {e}")
-            return self.get_fallback_weather(city, str(e))
+            return (
+                self.last_known(city, str(e))
+                or self.get_fallback_weather(city, str(e))
+            )
+
+    async def get_weather_batch_async(
+        self, cities: List[str], concurrency: Optional[int] = None
+    ) -> Dict[str, Dict]:
+        """Weather for many cities at once, keyed by the requested name.
+
+        Cached cities are answered straight from the cache. Missing
+        cities with a known city id are fetched together through the
+        /group endpoint (GROUP_LIMIT ids per call); the rest are fetched
+        concurrently, at most `concurrency` at a time. A failing city
+        gets its own error entry and does not fail the batch.
+        """
+        cities = list(dict.fromkeys(c.strip() for c in cities if c.strip()))
+        # Never run more upstream calls at once than the quota allows
+        semaphore = asyncio.Semaphore(max(1, min(
+            concurrency or self.batch_concurrency, self.quota.remaining()
+        )))
+
+        async def locate(city: str) -> str:
+            async with semaphore:
+                return (await self.locate(city))[0]
+
+        keys = dict(zip(
+            cities, await asyncio.gather(*(locate(c) for c in cities))
+        ))
+        now = time.time()
 
-    def get_weather_data_sync(self, city: str) -> Dict:
-        """Synchronous wrapper for weather data"""
+        grouped: Dict[int, List[str]] = {}
+        single: List[str] = []
+        for city in cities:
+            key = keys[city]
+            entry = self.cache.peek(key)
+            if entry and now < entry.expires_at + self.cache.stale_ttl:
+                single.append(city)  # served from cache, no upstream call
+            elif key in self.city_ids:
+                grouped.setdefault(self.city_ids[key], []).append(city)
+            else:
+                single.append(city)
+
+        results: Dict[str, Dict] = {}
+
+        async def fetch_one(city: str):
+            async with semaphore:
+                try:
+                    payload = await self.cache.get_or_fetch(
+                        keys[city], lambda: self.fetch_weather(city)
+                    )
+                    results[city] = self.with_quote(payload)
+                except Exception as e:
+                    results[city] = self.last_known(city, str(e)) or {
+                        "success": False, "error": str(e)
+                    }
+
+        async def fetch_ids(ids: List[int]):
+            async with semaphore:
+                try:
+                    raw = await self.fetch_group(ids)
+                except Exception as e:
+                    raw, error = {}, str(e)
+                else:
+                    error = "City missing from group response"
+            for city_id in ids:
+                for city in grouped[city_id]:
+                    key = keys[city]
+                    if city_id in raw:
+                        payload = self.parse_weather(raw[city_id])
+                        self.cache.set(key, payload)
+                        if self.store is not None:
+                            self.store.save(key, raw[city_id])
+                        results[city] = self.with_quote(payload)
+                    else:
+                        results[city] = self.last_known(city, error) or {
+                            "success": False, "error": error
+                        }
+
+        ids = list(grouped)
+        await asyncio.gather(
+            *(fetch_one(city) for city in single),
+            *(
+                fetch_ids(ids[i:i + GROUP_LIMIT])
+                for i in range(0, len(ids), GROUP_LIMIT)
+            ),
+        )
+        return {city: results[city] for city in cities}
+
+    def get_weather_data_sync(
+        self, city: str, include: Optional[List[str]] = None
+    ) -> Dict:
+        """Synchronous wrapper for weather data.
+
+        Runs on the shared background event loop, so any number of worker
+        threads can call this and reuse the same pooled connections.
+        """
         try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+            return get_async_runner().run(
+                self.get_weather_data_async(city, include),
+                timeout=self.request_timeout,
+            )
+        except concurrent.futures.TimeoutError:
+            return self.timed_out(city)
 
-        return loop.run_until_complete(self.get_weather_data_async(city))
+    def timed_out(self, city: str) -> Dict:
+        """Answer for a request that did not finish in request_timeout"""
+        logger.error(f"❌ Weather request for {city} timed out")
+        return (
+            self.last_known(city, "Request timeout")
+            or self.get_fallback_weather(city, "Request timeout")
+        )
 
     def get_fallback_weather(self, city: str, error: str) -> Dict:
         """Fallback weather data when API fails"""
@@ -342,37 +646,138 @@ class WeatherAPI:
 
 # Global weather service instance
 _weather_api = None
+_weather_prefetcher = None
+
+def start_weather_prefetch(api: WeatherAPI) -> Optional[WeatherPrefetcher]:
+    """Start the background prefetch scheduler unless WEATHER_PREFETCH=0.
+
+    WEATHER_WATCH_CITIES is a comma separated list of cities that are
+    always kept warm; frequently requested cities are added on top.
+    """
+    global _weather_prefetcher
+    if _weather_prefetcher is not None:
+        _weather_prefetcher.stop()
+        _weather_prefetcher = None
+    if os.getenv("WEATHER_PREFETCH", "1") == "0":
+        return None
+    _weather_prefetcher = WeatherPrefetcher(
+        api,
+        watch=os.getenv("WEATHER_WATCH_CITIES", "").split(","),
+        budget_per_minute=int(os.getenv("WEATHER_PREFETCH_BUDGET", "20")),
+        leader=is_host_leader,
+        shared_path=os.path.join(default_state_dir(), "weather_requests.json"),
+    )
+    _weather_prefetcher.start(get_async_runner())
+    return _weather_prefetcher
+
+def host_quota() -> QuotaGuard:
+    """OpenWeatherMap quota shared by the worker processes of this host"""
+    return owm_quota(os.path.join(default_state_dir(), "owm_quota.json"))
 
 def init_weather_api(api_key: str) -> None:
     """Initialize the global weather service instance"""
     global _weather_api
-    _weather_api = WeatherAPI(api_key)
+    _weather_api = WeatherAPI(
+        api_key, store=WeatherStore(), resolver=CityResolver(),
+        quota=host_quota(),
+    )
+    start_weather_prefetch(_weather_api)
 
-def get_weather(city: str) -> Dict:
-    """Main function for Flask integration"""
+def get_weather_api() -> WeatherAPI:
+    """Return the global weather service, creating it from
+    WEATHER_API_KEY on first use"""
     global _weather_api
     if not _weather_api:
-        raise RuntimeError("Weather API not initialized. Call init_weather_api first.")
-    return _weather_api.get_weather_data_sync(city)
+        _weather_api = WeatherAPI(
+            store=WeatherStore(), resolver=CityResolver(), quota=host_quota()
+        )
+        start_weather_prefetch(_weather_api)
+    return _weather_api
 
-async def get_weather_async(city: str) -> Dict:
-    """Async function for FastAPI integration"""
-    global _weather_api
-    if not _weather_api:
-        raise RuntimeError("Weather API not initialized. Call init_weather_api first.")
-    return await _weather_api.get_weather_data_async(city)
+def record_weather_request(city: str) -> None:
+    """Let the prefetcher learn which cities users ask for"""
+    if _weather_prefetcher is not None:
+        _weather_prefetcher.record(city)
+
+def parse_include(value: Optional[str]) -> List[str]:
+    """?include=uv,forecast -> ["uv", "forecast"] (unknown parts dropped)"""
+    parts = (part.strip().lower() for part in (value or "").split(","))
+    return [part for part in parts if part in ENRICHMENTS]
+
+def get_weather(city: str, include: Optional[List[str]] = None) -> Dict:
+    """Main function for Flask integration"""
+    result = get_weather_api().get_weather_data_sync(city, include)
+    record_weather_request(city)
+    return result
+
+def get_weather_batch(cities: List[str]) -> Dict[str, Dict]:
+    """Weather for several cities in one call (Flask integration)"""
+    api = get_weather_api()
+    cities = cities[:MAX_BATCH_CITIES]
+    results = get_async_runner().run(
+        api.get_weather_batch_async(cities),
+        timeout=api.request_timeout * 2,
+    )
+    for city in cities:
+        record_weather_request(city)
+    return results
+
+async def on_runner_loop(coro):
+    """Await a coroutine running on the shared background loop.
+
+    The weather caches share in-flight futures between requests and the
+    prefetcher, and futures belong to one loop; awaiting from another
+    loop (e.g. the ASGI server's) takes no thread.
+    """
+    runner = get_async_runner()
+    if runner.in_loop_thread():
+        return await coro
+    return await asyncio.wrap_future(runner.submit(coro))
+
+async def get_weather_async(
+    city: str, include: Optional[List[str]] = None
+) -> Dict:
+    """Async function for the ASGI app (same result as get_weather)"""
+    api = get_weather_api()
+    try:
+        result = await asyncio.wait_for(
+            on_runner_loop(api.get_weather_data_async(city, include)),
+            timeout=api.request_timeout,
+        )
+    except asyncio.TimeoutError:
+        result = api.timed_out(city)
+    record_weather_request(city)
+    return result
+
+async def get_weather_batch_async(cities: List[str]) -> Dict[str, Dict]:
+    """Weather for several cities in one call (ASGI integration)"""
+    api = get_weather_api()
+    cities = cities[:MAX_BATCH_CITIES]
+    results = await asyncio.wait_for(
+        on_runner_loop(api.get_weather_batch_async(cities)),
+        timeout=api.request_timeout * 2,
+    )
+    for city in cities:
+        record_weather_request(city)
+    return results
+
+def get_weather_cache_stats() -> Dict:
+    """Hit/miss counters of the weather caches and prefetch activity"""
+    api = get_weather_api()
+    stats = api.cache.stats()
+    stats["uv"] = api.uv_cache.stats()
+    stats["forecast"] = api.forecast_cache.stats()
+    if _weather_prefetcher is not None:
+        stats["prefetch"] = _weather_prefetcher.stats()
+    return stats
+
+def get_weather_quota() -> Dict:
+    """Remaining OpenWeatherMap quota (minute bucket and daily cap)"""
+    return get_weather_api().quota.status()
 
 def get_random_movie_quote(condition: Optional[str] = None) -> Dict:
-    """Get random movie quote for specific weather condition"""
-    global _weather_api
-    if not _weather_api:
-        raise RuntimeError("Weather API not initialized. Call init_weather_api first.")
-        
-    quote = _weather_api.movie_quotes.get_random_quote(condition)
-    return {
-        "quote": quote.quote,
-        "movie": quote.movie,
-        "character": quote.character,
-        "year": quote.year,
-        "weather_condition": quote.weather_condition,
-    }
\ No newline at end of file
+    """Get random movie quote for specific weather condition.
+
+    Raises ValueError for a condition without quotes.
+    """
+    return get_movie_quotes().get_random_quote(condition).to_dict()
\ No newline at end of file
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .host_state import FileLock
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_INTERVAL = 10  # seconds between scheduler ticks
+LEAD_TIME = 30  # refresh this long before a cache entry expires
+JITTER = 30  # extra random lead per city, spreads refreshes out
+LEARN_TOP = 10  # most requested cities added to the watch list
+LEARN_MIN_REQUESTS = 3
+MAX_TRACKED = 500  # request counters kept; the least requested are dropped
+BUDGET_PER_MINUTE = 20  # upstream calls the scheduler may spend
+QUOTA_RESERVE = 0.5  # share of the API quota kept for user requests
+
+
+class WeatherPrefetcher:
+    """Refreshes watched cities shortly before their cache entries expire"""
+
+    def __init__(
+        self,
+        api,
+        watch: Optional[Iterable[str]] = None,
+        learn_top: int = LEARN_TOP,
+        budget_per_minute: int = BUDGET_PER_MINUTE,
+        lead_time: float = LEAD_TIME,
+        jitter: float = JITTER,
+        interval: float = PREFETCH_INTERVAL,
+        quota_reserve: float = QUOTA_RESERVE,
+        leader: Optional[Callable[[], bool]] = None,
+        shared_path: Optional[str] = None,
+        max_tracked: int = MAX_TRACKED,
+    ):
+        self.api = api
+        self.watch = [c.strip() for c in watch or () if c.strip()]
+        self.learn_top = learn_top
+        self.budget_per_minute = budget_per_minute
+        self.lead_time = lead_time
+        self.jitter = jitter
+        self.interval = interval
+        self.quota_reserve = quota_reserve
+        self.leader = leader
+        self.shared_path = shared_path  # request counts of all workers
+        self.max_tracked = max_tracked
+        self.request_counts: Counter = Counter()
+        self.names: Dict[str, str] = {}  # cache key -> city as requested
+        self._unshared: Counter = Counter()
+        self._lock = threading.Lock()  # record() runs on request threads
+        self._leads: Dict[str, float] = {}
+        self._spent: deque = deque()  # timestamps of prefetch calls
+        self._task: Optional[asyncio.Future] = None
+        self.refreshes = 0
+        self.skipped_budget = 0
+
+    def record(self, city: str) -> None:
+        """Count a user request for `city`"""
+        key = self.api.key_for(city)
+        with self._lock:
+            self.request_counts[key] += 1
+            self.names.setdefault(key, city.strip())
+            if self.shared_path:
+                self._unshared[key] += 1
+            if len(self.request_counts) > self.max_tracked:
+                top = self.request_counts.most_common(self.max_tracked // 2)
+                self._keep(Counter(dict(top)), self.names)
+
+    def _keep(self, counts: Counter, names: Dict[str, str]) -> None:
+        """Replace the counters with `counts`; call with the lock held"""
+        self.request_counts = counts
+        self.names = {
+            key: names[key] for key in self.request_counts if key in names
+        }
+        self._unshared = Counter({
+            key: count for key, count in self._unshared.items()
+            if key in self.request_counts
+        })
+
+    def watched(self) -> List[str]:
+        """Explicit watch list followed by the most requested cities"""
+        cities = {self.api.key_for(c): c for c in self.watch}
+        with self._lock:
+            for key, count in self.request_counts.most_common(self.learn_top):
+                if count >= LEARN_MIN_REQUESTS and key in self.names:
+                    cities.setdefault(key, self.names[key])
+        return list(cities.values())
+
+    def share(self) -> None:
+        """Add this worker's new counts to the host-wide ones and adopt them"""
+        with self._lock:
+            unshared, self._unshared = self._unshared, Counter()
+            names = dict(self.names)
+        os.makedirs(os.path.dirname(self.shared_path), exist_ok=True)
+        with FileLock(self.shared_path):
+            try:
+                with open(self.shared_path, "r", encoding="utf-8") as f:
+                    shared = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                shared = {}
+            counts = Counter(shared.get("counts", {}))
+            counts.update(unshared)
+            top = counts.most_common(self.max_tracked)
+            shared_names = dict(names, **shared.get("names", {}))
+            shared_names = {
+                key: shared_names[key] for key, _ in top if key in shared_names
+            }
+            tmp_path = f"{self.shared_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"counts": dict(top), "names": shared_names}, f)
+            os.replace(tmp_path, self.shared_path)
+        with self._lock:
+            # Counts recorded meanwhile stay unshared until the next call
+            counts = Counter(dict(top))
+            counts.update(self._unshared)
+            self._keep(counts, dict(shared_names, **self.names))
+
+    def lead(self, key: str) -> float:
+        if key not in self._leads:
+            self._leads[key] = self.lead_time + random.uniform(0, self.jitter)
+        return self._leads[key]
+
+    def budget_left(self, now: float) -> int:
+        while self._spent and now - self._spent[0] > 60:
+            self._spent.popleft()
+        budget = self.budget_per_minute - len(self._spent)
+        quota = self.api.quota
+        reserve = int(quota.per_minute * self.quota_reserve)
+        return min(budget, quota.remaining() - reserve)
+
+    def due(self, now: float) -> List[str]:
+        """Watched cities that are missing or about to expire"""
+        due = []
+        keys = set()
+        for city in self.watched():
+            key = self.api.key_for(city)
+            keys.add(key)
+            entry = self.api.cache.peek(key)
+            if entry is None or entry.expires_at - now <= self.lead(key):
+                due.append(city)
+        self._leads = {k: v for k, v in self._leads.items() if k in keys}
+        return due
+
+    def tick(self) -> int:
+        """Start refreshes for due cities; must run on the event loop"""
+        if self.leader is not None and not self.leader():
+            return 0
+        now = time.time()
+        started = 0
+        for city in self.due(now):
+            if self.budget_left(now) <= 0:
+                self.skipped_budget += 1
+                continue
+            self._spent.append(now)
+            self.api.cache.refresh(
+                self.api.key_for(city),
+                lambda city=city: self.api.fetch_weather(city),
+            )
+            started += 1
+        self.refreshes += started
+        return started
+
+    async def run(self) -> None:
+        # Resolve explicit cities first so they are keyed canonically
+        for city in self.watch:
+            try:
+                await self.api.locate(city)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not resolve watched city {city}: {e}")
+        logger.info(f"🌤️ Weather prefetch started: {self.watched()}")
+        loop = asyncio.get_running_loop()
+        while True:
+            try:
+                if self.shared_path:
+                    await loop.run_in_executor(None, self.share)
+                self.tick()
+            except Exception as e:
+                logger.warning(f"⚠️ Weather prefetch tick failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self, runner) -> None:
+        """Run the scheduler on the shared async runner's loop"""
+        if self._task is None:
+            self._task = runner.submit(self.run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "watched": self.watched(),
+            "refreshes": self.refreshes,
+            "skipped_budget": self.skipped_budget,
+            "budget_per_minute": self.budget_per_minute,
+            "budget_left": self.budget_left(time.time()),
+        }
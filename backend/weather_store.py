@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WEATHER_DB_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "data", "weather.db"
+)
+FLUSH_INTERVAL = 2.0  # seconds
+FLUSH_BATCH = 200
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS observations (
+    key TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+)
+"""
+
+
+class WeatherStore:
+    """Disk tier under the in-memory weather cache.
+
+    Keeps the latest raw OpenWeatherMap payload per city together with
+    its fetch time. Writes are queued and committed in batches by a
+    background thread; reads (startup warm-up and the upstream-failure
+    path) go straight to SQLite, which WAL mode keeps non-blocking.
+    """
+
+    def __init__(self, path: str = WEATHER_DB_PATH):
+        self.path = path
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._pending = 0
+        self._flushed = threading.Condition()
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with closing(self._connect()) as db, db:
+            db.execute(SCHEMA)
+
+        self._writer = threading.Thread(
+            target=self._write_loop, name="weather-store", daemon=True
+        )
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=10)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def save(
+        self, key: str, payload: Dict, fetched_at: Optional[float] = None
+    ) -> None:
+        """Queue a raw upstream payload for writing"""
+        with self._flushed:
+            self._pending += 1
+        self._queue.put(
+            (key, json.dumps(payload), fetched_at or time.time())
+        )
+
+    def load(self, key: str) -> Optional[Tuple[Dict, float]]:
+        """Last stored (payload, fetched_at) for a city"""
+        with closing(self._connect()) as db:
+            row = db.execute(
+                "SELECT payload, fetched_at FROM observations WHERE key = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def load_recent(self, max_age: float) -> List[Tuple[str, Dict, float]]:
+        """All observations fetched within the last `max_age` seconds"""
+        with closing(self._connect()) as db:
+            rows = db.execute(
+                "SELECT key, payload, fetched_at FROM observations "
+                "WHERE fetched_at >= ?",
+                (time.time() - max_age,),
+            ).fetchall()
+        return [(key, json.loads(raw), fetched_at)
+                for key, raw, fetched_at in rows]
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until every queued observation is written"""
+        with self._flushed:
+            self._flushed.wait_for(lambda: self._pending == 0, timeout)
+
+    def _write_loop(self):
+        db = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.time() + FLUSH_INTERVAL
+            while len(batch) < FLUSH_BATCH:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                with db:
+                    db.executemany(
+                        "INSERT OR REPLACE INTO observations VALUES (?, ?, ?)",
+                        batch,
+                    )
+            except sqlite3.Error as e:
+                logger.error(f"Weather store write failed: {e}")
+            finally:
+                with self._flushed:
+                    self._pending -= len(batch)
+                    self._flushed.notify_all()
@@ -17,8 +17,9 @@ document.addEventListener('DOMContentLoaded', function() {
     const cfUsedModel = document.getElementById('cf-used-model');
     const cfStatusIndicator = document.getElementById('cf-status-indicator');
 
-    // Test connection on load
+    // Test connection and load the model catalog on load
     testConnection();
+    loadModels();
 
     // Event Listeners
     if (cfGenerateBtn) {
@@ -29,7 +30,13 @@ document.addEventListener('DOMContentLoaded', function() {
         cfTestBtn.addEventListener('click', testConnection);
     }
 
-    // Generate Response Function
+    // Aborts the previous stream when a new one starts or the page closes
+    let currentStream = null;
+    window.addEventListener('beforeunload', () => {
+        if (currentStream) currentStream.abort();
+    });
+
+    // Generate Response Function (streamed via server-sent events)
     async function generateResponse() {
         const prompt = cfPrompt.value.trim();
         const model = cfModelSelect.value;
@@ -41,14 +48,19 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
 
+        if (currentStream) currentStream.abort();
+        currentStream = new AbortController();
+
         // UI State - Loading
         setLoadingState(true);
-        cfResult.style.display = 'none';
+        cfResponse.textContent = '';
+        cfUsedModel.textContent = model;
+        cfResult.style.display = 'block';
 
         try {
-            console.log(`🔄 Cloudflare AI request: ${model}`);
+            console.log(`🔄 Cloudflare AI stream: ${model}`);
 
-            const response = await fetch('/api/cloudflare-ai', {
+            const response = await fetch('/api/cloudflare-ai/stream', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
@@ -58,26 +70,34 @@ document.addEventListener('DOMContentLoaded', function() {
                     model: model,
                     max_tokens: maxTokens,
                     temperature: temperature
-                })
+                }),
+                signal: currentStream.signal
             });
 
-            const data = await response.json();
-
-            if (data.success) {
-                // Show successful response
-                cfResponse.textContent = data.response;
-                cfUsedModel.textContent = data.model;
-                cfResult.style.display = 'block';
-
-                console.log('✅ Cloudflare AI response received');
-                updateStatusIndicator('success');
+            if (!response.ok) {
+                const data = await response.json();
+                throw new Error(data.error || response.statusText);
+            }
 
-            } else {
-                showAlert(`Błąd: ${data.error}`, 'danger');
-                updateStatusIndicator('error');
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                // Events are separated by a blank line
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    handleStreamEvent(buffer.slice(0, boundary));
+                    buffer = buffer.slice(boundary + 2);
+                }
             }
 
         } catch (error) {
+            if (error.name === 'AbortError') return;
             console.error('❌ Cloudflare AI error:', error);
             showAlert(`Błąd połączenia: ${error.message}`, 'danger');
             updateStatusIndicator('error');
@@ -86,6 +106,55 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    function handleStreamEvent(raw) {
+        let event = 'message';
+        let data = '';
+        raw.split('\n').forEach((line) => {
+            if (line.startsWith('event:')) event = line.slice(6).trim();
+            if (line.startsWith('data:')) data += line.slice(5).trim();
+        });
+        if (!data) return;
+        const payload = JSON.parse(data);
+
+        if (event === 'done') {
+            cfUsedModel.textContent = payload.model;
+            if (payload.usage && payload.usage.total_tokens) {
+                cfUsedModel.textContent += ` (${payload.usage.total_tokens} tokens)`;
+            }
+            console.log('✅ Cloudflare AI response received');
+            updateStatusIndicator('success');
+        } else if (event === 'error') {
+            showAlert(`Błąd: ${payload.error}`, 'danger');
+            updateStatusIndicator('error');
+        } else if (payload.response) {
+            cfResponse.textContent += payload.response;
+        }
+    }
+
+    // Replace the built-in model options with the cached live catalog
+    async function loadModels() {
+        try {
+            const response = await fetch('/api/cloudflare-ai/models');
+            const data = await response.json();
+            if (!data.success || !data.models.length) return;
+
+            const selected = cfModelSelect.value;
+            cfModelSelect.innerHTML = '';
+            data.models.forEach((model) => {
+                const option = document.createElement('option');
+                option.value = model.id;
+                option.textContent = model.name;
+                option.title = model.description;
+                cfModelSelect.appendChild(option);
+            });
+            if (data.models.some((model) => model.id === selected)) {
+                cfModelSelect.value = selected;
+            }
+        } catch (error) {
+            console.error('❌ Cloudflare AI models error:', error);
+        }
+    }
+
     // Test Connection Function
     async function testConnection() {
         console.log('🔍 Testing Cloudflare AI connection...');
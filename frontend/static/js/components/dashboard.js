@@ -279,8 +279,33 @@ export function init3DViewer() {
   camera.position.z = 5;
 
   let currentModel = null;
+  let modelManifest = null;
 
-  function loadGLBModel(path) {
+  const progress = document.createElement("div");
+  progress.className = "small text-muted";
+  container.after(progress);
+
+  // Models from /api/3d/models have content-hashed URLs the browser
+  // caches permanently; the manifest is fetched on first use
+  async function resolveModel(path) {
+    if (!modelManifest) {
+      try {
+        const response = await fetch("/api/3d/models");
+        const data = await response.json();
+        modelManifest = data.success ? data.data.models : [];
+      } catch (error) {
+        console.error("Could not load the 3D model manifest:", error);
+        modelManifest = [];
+      }
+    }
+    return modelManifest.find(
+      (model) =>
+        model.available &&
+        [model.id, model.name, model.path, model.file].includes(path)
+    );
+  }
+
+  async function loadGLBModel(path) {
     if (currentModel) {
       scene.remove(currentModel);
       currentModel.traverse((object) => {
@@ -295,10 +320,12 @@ export function init3DViewer() {
       });
     }
 
+    const model = await resolveModel(path);
     const loader = new GLTFLoader();
     loader.load(
-      path,
+      model ? model.url : path,
       (gltf) => {
+        progress.textContent = "";
         currentModel = gltf.scene;
         scene.add(currentModel);
         const box = new THREE.Box3().setFromObject(currentModel);
@@ -312,8 +339,16 @@ export function init3DViewer() {
         controls.target.set(center.x, center.y, center.z);
         controls.update();
       },
-      undefined,
+      (event) => {
+        const total = event.total || (model && model.size);
+        if (total) {
+          progress.textContent = `Loading ${Math.round(
+            (100 * event.loaded) / total
+          )}%`;
+        }
+      },
       (error) => {
+        progress.textContent = "";
         console.error("An error occurred loading the 3D model:", error);
         alert("Failed to load 3D model. Check console for details.");
       }
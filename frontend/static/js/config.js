@@ -56,7 +56,7 @@ export const dashboardWidgets = [
   {
     id: "3d-viewer",
     content:
-      '<h4>3D Model Viewer</h4><div id="3d-viewer-content" style="height: 100%;"></div><div class="mt-2"><input type="text" class="form-control" id="3d-model-path" placeholder="Path to .glb model"><button class="btn btn-primary btn-sm mt-2" id="load-3d-model-btn">Load Model</button></div>',
+      '<h4>3D Model Viewer</h4><div id="3d-viewer-content" style="height: 100%;"></div><div class="mt-2"><input type="text" class="form-control" id="3d-model-path" placeholder="Model id or path to .glb model"><button class="btn btn-primary btn-sm mt-2" id="load-3d-model-btn">Load Model</button></div>',
     w: 6,
     h: 8,
   },
@@ -349,7 +349,7 @@ function fetchAiModels() {
     .then((data) => {
       const selectElement = document.getElementById("ai-model-select");
       selectElement.innerHTML = ""; // Clear existing options
-      data.models.forEach((model) => {
+      ((data.data || data).models || []).forEach((model) => {
         const option = document.createElement("option");
         option.value = model;
         option.textContent = model;
@@ -400,11 +400,14 @@ function loadAiTools() {
       if (!aiToolsList) return;
 
       aiToolsList.innerHTML = ""; // Clear existing tools
-      const tools = data.tools || {};
+      // api_response wraps payloads in `data`
+      const toolList = (data.data || data).tools || [];
+      const tools = {};
+      toolList.forEach((tool) => (tools[tool.id] = tool));
 
       for (const toolId in tools) {
         const tool = tools[toolId];
-        if (tool.enabled) {
+        if (tool.enabled !== false) {
           const toolItem = document.createElement("div");
           toolItem.classList.add(
             "d-flex",
@@ -441,7 +444,8 @@ function loadAiTools() {
           document.getElementById("tool-icon").value = tool.icon;
           document.getElementById("tool-description").value = tool.description;
           document.getElementById("tool-category").value = tool.category;
-          document.getElementById("tool-enabled").checked = tool.enabled;
+          document.getElementById("tool-enabled").checked =
+            tool.enabled !== false;
         });
       });
 
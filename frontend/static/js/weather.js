@@ -375,7 +375,7 @@ class WeatherWidget {
       const response = await fetch(url);
       const data = await response.json();
       if (data.success) {
-        this.displayMovieQuote(data.quote);
+        this.displayMovieQuote((data.data || data).quote);
       }
     } catch (error) {
       console.error("Failed to get new quote:", error);
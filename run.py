@@ -3,20 +3,33 @@ This script serves as the entry point for launching the JIMBO DaShBoArD
 application.
 
 It performs the following key functions:
-1.  Configures the system path to allow for seamless module imports from the
-    'backend' directory.
-2.  Imports the main Flask application instance from the backend server.
-3.  Starts the Flask development server.
-4.  Automatically opens the application in a new web browser tab for
+1.  Builds the Flask application with the `backend` package's factory.
+2.  Starts the Flask development server.
+3.  Automatically opens the application in a new web browser tab for
     immediate access.
 
+With `--production` (or DASHBOARD_MODE=production) it instead serves the
+app through gunicorn (pre-fork, POSIX) or waitress (threads), without
+the debugger, reloader or browser:
+
+    python run.py --production --workers 4 --threads 8
+
+`--server uvicorn` serves the ASGI variant (`backend/asgi.py`) instead,
+where long chat and Cloudflare calls do not hold a thread each:
+
+    python run.py --production --server uvicorn --workers 2
+
+Host metrics and weather prefetching then run in one worker per host;
+shutdown waits for in-flight chat requests (DASHBOARD_DRAIN_TIMEOUT).
+
 This modular structure ensures that the application is easy to start and that
 the backend logic remains decoupled from the script that launches it.
 """
 
+import argparse
+import os
 import sys
 import webbrowser
-from pathlib import Path
 from threading import Timer
 
 # --- Constants ---
@@ -24,42 +37,91 @@ HOST = "127.0.0.1"
 PORT = 5080
 DEBUG_MODE = True
 APP_URL = f"http://{HOST}:{PORT}"
+SERVER_PACKAGES = {"gunicorn", "waitress", "uvicorn", "starlette", "a2wsgi"}
 
 
-def setup_paths():
-    """
-    Add the backend directory to the Python path for module imports.
-
-    This is a common pattern for simple project structures. For larger
-    applications, consider using package installation
-    (e.g., 'pip install -e .').
-    """
-    backend_path = Path(__file__).parent / "backend"
-    if str(backend_path) not in sys.path:
-        sys.path.append(str(backend_path))
-
-
-def open_browser():
+def open_browser(url=APP_URL):
     """Opens the application in a new browser tab."""
-    print(f"Opening browser to {APP_URL}...")
-    webbrowser.open_new_tab(APP_URL)
+    print(f"Opening browser to {url}...")
+    webbrowser.open_new_tab(url)
+
+
+def parse_args(argv=None):
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="JIMBO DaShBoArD")
+    parser.add_argument(
+        "--production", action="store_true",
+        default=env("DASHBOARD_MODE", "development") == "production",
+        help="serve with a production WSGI server",
+    )
+    parser.add_argument(
+        "--server", choices=["auto", "gunicorn", "waitress", "uvicorn"],
+        default=env("DASHBOARD_SERVER", "auto"),
+    )
+    parser.add_argument("--host", default=env("DASHBOARD_HOST", HOST))
+    parser.add_argument(
+        "--port", type=int, default=int(env("DASHBOARD_PORT", PORT))
+    )
+    parser.add_argument(
+        "--workers", type=int, default=int(env("DASHBOARD_WORKERS", "0")),
+        help="worker processes (gunicorn: 0 = 2 x CPUs + 1, at most 8; "
+             "uvicorn: 0 = 1)",
+    )
+    parser.add_argument(
+        "--threads", type=int, default=int(env("DASHBOARD_THREADS", "8")),
+        help="threads per worker",
+    )
+    parser.add_argument(
+        "--drain-timeout", type=float,
+        default=float(env("DASHBOARD_DRAIN_TIMEOUT", "60")),
+        help="seconds to wait for in-flight requests on shutdown",
+    )
+    return parser.parse_args(argv)
+
+
+def run_production(args):
+    """Serve through gunicorn, waitress or uvicorn"""
+    from backend.serving import serve
+
+    try:
+        serve(
+            server=args.server,
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            threads=args.threads,
+            drain_timeout=args.drain_timeout,
+        )
+    except ImportError as e:
+        # Only a missing server package; anything else is a real bug
+        if (e.name or "").split(".")[0] not in SERVER_PACKAGES:
+            raise
+        print(f"Error: Production server not installed. {e}")
+        print("Install 'gunicorn' (Linux/macOS) or 'waitress' (any OS),")
+        print("or 'uvicorn', 'starlette' and 'a2wsgi' for --server uvicorn.")
+        sys.exit(1)
 
 
 def main():
     """
     Main function to run the JIMBO DaShBoArD application.
     """
-    setup_paths()
+    args = parse_args()
+    if args.production:
+        run_production(args)
+        return
 
     try:
-        from server import app
+        from backend.app import create_app
     except ImportError as e:
-        print(f"Error: Failed to import Flask app from 'server.py'. {e}")
+        print(f"Error: Failed to import the app factory. {e}")
         print("Please ensure the following:")
-        print("1. 'backend/server.py' exists with the Flask 'app' instance.")
+        print("1. 'backend/app.py' exists with the 'create_app' factory.")
         print("2. Dependencies from 'backend/requirements.txt' are installed.")
         sys.exit(1)
 
+    app = create_app()
+
     if DEBUG_MODE:
         print("WARNING: Running in DEBUG MODE.")
         print("Do not use in a production environment.")
@@ -67,13 +129,13 @@ def main():
     print("Starting JIMBO DaShBoArD...")
 
     # Use a timer to open the browser after the server has a moment to start.
-    Timer(1, open_browser).start()
+    Timer(1, open_browser, [f"http://{args.host}:{args.port}"]).start()
 
     try:
-        app.run(host=HOST, port=PORT, debug=DEBUG_MODE)
+        app.run(host=args.host, port=args.port, debug=DEBUG_MODE)
     except OSError as e:
         print(f"Error: Failed to start the server. {e}")
-        print(f"Please check if another application is using port {PORT}.")
+        print(f"Please check if another application is using port {args.port}.")
         sys.exit(1)
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
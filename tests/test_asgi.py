@@ -0,0 +1,182 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+from starlette.testclient import TestClient
+
+import backend.services
+import backend.weather_integration
+from backend.asgi import create_asgi_app
+from backend.chatbot import AIChat
+from backend.components.ai_tools import usage_ledger
+from backend.components.ai_tools.cloudflare_ai import CloudflareAI
+from backend.config_service import ConfigService
+from backend.providers import ProviderRegistry
+from backend.weather_integration import WeatherAPI
+
+class Upstream(BaseHTTPRequestHandler):
+    """Fake Ollama (/api/*) and Cloudflare Workers AI (/cf/run/*)"""
+
+    delay = 0.0
+
+    def log_message(self, *args):
+        pass
+
+    def send_json(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.delay)
+        if self.path == "/api/generate":
+            prompt = body["prompt"][-20:]
+            return self.send_json({"response": f"{body['model']}:{prompt}"})
+        prompt = body["messages"][0]["content"]
+        usage = {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}
+        if not body.get("stream"):
+            return self.send_json({
+                "success": True,
+                "result": {"response": prompt.upper(), "usage": usage},
+            })
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for chunk in ({"response": prompt[:2]}, {"response": prompt[2:]},
+                      {"usage": usage}):
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+@pytest.fixture(scope="module")
+def upstream():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Upstream)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+@pytest.fixture(scope="module")
+def asgi_app():
+    return create_asgi_app({"PROVIDER_PROBES": False, "HOST_SAMPLER": False})
+
+
+@pytest.fixture
+def services(upstream, tmp_path, monkeypatch):
+    chat = AIChat(ConfigService(str(tmp_path / "config.json"), watch=False))
+    chat.ollama_url = upstream
+    cloudflare = CloudflareAI("account", "token")
+    for client in (cloudflare, cloudflare.async_client()):
+        client.base_url = f"{upstream}/cf/run"
+    registry = ProviderRegistry()
+    registry.register("chat", lambda: chat)
+    registry.register("cloudflare", lambda: cloudflare)
+    monkeypatch.setattr(backend.services, "_providers", registry)
+    monkeypatch.setattr(
+        usage_ledger, "_usage_ledger",
+        usage_ledger.UsageLedger(path=str(tmp_path / "usage.db")),
+    )
+
+    async def weather_data(city, include=None):
+        return {"success": True, "weather": {"city": city}, "include": include}
+
+    weather = WeatherAPI("key")
+    weather.get_weather_data_async = weather_data
+    monkeypatch.setattr(backend.weather_integration, "_weather_api", weather)
+
+
+@pytest.fixture
+def clients(asgi_app, services):
+    flask_client = asgi_app.state.flask_app.test_client()
+    with TestClient(asgi_app) as asgi_client:
+        yield flask_client, asgi_client
+
+
+PARITY_CASES = [
+    ("POST", "/api/chat", {"message": "hello there"}),
+    ("POST", "/api/chat", {"message": "jak się masz"}),
+    ("POST", "/api/chat", {"message": ""}),
+    ("POST", "/api/cloudflare-ai", {"prompt": "hi"}),
+    ("POST", "/api/cloudflare-ai", {"prompt": "  "}),
+    ("POST", "/api/cloudflare-ai/batch", {"prompts": ["a", "b", " "]}),
+    ("POST", "/api/cloudflare-ai/batch", {"prompts": ["x"] * 51}),
+    ("POST", "/api/cloudflare-ai/stream", {"prompt": ""}),
+    ("GET", "/api/weather/Krakow", None),
+    ("GET", "/api/weather?city=Gdansk&include=uv,bogus", None),
+    ("GET", "/api/weather/batch?cities=Oslo,Rome", None),
+    ("POST", "/api/weather/batch", {"cities": []}),
+    ("GET", "/api/weather/stats", None),
+    ("GET", "/api/weather/quote/no-such-condition", None),
+    ("GET", "/api/no/such/route", None),
+]
+
+
+@pytest.mark.parametrize("method,path,body", PARITY_CASES)
+def test_same_responses_as_flask(clients, method, path, body):
+    flask_client, asgi_client = clients
+    expected = flask_client.open(path, method=method, json=body)
+    actual = asgi_client.request(method, path, json=body)
+    assert actual.status_code == expected.status_code
+    assert actual.json() == expected.get_json()
+
+
+@pytest.mark.parametrize("prompts", [["a", 1, None], "a,b", {"a": 1}])
+def test_batch_rejects_non_string_prompts(clients, prompts):
+    for client in clients:
+        response = client.post(
+            "/api/cloudflare-ai/batch", json={"prompts": prompts}
+        )
+        assert response.status_code == 400
+
+
+def test_stream_matches_flask(clients):
+    flask_client, asgi_client = clients
+    body = {"prompt": "hello", "model": "@cf/test"}
+    expected = flask_client.post("/api/cloudflare-ai/stream", json=body)
+    actual = asgi_client.post("/api/cloudflare-ai/stream", json=body)
+    assert actual.headers["content-type"] == expected.headers["content-type"]
+    assert actual.text == expected.get_data(as_text=True)
+    assert "event: done" in actual.text
+
+
+def test_slow_chats_share_one_loop(asgi_app, services, monkeypatch):
+    """50 slow generations at once: one upstream delay, no extra threads"""
+    monkeypatch.setattr(Upstream, "delay", 0.5)
+
+    def app_threads():
+        # The fake upstream's own request threads do not count
+        return {
+            t for t in threading.enumerate()
+            if "process_request" not in t.name
+        }
+
+    async def run():
+        transport = httpx.ASGITransport(app=asgi_app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            pending = asyncio.gather(*(
+                client.post("/api/chat", json={"message": f"hi {i}"})
+                for i in range(50)
+            ))
+            await asyncio.sleep(0.25)
+            during = app_threads()
+            responses = await pending
+        await backend.services.get_providers().get("chat").async_client(
+        ).close()
+        return during, responses
+
+    before = app_threads()
+    started = time.monotonic()
+    during, responses = asyncio.run(run())
+    assert time.monotonic() - started < 2
+    assert all(r.json()["success"] for r in responses)
+    assert len(during - before) <= 1
@@ -0,0 +1,56 @@
+import os
+import re
+
+from backend.app import create_app
+from backend.assets import build_assets, get_asset_manifest
+
+
+def test_build_is_content_addressed_and_incremental(tmp_path):
+    static, build = tmp_path / "static", tmp_path / "build"
+    (static / "js").mkdir(parents=True)
+    script = static / "js" / "app.js"
+    script.write_text("console.log('dashboard');\n" * 100)
+    (static / "js" / "tiny.js").write_text("x")
+
+    first = build_assets(str(static), str(build))
+    entry = first["js/app.js"]
+    assert re.fullmatch(r"js/app\.[0-9a-f]{12}\.js", entry["path"])
+    assert entry["encodings"]["gzip"] < entry["size"]
+    assert os.path.exists(build / "static" / (entry["path"] + ".gz"))
+    assert first["js/tiny.js"]["encodings"] == {}
+
+    # Unchanged sources are not rebuilt
+    os.remove(build / "static" / (entry["path"] + ".gz"))
+    assert build_assets(str(static), str(build)) == first
+
+    script.write_text("console.log('changed');\n" * 100)
+    second = build_assets(str(static), str(build))
+    assert second["js/app.js"]["path"] != entry["path"]
+    manifest = get_asset_manifest(str(build))
+    assert manifest.url("js/app.js") == "/assets/" + second["js/app.js"]["path"]
+    assert manifest.lookup(entry["path"]) is None
+
+
+def test_dashboard_uses_hashed_immutable_assets(tmp_path):
+    app = create_app({
+        "PROVIDER_PROBES": False, "HOST_SAMPLER": False,
+        "ASSETS_DIR": str(tmp_path),
+    })
+    client = app.test_client()
+
+    page = client.get("/")
+    assert client.get(
+        "/", headers={"If-None-Match": page.headers["ETag"]}
+    ).status_code == 304
+    html = page.get_data(as_text=True)
+    main = re.search(r'src="(/assets/js/main\.[0-9a-f]{12}\.js)"', html)[1]
+    assert '"/assets/js/config.js": "/assets/js/config.' in html
+
+    rv = client.get(main, headers={"Accept-Encoding": "gzip"})
+    assert rv.headers["Content-Encoding"] == "gzip"
+    assert "immutable" in rv.headers["Cache-Control"]
+    assert rv.headers["Vary"] == "Accept-Encoding"
+    plain = client.get(main, headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert int(rv.headers["Content-Length"]) < len(plain.data)
+    assert client.get("/assets/js/main.js").status_code == 404
@@ -0,0 +1,46 @@
+import asyncio
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from backend.async_runner import AsyncRunner
+
+
+@pytest.fixture
+def runner():
+    runner = AsyncRunner("test-runner")
+    yield runner
+    runner.stop()
+
+
+def test_threads_share_one_loop_and_session(runner):
+    async def session_id():
+        await asyncio.sleep(0.01)
+        return id(asyncio.get_running_loop()), id(runner.session)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(
+            pool.map(lambda _: runner.run(session_id(), timeout=5), range(16))
+        )
+    assert len(set(results)) == 1
+
+
+def test_timeout_cancels_coroutine(runner):
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    with pytest.raises(concurrent.futures.TimeoutError):
+        runner.run(slow(), timeout=0.05)
+    runner.run(asyncio.sleep(0.01), timeout=5)
+    assert cancelled == [True]
+
+
+def test_session_only_available_on_loop(runner):
+    with pytest.raises(RuntimeError):
+        runner.session
@@ -0,0 +1,298 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from backend.components.ai_tools.cloudflare_ai_async import AsyncCloudflareAI
+from backend.components.ai_tools.retry import RetryPolicy, parse_retry_after
+
+
+def test_retry_policy_backoff_and_retry_after():
+    policy = RetryPolicy(max_retries=3, base_delay=1, max_delay=10)
+    assert policy.next_delay(0, 400) is None
+    assert policy.next_delay(3, 503) is None
+    assert 0 <= policy.next_delay(2, 503) <= 4
+    assert policy.next_delay(0, 429, retry_after="5") >= 5
+    # Waiting longer than max_delay is not worth holding the request
+    assert policy.next_delay(0, 429, retry_after="60") is None
+    assert parse_retry_after("not a date") is None
+
+
+class FakeResponse:
+    def __init__(self, status, body, headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    async def __aenter__(self):
+        await asyncio.sleep(0.01)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+    async def json(self):
+        return self.body
+
+    async def text(self):
+        return str(self.body)
+
+
+class FakeSession:
+    """Rate-limits the first request, then echoes prompts upper-cased"""
+
+    closed = False
+
+    def __init__(self):
+        self.calls = 0
+        self.in_flight = 0
+        self.peak = 0
+
+    def post(self, url, json):
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        session = self
+
+        class Response(FakeResponse):
+            async def __aexit__(self, *exc_info):
+                session.in_flight -= 1
+
+        if self.calls == 1:
+            return Response(429, "slow down", {"Retry-After": "0"})
+        prompt = json["messages"][0]["content"]
+        return Response(
+            200, {"success": True, "result": {"response": prompt.upper()}}
+        )
+
+    async def close(self):
+        pass
+
+
+def test_generate_many_retries_and_limits_concurrency():
+    client = AsyncCloudflareAI(
+        "account", "token", max_concurrency=2,
+        retry_policy=RetryPolicy(base_delay=0.01),
+    )
+    client._session = FakeSession()
+    results = asyncio.run(client.generate_many(["a", "b", "c", "d", "e"]))
+    assert [r["response"] for r in results] == ["A", "B", "C", "D", "E"]
+    assert client._session.calls == 6
+    assert client._session.peak <= 2
+
+
+class FakeStreamResponse:
+    status_code = 200
+    headers = {}
+    closed = False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, decode_unicode=False):
+        yield 'data: {"response": "Hel"}'
+        yield ""
+        yield 'data: {"response": "lo", "usage": {"total_tokens": 7}}'
+        yield "data: [DONE]"
+
+    def close(self):
+        self.closed = True
+
+
+def test_stream_text_relays_chunks_and_closes_upstream():
+    from backend.components.ai_tools.cloudflare_ai import CloudflareAI
+
+    client = CloudflareAI("account", "token")
+    upstream = FakeStreamResponse()
+    client.session.post = lambda *args, **kwargs: upstream
+
+    chunks = list(client.stream_text("hi"))
+    assert [c.get("response") for c in chunks[:-1]] == ["Hel", "lo"]
+    assert chunks[-1]["done"] is True
+    assert chunks[-1]["usage"] == {"total_tokens": 7}
+    assert upstream.closed
+
+    upstream = FakeStreamResponse()
+    stream = client.stream_text("hi")
+    next(stream)
+    stream.close()  # browser went away
+    assert upstream.closed
+
+
+def test_stream_text_holds_its_account_slot_until_closed():
+    from backend.components.ai_tools.cloudflare_ai import CloudflareAI
+
+    client = CloudflareAI("stream-account", "token", max_concurrency=1)
+    client.session.post = lambda *args, **kwargs: FakeStreamResponse()
+
+    stream = client.stream_text("hi")
+    next(stream)
+    assert not client.slots.acquire(blocking=False)
+    stream.close()
+    assert client.slots.acquire(blocking=False)
+    client.slots.release()
+
+
+class FakeAsyncStreamResponse:
+    status = 200
+    headers = {}
+    closed = False
+
+    def __init__(self):
+        self.content = self.lines()
+
+    async def lines(self):
+        yield b'data: {"response": "Hel"}\n'
+        yield b"data: [DONE]\n"
+
+    def close(self):
+        self.closed = True
+
+
+def test_async_stream_text_holds_its_account_slot_until_closed():
+    from backend.components.ai_tools.cloudflare_ai_async import account_slots
+
+    client = AsyncCloudflareAI("stream-account", "token", max_concurrency=1)
+    upstream = FakeAsyncStreamResponse()
+
+    class Session:
+        closed = False
+
+        async def post(self, url, json):
+            return upstream
+
+    client._session = Session()
+
+    async def scenario():
+        slots = account_slots(client.account_id, client.max_concurrency)
+        stream = client.stream_text("hi")
+        assert (await stream.__anext__())["response"] == "Hel"
+        held = slots.locked()
+        await stream.aclose()
+        return held, slots.locked()
+
+    assert asyncio.run(scenario()) == (True, False)
+    assert upstream.closed
+
+
+class FakeCatalogResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+def test_model_catalog_snapshot_and_etag(tmp_path):
+    from backend.components.ai_tools.cloudflare_ai import CloudflareAI
+    from backend.components.ai_tools.cloudflare_catalog import ModelCatalog
+
+    client = CloudflareAI("account", "token")
+    requests_seen = []
+
+    def fake_get(url, headers, params, timeout):
+        requests_seen.append(headers.get("If-None-Match"))
+        if headers.get("If-None-Match") == '"v1"':
+            return FakeCatalogResponse(304)
+        return FakeCatalogResponse(
+            200,
+            {
+                "result": [
+                    {"name": "@cf/meta/llama-3.1-8b-instruct",
+                     "task": {"name": "Text Generation"}},
+                    {"name": "@cf/baai/bge-base-en-v1.5",
+                     "task": {"name": "Text Embeddings"}},
+                ],
+                "result_info": {"total_count": 2},
+            },
+            {"ETag": '"v1"'},
+        )
+
+    client.session.get = fake_get
+    cache_path = str(tmp_path / "models.json")
+    catalog = ModelCatalog(client, cache_path=cache_path)
+    assert catalog.refresh()
+    text_models = catalog.get_models()["models"]
+    assert [m["id"] for m in text_models] == ["@cf/meta/llama-3.1-8b-instruct"]
+    assert len(catalog.get_models(None)["models"]) == 2
+
+    # A new process starts from the snapshot and revalidates with the ETag
+    restarted = ModelCatalog(client, cache_path=cache_path)
+    assert len(restarted.get_models(None)["models"]) == 2
+    assert restarted.refresh()
+    assert requests_seen[-1] == '"v1"'
+
+
+def test_model_catalog_falls_back_offline(tmp_path):
+    import requests
+    from backend.components.ai_tools.cloudflare_ai import CloudflareAI
+    from backend.components.ai_tools.cloudflare_catalog import ModelCatalog
+
+    calls = []
+
+    def offline(*args, **kwargs):
+        calls.append(1)
+        raise requests.exceptions.ConnectionError("offline")
+
+    client = CloudflareAI("account", "token")
+    client.session.get = offline
+    catalog = ModelCatalog(client, cache_path=str(tmp_path / "models.json"))
+    assert not catalog.refresh()
+    result = catalog.get_models()
+    assert result["source"] == "fallback"
+    assert result["models"]
+
+    # No new upstream call per request until the retry interval passes
+    for _ in range(3):
+        assert catalog.get_models()["stale"]
+    assert len(calls) == 1
+
+
+def test_usage_ledger_aggregates_and_budgets(tmp_path):
+    from backend.components.ai_tools.usage_ledger import UsageLedger
+
+    ledger = UsageLedger(
+        str(tmp_path / "usage.db"), soft_daily_tokens=100,
+        hard_daily_tokens=200,
+    )
+    ledger.record("@cf/a", {"prompt_tokens": 30, "completion_tokens": 40}, "x")
+    assert ledger.budget_state() == "ok"
+    ledger.record("@cf/a", {"total_tokens": 50}, "y")
+    assert ledger.budget_state() == "soft"
+    ledger.record("@cf/b", {"total_tokens": 100}, "x")
+    assert ledger.budget_state() == "hard"
+
+    ledger.flush()
+    summary = ledger.summary(days=1)
+    assert summary["by_model"]["@cf/a"] == {"calls": 2, "total_tokens": 120}
+    assert summary["by_model"]["@cf/b"] == {"calls": 1, "total_tokens": 100}
+    assert len(summary["daily"]) == 3
+
+    # Today's total is restored from disk after a restart
+    restarted = UsageLedger(str(tmp_path / "usage.db"), hard_daily_tokens=200)
+    assert restarted.budget_state() == "hard"
+
+
+def test_usage_ledger_closes_its_read_connections(tmp_path):
+    from backend.components.ai_tools.usage_ledger import UsageLedger
+
+    ledger = UsageLedger(str(tmp_path / "usage.db"))
+    opened = []
+    connect = ledger._connect
+
+    def tracked_connect():
+        opened.append(connect())
+        return opened[-1]
+
+    ledger._connect = tracked_connect
+    for _ in range(3):
+        ledger.summary(days=1)
+    assert len(opened) == 3
+    for db in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            db.execute("SELECT 1")
@@ -0,0 +1,126 @@
+import json
+import os
+import threading
+import time
+
+from backend.config_service import ConfigService, normalize_config, parse_config
+
+
+SHIPPED = {
+    "api_keys": {"ollama": "YOUR_OLLAMA_API_KEY", "openai": ""},
+    "server": {"mcp_url": "http://localhost:3000"},
+    "ai_settings": {
+        "system_prompt": "Be brief.",
+        "models": {
+            "default": "ollama:llama3.2:latest",
+            "language": {"polish": "ollama:bielik:7b"},
+            "code": "ollama:codellama:7b",
+        },
+        "model_path": "",
+    },
+    "file_paths": [],
+}
+
+
+def test_parse_nested_file_shape():
+    config = parse_config(SHIPPED)
+    assert config.system_prompt == "Be brief."
+    assert config.ollama_model == "llama3.2:latest"
+    assert config.polish_model == "bielik:7b"
+    assert config.ollama_api_key == ""  # placeholder is not a key
+    assert config.provider == "ollama"
+
+
+def test_flat_dashboard_form_is_normalized():
+    nested = normalize_config({
+        "system_prompt": "Hi", "openai_api_key": "sk-1",
+        "selected_ai_model": "mistral", "file_paths": ["a.txt"],
+    })
+    assert nested == {
+        "api_keys": {"openai": "sk-1"},
+        "ai_settings": {"system_prompt": "Hi",
+                        "models": {"default": "ollama:mistral"}},
+        "file_paths": ["a.txt"],
+    }
+    assert parse_config(nested).provider == "openai"
+
+
+def test_save_and_external_edit_swap_snapshots(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(SHIPPED), encoding="utf-8")
+    service = ConfigService(str(path), watch=False)
+    changes = []
+    service.subscribe(lambda old, new: changes.append(new.generation))
+
+    before = service.config
+    after = service.save({"system_prompt": "Nowy prompt"})
+    assert before.system_prompt == "Be brief."  # old snapshot untouched
+    assert after.system_prompt == "Nowy prompt"
+    assert after.polish_model == "bielik:7b"  # merged, not replaced
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert saved["ai_settings"]["system_prompt"] == "Nowy prompt"
+
+    path.write_text("{broken", encoding="utf-8")
+    os.utime(path, (time.time() + 5, time.time() + 5))
+    assert service.check() is False
+    assert service.config is after
+
+    edited = dict(SHIPPED, file_paths=["notes.md"])
+    path.write_text(json.dumps(edited), encoding="utf-8")
+    os.utime(path, (time.time() + 10, time.time() + 10))
+    assert service.check() is True
+    assert service.config.file_paths == ("notes.md",)
+    assert changes == [after.generation, service.config.generation]
+
+
+def test_concurrent_saves_keep_every_update(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(SHIPPED), encoding="utf-8")
+    # Two workers, each with its own (soon stale) snapshot
+    first = ConfigService(str(path), watch=False)
+    second = ConfigService(str(path), watch=False)
+
+    first.save({"system_prompt": "Nowy prompt"})
+    second.save({"model_path": "/models"})
+    threads = [
+        threading.Thread(target=service.save, args=(update,))
+        for service, update in (
+            (first, {"selected_ai_model": "mistral"}),
+            (second, {"file_paths": ["notes.md"]}),
+        )
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    saved = parse_config(json.loads(path.read_text(encoding="utf-8")))
+    assert saved.system_prompt == "Nowy prompt"
+    assert saved.model_path == "/models"
+    assert saved.ollama_model == "mistral"
+    assert saved.file_paths == ("notes.md",)
+
+
+def test_ai_chat_follows_reloaded_config(tmp_path):
+    from backend.chatbot import AIChat
+
+    notes = tmp_path / "notes.md"
+    notes.write_text("v1", encoding="utf-8")
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(dict(SHIPPED, file_paths=[str(notes)])),
+                    encoding="utf-8")
+    service = ConfigService(str(path), watch=False)
+    chat = AIChat(service)
+    prompts = []
+    chat.get_ollama_response = lambda prompt, model=None: prompts.append(
+        (prompt, model)
+    ) or "ok"
+
+    chat.get_standard_response("hello")
+    service.save({"system_prompt": "Reloaded", "selected_ai_model": "mistral"})
+    notes.write_text("v2!", encoding="utf-8")
+    chat.get_standard_response("hello")
+
+    assert prompts[0][0].startswith("Be brief.") and "v1" in prompts[0][0]
+    assert prompts[1][0].startswith("Reloaded") and "v2!" in prompts[1][0]
+    assert prompts[1][1] == "mistral"
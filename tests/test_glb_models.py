@@ -0,0 +1,94 @@
+import json
+import struct
+
+import pytest
+
+import backend.glb_models
+from backend.app import create_app
+from backend.glb_models import GLBManifest, read_glb_metadata
+
+
+def write_glb(path, gltf, binary=b"\0" * 4096):
+    data = json.dumps(gltf).encode()
+    data += b" " * (-len(data) % 4)
+    body = (
+        struct.pack("<II", len(data), 0x4E4F534A) + data
+        + struct.pack("<II", len(binary), 0x004E4942) + binary
+    )
+    path.write_bytes(struct.pack("<4sII", b"glTF", 2, 12 + len(body)) + body)
+
+
+CUBE = {
+    "asset": {"version": "2.0", "generator": "test"},
+    "scene": 0,
+    "scenes": [{"nodes": [0]}],
+    "nodes": [
+        {"translation": [10, 0, 0], "children": [1]},
+        {"mesh": 0, "scale": [2, 2, 2]},
+    ],
+    "meshes": [{"primitives": [{"attributes": {"POSITION": 0}}]}],
+    "accessors": [
+        {"count": 24, "min": [-1, -1, -1], "max": [1, 1, 1]},
+    ],
+}
+
+
+def test_metadata_from_glb_header(tmp_path):
+    path = tmp_path / "cube.glb"
+    write_glb(path, CUBE)
+    meta = read_glb_metadata(str(path))
+    assert meta["vertex_count"] == 24 and meta["mesh_count"] == 1
+    assert meta["bbox"] == {"min": [8, -2, -2], "max": [12, 2, 2]}
+
+    (tmp_path / "broken.glb").write_bytes(b"not a model at all")
+    with pytest.raises(ValueError):
+        read_glb_metadata(str(tmp_path / "broken.glb"))
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    write_glb(tmp_path / "cube.glb", CUBE)
+    (tmp_path / "models.json").write_text(json.dumps({"models": [
+        {"id": "cube", "name": "Cube", "path": "/static/models/cube.glb"},
+        {"id": "gone", "name": "Gone", "path": "/static/models/gone.glb"},
+    ]}))
+    monkeypatch.setattr(
+        backend.glb_models, "_glb_manifest",
+        GLBManifest(str(tmp_path), str(tmp_path / "index.json")),
+    )
+    app = create_app({
+        "PROVIDER_PROBES": False, "HOST_SAMPLER": False,
+        "BUILD_ASSETS": False,
+    })
+    return app.test_client()
+
+
+def test_manifest_and_range_requests(client, tmp_path):
+    models = client.get("/api/3d/models").get_json()["data"]["models"]
+    cube, gone = models
+    assert cube["available"] and cube["vertex_count"] == 24
+    assert cube["size"] == (tmp_path / "cube.glb").stat().st_size
+    assert gone == {
+        "id": "gone", "name": "Gone", "path": "/static/models/gone.glb",
+        "available": False,
+    }
+
+    full = client.get(cube["url"])
+    assert full.data == (tmp_path / "cube.glb").read_bytes()
+    assert "immutable" in full.headers["Cache-Control"]
+    assert full.headers["Accept-Ranges"] == "bytes"
+
+    part = client.get(cube["url"], headers={"Range": "bytes=4-11"})
+    assert part.status_code == 206
+    assert part.data == full.data[4:12]
+    assert part.headers["Content-Range"] == f"bytes 4-11/{cube['size']}"
+    assert client.get(
+        cube["url"], headers={"Range": f"bytes={cube['size']}-"}
+    ).status_code == 416
+
+    etag = full.headers["ETag"]
+    assert client.get(
+        "/models/cube.glb", headers={"If-None-Match": etag}
+    ).status_code == 304
+    # Stale hash (the file changed since the manifest was fetched)
+    assert client.get("/models/000000000000/cube.glb").status_code == 404
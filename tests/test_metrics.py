@@ -0,0 +1,165 @@
+import io
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+from werkzeug.wsgi import FileWrapper
+
+from backend.app import create_app
+from backend.metrics import (
+    REQUEST_DURATION,
+    REQUESTS_IN_FLIGHT,
+    MetricsMiddleware,
+    MetricsRegistry,
+    SharedMetrics,
+    render,
+    write_snapshot,
+)
+
+
+def sample(text, line_prefix):
+    """Value of the one exposition line starting with `line_prefix`"""
+    values = [
+        float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line.startswith(line_prefix)
+    ]
+    assert len(values) == 1, (line_prefix, values)
+    return values[0]
+
+
+def test_threads_record_without_sharing_state():
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    labels = (("upstream", "ollama"),)
+
+    def work():
+        for value in (0.05, 0.5, 5.0):
+            registry.observe("dashboard_upstream_duration_seconds", labels, value)
+        registry.inc("dashboard_http_requests_in_flight", labels, 2)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    text = render(*registry.snapshot(), buckets=registry.buckets)
+    name = "dashboard_upstream_duration_seconds"
+    assert sample(text, f'{name}_bucket{{upstream="ollama",le="0.1"}}') == 8
+    assert sample(text, f'{name}_bucket{{upstream="ollama",le="1.0"}}') == 16
+    assert sample(text, f'{name}_bucket{{upstream="ollama",le="+Inf"}}') == 24
+    assert sample(text, f'{name}_sum{{upstream="ollama"}}') == pytest.approx(
+        8 * 5.55
+    )
+    assert sample(text, 'dashboard_http_requests_in_flight{upstream="ollama"}') == 16
+    # Finished threads were folded into one shard
+    assert registry._shards == []
+
+
+def test_metrics_endpoint_reports_routes():
+    app = create_app({"PROVIDER_PROBES": False, "HOST_SAMPLER": False})
+    client = app.test_client()
+    for _ in range(3):
+        response = client.get("/api/debug/startup", buffered=True)
+        assert response.status_code == 200
+    assert client.get("/no/such/page", buffered=True).status_code == 404
+
+    response = client.get("/metrics")
+    assert response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    route = 'method="GET",route="/api/debug/startup"'
+    assert sample(
+        text, f'{REQUEST_DURATION}_count{{{route},status="200"}}'
+    ) >= 3
+    assert sample(
+        text,
+        f'{REQUEST_DURATION}_count{{method="GET",route="<unmatched>",'
+        f'status="404"}}',
+    ) >= 1
+    assert sample(text, f"dashboard_http_requests_in_flight{{{route}}}") == 0
+    assert sample(
+        text, f'dashboard_http_response_bytes_total{{{route},status="200"}}'
+    ) > 0
+
+
+def test_file_responses_keep_the_server_file_wrapper():
+    registry = MetricsRegistry()
+
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Length", "5")])
+        return environ["wsgi.file_wrapper"](io.BytesIO(b"hello"))
+
+    environ = {"REQUEST_METHOD": "GET", "wsgi.file_wrapper": FileWrapper}
+    result = MetricsMiddleware(app, registry)(environ, lambda *args: None)
+    assert type(result) is FileWrapper  # sendfile needs the exact class
+    assert registry.snapshot()[1] == {}
+    result.close()
+    histograms = registry.snapshot()[1]
+    [(name, labels)] = histograms
+    assert name == REQUEST_DURATION
+    assert dict(labels) == {
+        "method": "GET", "route": "<unmatched>", "status": "200",
+    }
+
+
+def test_stream_closed_before_its_first_chunk_is_recorded():
+    registry = MetricsRegistry()
+    closed = []
+
+    class Body:
+        def __iter__(self):
+            yield b"data: 1\n\n"
+
+        def close(self):
+            closed.append(True)
+
+    def app(environ, start_response):
+        start_response("200 OK", [("Content-Type", "text/event-stream")])
+        return Body()
+
+    in_flight = (REQUESTS_IN_FLIGHT, (("method", "GET"), ("route", "/stream")))
+    registry.inc(*in_flight, 1)  # as the Flask before_request hook does
+    environ = {"REQUEST_METHOD": "GET", "dashboard.route": "/stream"}
+    result = MetricsMiddleware(app, registry)(environ, lambda *args: None)
+    result.close()  # client gone before the body started
+    assert closed == [True]
+    values, histograms = registry.snapshot()
+    assert values[in_flight] == 0
+    assert [name for name, _ in histograms] == [REQUEST_DURATION]
+
+
+def test_exited_workers_keep_their_counts(tmp_path):
+    registry = MetricsRegistry()
+    bytes_key = ("dashboard_http_request_bytes_total", (("route", "/x"),))
+    in_flight_key = ("dashboard_http_requests_in_flight", (("route", "/x"),))
+    latency_key = (REQUEST_DURATION, (("route", "/x"),))
+    registry.inc(*bytes_key, 10)
+    shared = SharedMetrics(registry, state_dir=str(tmp_path))
+    shared.publish()  # this process's own file is not counted twice
+
+    worker = subprocess.Popen(
+        [sys.executable, "-c", "import time; time.sleep(30)"]
+    )
+    try:
+        worker_registry = MetricsRegistry()
+        worker_registry.inc(*bytes_key, 5)
+        worker_registry.inc(*in_flight_key, 1)
+        worker_registry.observe(*latency_key, 0.2)
+        write_snapshot(
+            shared.path_for(worker.pid), *worker_registry.snapshot()
+        )
+        values, histograms = shared.collect()
+        assert values == {bytes_key: 15, in_flight_key: 1}
+        assert histograms[latency_key][-1] == pytest.approx(0.2)
+    finally:
+        worker.kill()
+        worker.wait()
+
+    for _ in range(2):
+        values, after = shared.collect()
+        # Counters and histograms do not drop, the dead worker's gauge does
+        assert values == {bytes_key: 15}
+        assert after == histograms
+    assert not os.path.exists(shared.path_for(worker.pid))
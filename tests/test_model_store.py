@@ -0,0 +1,114 @@
+import struct
+import threading
+import time
+
+import pytest
+from backend.model_store import ModelStore, read_gguf_metadata
+
+
+def gguf_string(value):
+    data = value.encode("utf-8")
+    return struct.pack("<Q", len(data)) + data
+
+
+def write_gguf(path, tensor_count=291):
+    """Write a minimal GGUF v3 header followed by fake tensor data."""
+    kv = [
+        gguf_string("general.architecture")
+        + struct.pack("<I", 8)
+        + gguf_string("llama"),
+        gguf_string("general.name") + struct.pack("<I", 8) + gguf_string("tiny"),
+        gguf_string("tokenizer.ggml.tokens")
+        + struct.pack("<IIQ", 9, 8, 2)
+        + gguf_string("a")
+        + gguf_string("b"),
+        gguf_string("general.file_type") + struct.pack("<II", 4, 15),
+        gguf_string("llama.context_length") + struct.pack("<II", 4, 4096),
+    ]
+    header = b"GGUF" + struct.pack("<IQQ", 3, tensor_count, len(kv))
+    path.write_bytes(header + b"".join(kv) + b"\0" * 4096)
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ModelStore(str(tmp_path / "models"))
+
+
+def test_read_gguf_metadata(tmp_path):
+    model = tmp_path / "tiny.gguf"
+    write_gguf(model)
+    metadata = read_gguf_metadata(str(model))
+    assert metadata["architecture"] == "llama"
+    assert metadata["quantization"] == "Q4_K_M"
+    assert metadata["tensor_count"] == 291
+    assert metadata["context_length"] == 4096
+
+
+def test_index_reuses_unchanged_entries(store, tmp_path, monkeypatch):
+    (tmp_path / "models").mkdir()
+    write_gguf(tmp_path / "models" / "tiny.gguf")
+    assert store.index.list_models()[0]["architecture"] == "llama"
+
+    calls = []
+    monkeypatch.setattr(
+        "backend.model_store.read_gguf_metadata", lambda p: calls.append(p)
+    )
+    store.index.list_models()
+    assert calls == []
+
+
+def test_listing_does_not_wait_for_a_checksum(store, tmp_path, monkeypatch):
+    (tmp_path / "models").mkdir()
+    write_gguf(tmp_path / "models" / "tiny.gguf")
+    hashing, release = threading.Event(), threading.Event()
+
+    def slow_checksum(path):
+        hashing.set()
+        release.wait(5)
+        return "abc"
+
+    monkeypatch.setattr("backend.model_store.file_checksum", slow_checksum)
+    results = []
+    worker = threading.Thread(
+        target=lambda: results.append(store.index.checksum("tiny.gguf"))
+    )
+    worker.start()
+    assert hashing.wait(5)
+    assert [e["file"] for e in store.index.list_models()] == ["tiny.gguf"]
+    release.set()
+    worker.join()
+    assert results == ["abc"]
+    assert store.index.list_models()[0]["sha256"] == "abc"
+
+
+def test_import_links_on_same_filesystem(store, tmp_path):
+    source = tmp_path / "tiny.gguf"
+    write_gguf(source)
+    result = store.import_model(str(source))
+    assert result["status"] == "installed"
+    assert result["method"] in ("reflink", "hardlink")
+    assert (tmp_path / "models" / "tiny.gguf").exists()
+
+
+def test_background_copy_deduplicates(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(store, "_link", lambda src, dst: None)
+    source = tmp_path / "tiny.gguf"
+    write_gguf(source)
+
+    job = store.import_model(str(source))["job"]
+    for _ in range(100):
+        if store.get_job(job["id"])["status"] not in ("pending", "copying"):
+            break
+        time.sleep(0.01)
+    assert store.get_job(job["id"])["status"] == "installed"
+    assert store.get_job(job["id"])["progress"] == 100.0
+
+    copy = tmp_path / "copy.gguf"
+    copy.write_bytes(source.read_bytes())
+    job = store.import_model(str(copy))["job"]
+    for _ in range(100):
+        if store.get_job(job["id"])["status"] not in ("pending", "verifying"):
+            break
+        time.sleep(0.01)
+    assert store.get_job(job["id"])["status"] == "duplicate"
+    assert not (tmp_path / "models" / "copy.gguf").exists()
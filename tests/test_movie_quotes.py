@@ -0,0 +1,56 @@
+import json
+import os
+
+import pytest
+
+from backend.movie_quotes import WeatherMovieQuotes
+
+
+def write_corpus(path, quotes):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": "1.0.0", "quotes": quotes}, f)
+
+
+def quote(text, condition="rainy", movie="Blade Runner", year=1982):
+    return {"quote": text, "movie": movie, "character": "Someone",
+            "year": year, "weather_condition": condition}
+
+
+def test_shipped_corpus_covers_every_graphics_condition():
+    quotes = WeatherMovieQuotes()
+    assert {"sunny", "cloudy", "rainy", "stormy", "snowy", "foggy"} <= set(
+        quotes.conditions
+    )
+
+
+def test_shuffle_bag_indices_and_unknown_condition(tmp_path):
+    path = tmp_path / "quotes.json"
+    write_corpus(path, [quote(f"q{i}") for i in range(5)] + [
+        quote("cold", "snowy", "Frozen", 2013),
+    ])
+    quotes = WeatherMovieQuotes(str(path))
+
+    drawn = [quotes.get_random_quote("rainy").quote for _ in range(10)]
+    assert sorted(drawn[:5]) == sorted(drawn[5:]) == [f"q{i}" for i in range(5)]
+    assert drawn[4] != drawn[5]
+    assert len(quotes.get_quotes_by_movie("blade runner")) == 5
+    assert [q.quote for q in quotes.get_quotes_by_decade(2010)] == ["cold"]
+    with pytest.raises(ValueError):
+        quotes.get_random_quote("volcanic")
+
+
+def test_hot_reload_keeps_old_corpus_on_bad_file(tmp_path, monkeypatch):
+    import backend.movie_quotes as movie_quotes
+
+    monkeypatch.setattr(movie_quotes, "RELOAD_CHECK_INTERVAL", 0)
+    path = tmp_path / "quotes.json"
+    write_corpus(path, [quote("old")])
+    quotes = WeatherMovieQuotes(str(path))
+
+    write_corpus(path, [quote("new")])
+    os.utime(path, (1, 1))
+    assert quotes.get_random_quote("rainy").quote == "new"
+
+    path.write_text("{broken", encoding="utf-8")
+    os.utime(path, (2, 2))
+    assert quotes.get_random_quote("rainy").quote == "new"
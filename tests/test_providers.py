@@ -0,0 +1,38 @@
+from backend.providers import ProviderRegistry
+
+
+def test_provider_created_lazily_once():
+    created = []
+    registry = ProviderRegistry()
+    registry.register("demo", lambda: created.append(1) or object())
+    assert created == []
+
+    first = registry.get("demo")
+    assert registry.get("demo") is first
+    assert created == [1]
+
+
+def test_failed_factory_marks_provider_unhealthy():
+    def broken():
+        raise ValueError("missing credentials")
+
+    registry = ProviderRegistry()
+    registry.register("broken", broken)
+    assert registry.get("broken") is None
+    status = registry.status()["broken"]
+    assert status["healthy"] is False
+    assert status["error"] == "missing credentials"
+
+
+def test_health_is_cached_until_max_age():
+    checks = []
+    registry = ProviderRegistry()
+    registry.register(
+        "demo",
+        object,
+        health_check=lambda _: checks.append(1) or {"success": True},
+    )
+    assert registry.health("demo").healthy is None
+    assert registry.health("demo", max_age=60).healthy is True
+    assert registry.health("demo", max_age=60).healthy is True
+    assert len(checks) == 1
@@ -0,0 +1,89 @@
+import functools
+import json
+import os
+import shutil
+
+import pytest
+
+from backend.components.ai_tools.schema_validation import (
+    SchemaRegistry,
+    SchemaValidationError,
+)
+from backend.components.ai_tools.tools_repository import ToolsRepository
+from backend.config_service import ConfigService
+
+CONFIG_DIR = os.path.join(os.path.dirname(__file__), "..", "config")
+
+TOOL = {
+    "name": "Claude",
+    "url": "https://claude.ai",
+    "category": "AI Assistant",
+    "icon": "fas fa-robot",
+}
+
+
+@pytest.fixture
+def registry(tmp_path):
+    for name in ("ai_tools.schema.json", "config.schema.json"):
+        shutil.copy(os.path.join(CONFIG_DIR, name), tmp_path / name)
+    return SchemaRegistry(str(tmp_path))
+
+
+def test_shipped_files_match_their_schemas(registry):
+    for name in ("ai_tools", "config"):
+        with open(os.path.join(CONFIG_DIR, f"{name}.json"), encoding="utf-8") as f:
+            registry.validate(name, json.load(f))
+
+
+def test_validator_is_compiled_once_and_rebuilt_on_schema_change(registry, tmp_path):
+    validator = registry.validator("ai_tools", "tool")
+    assert registry.validator("ai_tools", "tool") is validator
+    registry.validate("ai_tools", dict(TOOL, id="x", url="${LOCAL_URL}"),
+                      definition="tool")
+    with pytest.raises(SchemaValidationError):
+        registry.validate("ai_tools", dict(TOOL, id="x", category="Nope"),
+                          definition="tool")
+
+    path = tmp_path / "ai_tools.schema.json"
+    schema = json.loads(path.read_text(encoding="utf-8"))
+    schema["$defs"]["tool"]["properties"]["category"]["enum"].append("Nope")
+    path.write_text(json.dumps(schema, indent=4), encoding="utf-8")
+    registry._checked_at.clear()
+    assert registry.validator("ai_tools", "tool") is not validator
+    registry.validate("ai_tools", dict(TOOL, id="x", category="Nope"),
+                      definition="tool")
+
+
+def test_repository_rejects_invalid_tools_and_imports_all_or_nothing(registry, tmp_path):
+    path = str(tmp_path / "ai_tools.json")
+    repo = ToolsRepository(path, validate=functools.partial(
+        registry.validate, "ai_tools", definition="tool"
+    ))
+    assert repo.add(dict(TOOL))["id"] == "claude"
+    with pytest.raises(ValueError):
+        repo.update("claude", dict(TOOL, icon="robot"))
+
+    with pytest.raises(SchemaValidationError) as e:
+        repo.import_tools([dict(TOOL, name="A"), dict(TOOL, name="B", url=5),
+                           {"name": "C"}])
+    assert [err.split(":")[0] for err in e.value.errors] == ["tools[1]", "tools[2]"]
+    assert [t["id"] for t in repo.list()] == ["claude"]
+
+    added = repo.import_tools([dict(TOOL, name="A"), dict(TOOL, name="B")])
+    assert [t["id"] for t in added] == ["a", "b"]
+    with open(path, encoding="utf-8") as f:
+        assert len(json.load(f)["tools"]) == 3
+
+
+def test_config_save_is_validated_before_writing(registry, tmp_path):
+    path = tmp_path / "config.json"
+    service = ConfigService(str(path), watch=False, validate=functools.partial(
+        registry.validate, "config"
+    ))
+    service.save({"system_prompt": "Be brief."})
+    with pytest.raises(ValueError):
+        service.save({"server": {"mcp_url": "not a url"}})
+    with pytest.raises(ValueError):
+        service.save({"ai_settings": {"models": {"code": "bad model name"}}})
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert "server" not in saved and saved["ai_settings"]["models"] == {}
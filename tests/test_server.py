@@ -49,3 +49,13 @@ def test_system_processes(client):
     json_data = rv.get_json()
     assert json_data["success"] is True
     assert isinstance(json_data["data"], list)
+
+
+def test_startup_report(client):
+    """Test the startup timing report."""
+    client.get("/api/system/info")
+    rv = client.get("/api/debug/startup")
+    assert rv.status_code == 200
+    report = rv.get_json()["data"]
+    assert "register blueprints" in [p["name"] for p in report["phases"]]
+    assert report["heavy_modules_loaded"]["psutil"] is True
@@ -0,0 +1,120 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from werkzeug.test import Client
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import FileWrapper
+
+from backend.components.ai_tools.usage_ledger import BUDGET_SOFT, UsageLedger
+from backend.host_state import HostSampler
+from backend.rate_limit import QuotaGuard
+from backend.serving import InFlightTracker
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_drain_waits_for_streams_and_refuses_new_requests():
+    release = threading.Event()
+
+    def slow_app(environ, start_response):
+        def body():
+            yield b"first "
+            release.wait(5)
+            yield b"last"
+        return Response(body())(environ, start_response)
+
+    tracker = InFlightTracker(slow_app)
+    client = Client(tracker)
+    response = client.get("/api/chat", buffered=False)
+    stream = iter(response.response)
+    assert next(stream) == b"first "
+    assert tracker.in_flight == 1
+
+    drained = []
+    drainer = threading.Thread(target=lambda: drained.append(tracker.drain(5)))
+    drainer.start()
+    time.sleep(0.1)
+    assert drained == []
+    refused = client.get("/api/system/info")
+    assert refused.status_code == 503
+    assert json.loads(refused.data)["error"] == "Server is shutting down"
+
+    release.set()
+    assert b"".join(stream) == b"last"
+    response.close()
+    drainer.join(5)
+    assert drained == [True] and tracker.in_flight == 0
+
+
+def test_file_responses_keep_the_server_file_wrapper():
+    """gunicorn and waitress only use sendfile for their own wrapper class"""
+    def file_app(environ, start_response):
+        start_response("200 OK", [("Content-Length", "5")])
+        return environ["wsgi.file_wrapper"](io.BytesIO(b"hello"))
+
+    tracker = InFlightTracker(file_app)
+    environ = {"REQUEST_METHOD": "GET", "wsgi.file_wrapper": FileWrapper}
+    result = tracker(environ, lambda *args: None)
+    assert type(result) is FileWrapper
+    assert tracker.in_flight == 1
+    assert b"".join(result) == b"hello"
+    result.close()
+    assert tracker.in_flight == 0
+
+
+def test_one_sampler_per_host_and_failover(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        "backend.host_state.sample_host", lambda: {"cpu_percent": 12.5}
+    )
+    first = HostSampler(str(tmp_path), interval=1)
+    second = HostSampler(str(tmp_path), interval=1)
+
+    assert first.tick() is True
+    assert second.tick() is False
+    assert second.latest()["cpu_percent"] == 12.5
+    assert second.latest(max_age=-1) is None
+
+    first.stop()  # e.g. the leading worker exited
+    assert second.tick() is True and second.leader.is_leader
+    second.stop()
+
+
+# Another worker process: spends OpenWeatherMap calls and Cloudflare tokens
+WORKER = """
+import asyncio, os, sys
+from backend.components.ai_tools.usage_ledger import UsageLedger
+from backend.rate_limit import QuotaGuard
+
+state_dir = sys.argv[1]
+quota = QuotaGuard(path=os.path.join(state_dir, "owm_quota.json"))
+for _ in range(40):
+    asyncio.run(quota.acquire())
+ledger = UsageLedger(os.path.join(state_dir, "usage.db"))
+ledger.record("@cf/a", {"total_tokens": 150}, "worker")
+ledger.flush()
+"""
+
+
+def test_quota_and_token_budget_are_shared_by_workers(tmp_path):
+    ledger = UsageLedger(
+        str(tmp_path / "usage.db"), soft_daily_tokens=100, sync_interval=0.05
+    )
+    subprocess.run(
+        [sys.executable, "-c", WORKER, str(tmp_path)], cwd=ROOT, check=True
+    )
+
+    # Also what a restarted worker sees
+    quota = QuotaGuard(path=str(tmp_path / "owm_quota.json"))
+    assert quota.status()["day"]["used"] == 40
+    assert quota.remaining() < 60
+
+    deadline = time.monotonic() + 5
+    while ledger.budget_state() != BUDGET_SOFT:
+        assert time.monotonic() < deadline, ledger.today_tokens()
+        time.sleep(0.05)
+    assert ledger.today_tokens() == 150
@@ -0,0 +1,98 @@
+import json
+import multiprocessing
+import os
+
+from backend.components.ai_tools.tools_repository import ToolsRepository
+
+
+def write_tools(path, tools, version="1.1.0"):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "tools": tools}, f)
+
+
+def test_crud_keeps_list_schema_and_reloads_external_edits(tmp_path):
+    path = str(tmp_path / "ai_tools.json")
+    write_tools(path, [{"id": "claude", "name": "Claude", "url": "u"}])
+    repo = ToolsRepository(path)
+
+    assert [t["id"] for t in repo.list()] == ["claude"]
+    assert repo.add({"name": "Claude"})["id"] == "claude-2"
+    assert repo.update("claude", {"name": "Claude 2", "url": "v"})["id"] == "claude"
+    assert repo.update("missing", {"name": "x"}) is None
+    assert repo.delete("claude-2") and not repo.delete("claude-2")
+
+    with open(path, encoding="utf-8") as f:
+        saved = json.load(f)
+    assert saved["version"] == "1.1.0"
+    assert saved["tools"] == [{"name": "Claude 2", "url": "v", "id": "claude"}]
+
+    # Another process rewrote the file: picked up by mtime/size
+    write_tools(path, [{"id": "ollama", "name": "Ollama", "url": "w"}])
+    repo._checked_at = 0
+    assert repo.get("ollama")["name"] == "Ollama"
+
+
+def test_legacy_dict_shape_and_batch_rollback(tmp_path):
+    path = str(tmp_path / "ai_tools.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"tools": {"0": {"name": "Old"}}}, f)
+    repo = ToolsRepository(path)
+    assert repo.list() == [{"name": "Old", "id": "0"}]
+
+    try:
+        with repo.batch():
+            repo.add({"name": "Temp"})
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    assert [t["id"] for t in repo.list()] == ["0"]
+
+
+def _add_many(path, prefix):
+    repo = ToolsRepository(path)
+    for i in range(20):
+        repo.add({"name": f"{prefix} {i}"})
+
+
+def test_concurrent_processes_do_not_lose_updates(tmp_path):
+    path = str(tmp_path / "ai_tools.json")
+    write_tools(path, [])
+    ctx = multiprocessing.get_context("fork" if os.name != "nt" else "spawn")
+    workers = [
+        ctx.Process(target=_add_many, args=(path, f"w{n}")) for n in range(3)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+    assert len(ToolsRepository(path).list()) == 60
+
+
+def test_index_search_ranking_filters_and_incremental_updates(tmp_path):
+    path = str(tmp_path / "ai_tools.json")
+    write_tools(path, [
+        {"id": "claude", "name": "Claude", "category": "AI Assistant",
+         "tags": ["Anthropic", "Conversational"],
+         "description": "Conversational models"},
+        {"id": "perplexity", "name": "Perplexity", "category": "Research",
+         "tags": ["Search"], "description": "Answers with Claude and GPT"},
+        {"id": "ollama", "name": "Ollama Web UI", "category": "Local AI",
+         "tags": ["Local"], "description": "Run models locally"},
+    ])
+    repo = ToolsRepository(path)
+
+    total, page = repo.search("claude")
+    assert total == 2 and [t["id"] for t in page] == ["claude", "perplexity"]
+    assert [t["id"] for t in repo.search("conv")[1]] == ["claude"]  # prefix
+    assert repo.search("claude gpt")[0] == 1  # all tokens must match
+    assert [t["id"] for t in repo.search(category="local ai")[1]] == ["ollama"]
+    assert repo.search("models", tag="anthropic")[0] == 1
+    assert [t["id"] for t in repo.search(limit=1, offset=1)[1]] == ["perplexity"]
+
+    repo.update("ollama", {"name": "Ollama", "tags": ["Claude-free"]})
+    repo.add({"name": "Claude Code", "category": "Development"})
+    repo.delete("perplexity")
+    assert [t["id"] for t in repo.search("claude")[1]] == [
+        "claude", "claude-code", "ollama"
+    ]
+    assert repo.search(category="Research") == (0, [])
@@ -0,0 +1,473 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.weather_cache import AsyncTTLCache
+
+
+def owm_payload(city_id, main="Clear", temp=12.3):
+    """Minimal OpenWeatherMap /weather response"""
+    return {
+        "id": city_id,
+        "name": f"City {city_id}",
+        "sys": {"country": "PL", "sunrise": 1700000000, "sunset": 1700030000},
+        "main": {"temp": temp, "feels_like": temp, "humidity": 70,
+                 "pressure": 1010},
+        "wind": {"speed": 3.0, "deg": 90},
+        "weather": [{"main": main, "description": "test", "icon": "01d"}],
+        "visibility": 10000,
+    }
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_hit_miss_and_coalescing():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"temp": len(calls)}
+
+    async def scenario():
+        cache = AsyncTTLCache(ttl=60)
+        first = await asyncio.gather(
+            *(cache.get_or_fetch("warsaw", fetch) for _ in range(5))
+        )
+        again = await cache.get_or_fetch("warsaw", fetch)
+        return cache, first, again
+
+    cache, first, again = run(scenario())
+    assert len(calls) == 1
+    assert first == [{"temp": 1}] * 5 and again == {"temp": 1}
+    assert cache.stats()["misses"] == 5
+    assert cache.stats()["hits"] == 1
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_fetch():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"temp": 1}
+
+    async def scenario():
+        cache = AsyncTTLCache(ttl=60)
+        first = asyncio.ensure_future(cache.get_or_fetch("warsaw", fetch))
+        second = asyncio.ensure_future(cache.get_or_fetch("warsaw", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        value = await second
+        return cache, first, value
+
+    cache, first, value = run(scenario())
+    assert first.cancelled() and value == {"temp": 1}
+    assert len(calls) == 1 and "warsaw" in cache
+
+
+def test_stale_while_revalidate():
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        return len(calls)
+
+    async def scenario():
+        cache = AsyncTTLCache(ttl=60, stale_ttl=60)
+        cache.set("warsaw", 0, fetched_at=time.time() - 90)
+        stale = await cache.get_or_fetch("warsaw", fetch)
+        await asyncio.sleep(0)  # let the background refresh finish
+        await asyncio.sleep(0)
+        fresh = await cache.get_or_fetch("warsaw", fetch)
+        return cache, stale, fresh
+
+    cache, stale, fresh = run(scenario())
+    assert (stale, fresh) == (0, 1)
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_expired_beyond_stale_window_refetches_and_lru_eviction():
+    async def fetch():
+        return "new"
+
+    async def scenario():
+        cache = AsyncTTLCache(maxsize=2, ttl=60, stale_ttl=10)
+        cache.set("a", "old", fetched_at=time.time() - 100)
+        cache.set("b", "b")
+        value = await cache.get_or_fetch("a", fetch)
+        cache.set("c", "c")
+        return cache, value
+
+    cache, value = run(scenario())
+    assert value == "new"
+    assert "b" not in cache and "a" in cache and "c" in cache
+
+
+def test_weather_api_sync_calls_can_repeat(monkeypatch):
+    from backend.weather_integration import WeatherAPI
+
+    api = WeatherAPI("key")
+    calls = []
+
+    async def fake_fetch(city):
+        calls.append(city)
+        return {
+            "success": True,
+            "weather": {"city": city},
+            "graphics": {"condition": "sunny"},
+        }
+
+    monkeypatch.setattr(api, "fetch_weather", fake_fetch)
+    assert api.get_weather_data_sync("Warsaw")["success"]
+    # The second call used to re-await the coroutine cached by lru_cache
+    second = api.get_weather_data_sync("warsaw")
+    assert second["success"] and "movie_quote" in second
+    assert calls == ["Warsaw"]
+
+
+def test_weather_batch_uses_cache_group_and_per_city_errors(monkeypatch):
+    from backend.weather_integration import WeatherAPI
+
+    api = WeatherAPI("key")
+    api.cache.set("krakow", {"success": True, "graphics": {"condition": "sunny"}})
+    api.city_ids.update({"gdansk": 1, "poznan": 2})
+    single, groups = [], []
+
+    async def fake_fetch(city):
+        single.append(city)
+        if city == "Atlantis":
+            raise Exception("API Error 404: city not found")
+        return {"success": True, "graphics": {"condition": "sunny"}}
+
+    async def fake_group(ids):
+        groups.append(ids)
+        return {i: owm_payload(i, "Rain") for i in ids}
+
+    monkeypatch.setattr(api, "fetch_weather", fake_fetch)
+    monkeypatch.setattr(api, "fetch_group", fake_group)
+
+    results = asyncio.run(api.get_weather_batch_async(
+        ["Krakow", "Gdansk", "Poznan", "Lodz", "Atlantis"]
+    ))
+    assert list(results) == ["Krakow", "Gdansk", "Poznan", "Lodz", "Atlantis"]
+    assert sorted(single) == ["Atlantis", "Lodz"]
+    assert groups == [[1, 2]]
+    assert results["Gdansk"]["graphics"]["condition"] == "rainy"
+    assert results["Atlantis"] == {
+        "success": False, "error": "API Error 404: city not found"
+    }
+
+
+def test_weather_store_warms_cache_and_serves_last_observation(tmp_path):
+    from backend.weather_integration import WeatherAPI
+    from backend.weather_store import WeatherStore
+
+    store = WeatherStore(str(tmp_path / "weather.db"))
+    fetched_at = time.time() - 60
+    store.save("warsaw", owm_payload(756135, temp=7.5), fetched_at)
+    store.save("oslo", owm_payload(3143244), time.time() - 86400)
+    store.flush()
+
+    # A restarted process starts with a warm cache
+    api = WeatherAPI("key", store=store)
+    assert "warsaw" in api.cache and "oslo" not in api.cache
+    assert api.city_ids["warsaw"] == 756135
+    assert api.cache.peek("warsaw").fetched_at == fetched_at
+
+    async def offline(endpoint, params):
+        raise Exception("Connection refused")
+
+    api.request = offline
+    # Too old to be cached, but still the last real observation
+    result = asyncio.run(api.get_weather_data_async("Oslo"))
+    assert result["success"] and result["stale"]
+    assert result["weather"]["temperature"] == 12.3
+    assert result["error"] == "Connection refused"
+
+    missing = asyncio.run(api.get_weather_data_async("Atlantis"))
+    assert missing["success"] is False and "stale" not in missing
+
+
+def test_fresh_observation_of_another_worker_is_read_off_the_loop(tmp_path):
+    import threading
+
+    from backend.weather_integration import WeatherAPI
+    from backend.weather_store import WeatherStore
+
+    store = WeatherStore(str(tmp_path / "weather.db"))
+    api = WeatherAPI("key", store=store)
+    # Saved by another worker after this one started
+    store.save("warsaw", owm_payload(756135, temp=7.5))
+    store.flush()
+    load = store.load
+    readers = []
+
+    def tracked_load(key):
+        readers.append(threading.get_ident())
+        return load(key)
+
+    async def offline(endpoint, params):
+        raise Exception("upstream called")
+
+    store.load = tracked_load
+    api.request = offline
+    result = run(api.get_weather_data_async("Warsaw"))
+    assert result["success"] and "stale" not in result
+    assert result["weather"]["temperature"] == 7.5
+    assert readers and threading.get_ident() not in readers
+
+
+def test_weather_store_closes_its_read_connections(tmp_path):
+    import sqlite3
+
+    from backend.weather_store import WeatherStore
+
+    store = WeatherStore(str(tmp_path / "weather.db"))
+    opened = []
+    connect = store._connect
+
+    def tracked_connect():
+        opened.append(connect())
+        return opened[-1]
+
+    store._connect = tracked_connect
+    store.load("warsaw")
+    store.load_recent(60)
+    assert len(opened) == 2
+    for db in opened:
+        with pytest.raises(sqlite3.ProgrammingError):
+            db.execute("SELECT 1")
+
+
+def test_prefetcher_refreshes_due_cities_within_budget():
+    from backend.weather_integration import WeatherAPI
+    from backend.weather_prefetch import WeatherPrefetcher
+
+    api = WeatherAPI("key")
+    fetched = []
+
+    async def fake_fetch(city):
+        fetched.append(city)
+        return {"success": True, "graphics": {"condition": "sunny"}}
+
+    api.fetch_weather = fake_fetch
+    prefetcher = WeatherPrefetcher(
+        api, watch=["Warsaw", "Krakow"], budget_per_minute=2, lead_time=30,
+        jitter=0,
+    )
+    for _ in range(3):
+        prefetcher.record("Gdansk")
+    prefetcher.record("Lodz")  # too few requests to be learned
+    assert prefetcher.watched() == ["Warsaw", "Krakow", "Gdansk"]
+
+    api.cache.set("warsaw", {"fresh": True})  # expires in 300s, not due
+    api.cache.set("krakow", {}, fetched_at=time.time() - 280)
+
+    async def scenario():
+        started = prefetcher.tick()
+        await asyncio.sleep(0)
+        return started
+
+    assert run(scenario()) == 2
+    assert sorted(fetched) == ["Gdansk", "Krakow"]
+    assert api.cache.peek("krakow").expires_at > time.time() + 250
+    # Budget spent: nothing more this minute even when cities fall due
+    api.cache.set("warsaw", {}, fetched_at=time.time() - 290)
+    assert run(scenario()) == 0 and prefetcher.skipped_budget == 1
+
+
+def test_prefetcher_learns_from_every_worker_and_caps_its_counters(tmp_path):
+    from backend.weather_integration import WeatherAPI
+    from backend.weather_prefetch import WeatherPrefetcher
+
+    api = WeatherAPI("key")
+    path = str(tmp_path / "weather_requests.json")
+    leader = WeatherPrefetcher(api, shared_path=path)
+    follower = WeatherPrefetcher(api, shared_path=path)
+    follower.record("Gdansk")
+    follower.record("Gdansk")
+    leader.record("Gdansk")
+    for prefetcher in (follower, leader, follower, leader):
+        prefetcher.share()  # counts are added to the host total only once
+    assert leader.watched() == ["Gdansk"]
+    assert leader.request_counts[api.key_for("Gdansk")] == 3
+
+    capped = WeatherPrefetcher(api, max_tracked=4)
+    for i in range(10):
+        capped.record(f"City {i}")
+    assert len(capped.request_counts) <= 4 and len(capped.names) <= 4
+
+
+def test_fold_name_and_resolver_aliases(tmp_path):
+    from backend.geocoding import CityResolver, fold_name
+
+    assert fold_name(" Łódź , PL") == "lodz,pl"
+    assert fold_name("KRAKÓW") == fold_name("krakow")
+
+    calls = []
+
+    async def geocode(name):
+        calls.append(name)
+        return [{
+            "name": "Warsaw", "country": "PL", "lat": 52.2319, "lon": 21.0067,
+            "local_names": {"pl": "Warszawa", "en": "Warsaw"},
+        }]
+
+    path = str(tmp_path / "geocode.json")
+    resolver = CityResolver(path)
+
+    async def scenario():
+        first = await asyncio.gather(
+            resolver.resolve("Warsaw", geocode),
+            resolver.resolve("warsaw", geocode),
+        )
+        return first + [
+            await resolver.resolve(name, geocode)
+            for name in ("WARSZAWA", "Warsaw,PL", "warsaw, pl")
+        ]
+
+    locations = run(scenario())
+    assert calls == ["Warsaw"]
+    assert {loc.key for loc in locations} == {"52.23,21.01"}
+
+    # The index survives a restart
+    assert CityResolver(path).lookup("warszawa").key == "52.23,21.01"
+
+
+def test_resolver_remembers_unknown_names_briefly(tmp_path):
+    from backend.geocoding import CityResolver
+
+    calls = []
+    now = [0.0]
+
+    async def geocode(name):
+        calls.append(name)
+        return []
+
+    resolver = CityResolver(
+        str(tmp_path / "geocode.json"), miss_ttl=60, clock=lambda: now[0]
+    )
+    for name in ("Atlantis", "atlantis", " ATLANTIS "):
+        assert run(resolver.resolve(name, geocode)) is None
+    assert calls == ["Atlantis"]
+
+    now[0] += 61
+    assert run(resolver.resolve("Atlantis", geocode)) is None
+    assert calls == ["Atlantis", "Atlantis"]
+
+
+def test_weather_api_keys_aliases_canonically(tmp_path):
+    from backend.geocoding import CityResolver
+    from backend.weather_integration import WeatherAPI
+
+    api = WeatherAPI("key", resolver=CityResolver(str(tmp_path / "geo.json")))
+    requests = []
+
+    async def fake_request(endpoint, params, base_url=None):
+        requests.append((endpoint, params))
+        if endpoint == "direct":
+            return [{"name": "Warsaw", "country": "PL", "lat": 52.23,
+                     "lon": 21.01, "local_names": {"pl": "Warszawa"}}]
+        return owm_payload(756135)
+
+    api.request = fake_request
+
+    async def scenario():
+        for city in ("Warsaw", "Warszawa", "warsaw,pl"):
+            assert (await api.get_weather_data_async(city))["success"]
+
+    run(scenario())
+    assert [e for e, _ in requests] == ["direct", "weather"]
+    assert requests[1][1] == {"lat": 52.23, "lon": 21.01}
+    assert api.city_ids == {"52.23,21.01": 756135}
+    assert len(api.cache) == 1
+
+
+def test_weather_enrichment_runs_concurrently_and_caches_parts(tmp_path):
+    from backend.geocoding import CityResolver
+    from backend.weather_integration import WeatherAPI
+
+    api = WeatherAPI("key", resolver=CityResolver(str(tmp_path / "geo.json")))
+    api.resolver.add("warsaw", {"name": "Warsaw", "country": "PL",
+                                "lat": 52.23, "lon": 21.01})
+    calls, active, peak = [], [0], [0]
+
+    async def fake_request(endpoint, params, base_url=None):
+        calls.append(endpoint)
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        await asyncio.sleep(0.01)
+        active[0] -= 1
+        if endpoint == "onecall":
+            return {"current": {"uvi": 4.2}}
+        if endpoint == "forecast":
+            return {"list": [{"dt": 1700000000, "main": {"temp": 5.04},
+                              "weather": [{"main": "Rain",
+                                           "description": "light rain"}],
+                              "pop": 0.4}] * params["cnt"]}
+        return owm_payload(756135)
+
+    api.request = fake_request
+
+    async def scenario():
+        full = await api.get_weather_data_async("Warsaw", ["uv", "forecast"])
+        plain = await api.get_weather_data_async("Warsaw")
+        assert "uv_index" not in plain["weather"]  # not measured, not 0
+        # Current expires first; UV and forecast still come from cache
+        api.cache.set("52.23,21.01", full, fetched_at=time.time() - 1000)
+        again = await api.get_weather_data_async("Warsaw", ["uv", "forecast"])
+        return full, again
+
+    full, again = run(scenario())
+    assert peak[0] == 3
+    assert full["weather"]["uv_index"] == 4.2
+    assert len(full["forecast"]) == 8
+    assert full["forecast"][0]["precipitation_chance"] == 40
+    assert calls.count("onecall") == 1 and calls.count("forecast") == 1
+    assert again["weather"]["uv_index"] == 4.2
+
+
+def test_quota_guard_queues_then_serves_stale():
+    from backend.rate_limit import QuotaExceeded, QuotaGuard
+    from backend.weather_integration import WeatherAPI
+
+    now = [0.0]
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    quota = QuotaGuard(
+        per_minute=60, per_day=62, clock=lambda: now[0], sleep=fake_sleep
+    )
+
+    async def take(n, max_wait=0):
+        for _ in range(n):
+            await quota.acquire(max_wait)
+
+    run(take(60))
+    with pytest.raises(QuotaExceeded):
+        run(take(1))
+    run(take(1, max_wait=2))  # queued until a token refills (1/s)
+    assert slept == [pytest.approx(1.0)]
+    assert quota.status()["queued"] == 1 and quota.status()["rejected"] == 1
+
+    now[0] += 1.1
+    run(take(1))
+    with pytest.raises(QuotaExceeded, match="Daily"):
+        run(take(1, max_wait=5))
+    assert quota.status()["day"]["remaining"] == 0
+
+    # An exhausted quota never reaches upstream; stale data is served
+    api = WeatherAPI("key", quota=quota)
+    api.cache.set("warsaw", {"success": True, "weather": {},
+                             "graphics": {"condition": "sunny"}},
+                  fetched_at=time.time() - 3600)
+    api.get_session = lambda: pytest.fail("upstream called")
+    result = run(api.get_weather_data_async("Warsaw"))
+    assert result["stale"] and "quota" in result["error"]